@@ -1,17 +1,35 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import numpy as np
 import os
-import re
+import json
+import time
 import hashlib
+import hmac
+import signal
+import threading
 import traceback
 import logging
 import joblib
 import requests as http_requests
+from contextlib import contextmanager
 from functools import wraps
 from google import genai
+from google.genai import errors as genai_errors
+from src.data_loader import check_sequence
+from src.autotune import ensure_profile
 from src.embedding_extractor import EmbeddingExtractor
-from sklearn.decomposition import PCA
+from src.model_registry import LEGACY_PATHS, ModelRegistry
+from src.rate_limiter import RateLimiter, SharedFileBackend
+from src.metrics import MetricsRegistry
+from src.profiling import RequestProfiler, install_signal_handler, start_stack_sampling
+from src.response_cache import ResponseCache
+from src.upstream import UpstreamClient, UpstreamUnavailableError
+from src.tasks import TaskManager
+from src.job_queue import JobStore, QueueFullError
+from src.admission import AdmissionController, AdmissionRejected, Lane
+from src.cascade import Cascade, apply_cascade as run_cascade
+from src.explainer import build_prompt, request_explanation
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -27,6 +45,47 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# --- Metrics: per-thread counters/histograms, scraped from /metrics ---
+metrics = MetricsRegistry(sample_every=int(os.environ.get('METRICS_HISTOGRAM_SAMPLE_EVERY', 1)))
+metrics.counter('protein_api_requests_total', 'HTTP requests by endpoint and status code.')
+metrics.counter('protein_api_errors_total', 'HTTP 5xx responses by endpoint.')
+metrics.counter('protein_api_rate_limited_total', 'Requests rejected by the per-IP rate limiter.')
+metrics.counter('protein_api_predictions_total', 'Sequences classified, by model version.')
+metrics.counter('protein_api_cascade_predictions_total', 'Predictions answered by each cascade stage.')
+metrics.counter('protein_api_admission_rejected_total', 'Requests shed by admission control, by lane.')
+metrics.counter('protein_api_jobs_submitted_total', 'Jobs submitted to the persistent queue, by kind.')
+metrics.histogram('protein_api_request_seconds', 'End-to-end request latency by endpoint.')
+metrics.histogram('protein_api_stage_seconds', 'Time spent per prediction stage.')
+metrics.histogram('protein_api_sequence_length', 'Length of validated input sequences.',
+                  buckets=(50, 100, 200, 300, 400, 510, 800, 1200, 1600, 2000))
+metrics.histogram('protein_api_batch_size', 'Sequences per /api/predict-batch request.',
+                  buckets=(1, 2, 5, 10, 15, 20))
+
+# --- On-demand profiling of live traffic (see /admin/profile and SIGUSR2) ---
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+MAX_PROFILE_SECONDS = 120
+request_profiler = RequestProfiler()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.request_profile = request_profiler.begin_request()
+
+@app.teardown_request
+def stop_request_profile(exc):
+    request_profiler.end_request(g.pop('request_profile', None))
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unmatched'
+    metrics.inc('protein_api_requests_total', endpoint=endpoint, status=response.status_code)
+    if response.status_code >= 500:
+        metrics.inc('protein_api_errors_total', endpoint=endpoint)
+    started = g.get('request_started')
+    if started is not None:
+        metrics.observe('protein_api_request_seconds', time.perf_counter() - started, endpoint=endpoint)
+    return response
+
 # --- [P2] CORS: Restrict to known origins instead of wildcard ---
 ALLOWED_ORIGINS = os.environ.get(
     'CORS_ORIGINS',
@@ -48,65 +107,52 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated
 
+# --- Admin-only operations (profiling, ...): disabled unless ADMIN_TOKEN is set ---
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', None)
+
+def require_admin(f):
+    """Decorator for operator endpoints; they return 404 when ADMIN_TOKEN is not configured."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'Not found'}), 404
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+            return jsonify({'error': 'Unauthorized — invalid or missing admin token'}), 401
+        return f(*args, **kwargs)
+    return decorated
+
 # --- [P1] Input validation constants ---
 MAX_SEQ_LENGTH = 2000
-VALID_AA_REGEX = re.compile(r'^[ACDEFGHIKLMNPQRSTVWXY]+$')
 
 def validate_sequence(raw_sequence):
     """
     Cleans and validates a protein sequence.
     Returns (cleaned_seq, error_response) — error_response is None if valid.
     """
-    if not raw_sequence:
-        return None, (jsonify({'error': 'No sequence provided'}), 400)
-
-    cleaned = raw_sequence.upper().replace('\n', '').replace(' ', '').replace('>', '')
-    # Strip FASTA header line if present
-    lines = cleaned.split('\n')
-    cleaned = ''.join(line for line in lines if not line.startswith('>'))
-    cleaned = cleaned.strip()
-
-    if len(cleaned) == 0:
-        return None, (jsonify({'error': 'Sequence is empty after cleaning'}), 400)
-
-    if len(cleaned) > MAX_SEQ_LENGTH:
-        return None, (jsonify({'error': f'Sequence too long ({len(cleaned)} chars). Max is {MAX_SEQ_LENGTH}.'}), 400)
-
-    if not VALID_AA_REGEX.match(cleaned):
-        invalid_chars = set(c for c in cleaned if c not in 'ACDEFGHIKLMNPQRSTVWXY')
-        return None, (jsonify({'error': f'Invalid characters in sequence: {invalid_chars}. Only standard amino acid letters are allowed.'}), 400)
+    cleaned, error, invalid_positions = check_sequence(raw_sequence, MAX_SEQ_LENGTH)
+    if error:
+        body = {'error': error}
+        if invalid_positions:
+            body['invalid_positions'] = invalid_positions[:100]
+        return None, (jsonify(body), 400)
 
     return cleaned, None
 
 
-# --- [P5] Simple in-memory rate limiter (no extra dependency needed) ---
-from collections import defaultdict
-import time
+# --- [P5] In-memory rate limiter (sliding window counter, O(1) per check) ---
+# Set RATE_LIMIT_DIR to share limits across worker processes through mmap'd files
+RATE_LIMIT_DIR = os.environ.get('RATE_LIMIT_DIR')
 
-class RateLimiter:
-    """Simple per-IP rate limiter using a sliding window."""
-    def __init__(self, max_requests, window_seconds):
-        self.max_requests = max_requests
-        self.window = window_seconds
-        self.requests = defaultdict(list)
-
-    def is_allowed(self, client_ip):
-        now = time.time()
-        # Clean old entries
-        self.requests[client_ip] = [
-            t for t in self.requests[client_ip] if now - t < self.window
-        ]
-        if len(self.requests[client_ip]) >= self.max_requests:
-            return False
-        self.requests[client_ip].append(now)
-        return True
+def make_limiter(name, max_requests, window_seconds):
+    backend = SharedFileBackend(os.path.join(RATE_LIMIT_DIR, f'{name}.ratelimit')) if RATE_LIMIT_DIR else None
+    return RateLimiter(max_requests=max_requests, window_seconds=window_seconds, backend=backend)
 
 # Rate limiters: predict=30/min, fold=10/min, data=60/min, explain=15/min, batch=5/min
-predict_limiter = RateLimiter(max_requests=30, window_seconds=60)
-fold_limiter = RateLimiter(max_requests=10, window_seconds=60)
-data_limiter = RateLimiter(max_requests=60, window_seconds=60)
-explain_limiter = RateLimiter(max_requests=15, window_seconds=60)
-batch_limiter = RateLimiter(max_requests=5, window_seconds=60)
+predict_limiter = make_limiter('predict', 30, 60)
+fold_limiter = make_limiter('fold', 10, 60)
+data_limiter = make_limiter('data', 60, 60)
+explain_limiter = make_limiter('explain', 15, 60)
+batch_limiter = make_limiter('batch', 5, 60)
 
 def rate_limit(limiter):
     """Decorator to apply rate limiting."""
@@ -115,83 +161,141 @@ def rate_limit(limiter):
         def decorated(*args, **kwargs):
             client_ip = request.remote_addr or '127.0.0.1'
             if not limiter.is_allowed(client_ip):
+                metrics.inc('protein_api_rate_limited_total', endpoint=f.__name__)
                 return jsonify({'error': 'Rate limit exceeded. Please try again later.'}), 429
             return f(*args, **kwargs)
         return decorated
     return decorator
 
 
-# Global variables to hold model and data
-model = None
-label_encoder = None
-pca_model = None
-embeddings_2d = None
-labels = None
-label_mapping = {}
+# --- Admission control: shed embedding work early when the model is saturated ---
+# Work is counted in tokens (residues); batch requests get their own bounded lane so
+# bursts of bulk work cannot push single predictions past their deadline.
+admission = AdmissionController([
+    Lane('interactive', deadline_seconds=float(os.environ.get('ADMISSION_DEADLINE_SECONDS', 2.0))),
+    Lane('batch', deadline_seconds=float(os.environ.get('ADMISSION_BATCH_DEADLINE_SECONDS', 10.0)),
+         max_tokens=int(os.environ.get('ADMISSION_BATCH_MAX_TOKENS', 20000))),
+]) if os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true' else None
+
+@contextmanager
+def admitted(lane, tokens):
+    """Holds tokens in an admission lane; a no-op when admission control is disabled."""
+    if admission is None:
+        yield
+        return
+    with admission.admit(lane, tokens):
+        yield
+
+def overloaded_response(e):
+    metrics.inc('protein_api_admission_rejected_total', lane=e.lane)
+    response = jsonify({'error': 'Server is busy. Please retry shortly.', 'retry_after': e.retry_after})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+
+# Classifier backend chosen at startup: 'mlp' (joblib model), 'centroid' or 'knn'
+# (both built from the stored training embeddings, no retraining needed)
+CLASSIFIER_BACKEND = os.environ.get('CLASSIFIER_BACKEND', 'mlp').lower()
+KNN_K = int(os.environ.get('KNN_K', 5))
+
+# --- Model registry: versioned artifacts, hot-swapped without a restart ---
+# <MODEL_REGISTRY_DIR>/<version>/ holds the artifacts and CURRENT names the served version;
+# until a version is published (python -m scripts.publish_model) the legacy paths are served.
+MODEL_REGISTRY_DIR = os.environ.get('MODEL_REGISTRY_DIR', 'models/registry')
+MODEL_WATCH_SECONDS = float(os.environ.get('MODEL_WATCH_SECONDS', 0))
+
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR, backend=CLASSIFIER_BACKEND, knn_k=KNN_K,
+                               fallback_paths=dict(LEGACY_PATHS))
 
 def load_resources():
-    global model, label_encoder, pca_model, embeddings_2d, labels, label_mapping
-
     logger.info("Loading resources...")
 
-    # --- [P4] Prefer joblib over pickle; fall back to pickle if joblib file doesn't exist ---
-    model_path_joblib = "data/real_model.joblib"
-    model_path_pkl = "data/real_model.pkl"
-    le_path_joblib = "data/label_encoder.joblib"
-    le_path_pkl = "data/label_encoder.pkl"
-    emb_path = "data/embeddings_real.npy"
-    lab_path = "data/labels_real.npy"
-
-    # 1. Load model (prefer .joblib, fall back to .pkl)
-    if os.path.exists(model_path_joblib):
-        model = joblib.load(model_path_joblib)
-        logger.info(f"Loaded model (joblib): {type(model).__name__}")
-    elif os.path.exists(model_path_pkl):
-        import pickle
-        logger.warning("Loading model from .pkl (insecure). Consider converting to .joblib.")
-        with open(model_path_pkl, 'rb') as f:
-            model = pickle.load(f)
-        logger.info(f"Loaded model (pickle): {type(model).__name__}")
-        # Auto-convert to joblib for future safety
-        joblib.dump(model, model_path_joblib)
-    # Load Model & Label Encoder
-    try:
-        model = joblib.load('models/real_model.joblib')
-        logger.info("Loaded model (joblib): MLPClassifier")
-    except Exception as e:
-        logger.error(f"Failed to load model: {e}")
+    # --- [P4] Prefer joblib over pickle; convert a legacy .pkl model once ---
+    fallback = model_registry.fallback_paths
+    if not os.path.exists(fallback['model']):
+        if os.path.exists("data/real_model.joblib"):
+            fallback['model'] = "data/real_model.joblib"
+        elif os.path.exists("data/real_model.pkl"):
+            import pickle
+            logger.warning("Loading model from .pkl (insecure). Consider converting to .joblib.")
+            with open("data/real_model.pkl", 'rb') as f:
+                legacy_model = pickle.load(f)
+            # Auto-convert to joblib for future safety
+            joblib.dump(legacy_model, "data/real_model.joblib")
+            fallback['model'] = "data/real_model.joblib"
 
     try:
-        label_encoder = joblib.load('models/label_encoder.joblib')
-        logger.info("Loaded label encoder (joblib)")
-        if hasattr(label_encoder, 'classes_'):
-            label_mapping = {i: label for i, label in enumerate(label_encoder.classes_)}
-            logger.info(f"Loaded {len(label_mapping)} class labels")
-        else:
-            logger.warning("Label encoder has no classes_ attribute")
+        model_registry.load()
     except Exception as e:
-        logger.error(f"Failed to load label encoder: {e}")
-        logger.warning("No label encoder found! Using generic labels.")
-        label_mapping = {i: f'Family {i}' for i in range(10)}
-
-        logger.info(f"Loaded {len(label_mapping)} class labels")
-
-    # 3. Load training embeddings + labels for PCA visualization
-    if os.path.exists(emb_path) and os.path.exists(lab_path):
-        X = np.load(emb_path)
-        labels = np.load(lab_path)
-
-        # Fit PCA on training data
-        pca_model = PCA(n_components=2)
-        embeddings_2d = pca_model.fit_transform(X)
-        logger.info(f"PCA fitted on {X.shape[0]} embeddings")
-    else:
-        logger.warning("Embedding/label files not found!")
-
+        # Start without a model (predictions return 500) rather than serve a broken one;
+        # publishing a complete version and POST /admin/reload recovers
+        logger.error(f"No model served: {e}")
+        return
     logger.info("All resources loaded successfully!")
 
-# Initialize the real ESM-2 extractor
-extractor = EmbeddingExtractor(model_name="facebook/esm2_t6_8M_UR50D")
+# Initialize the real ESM-2 extractor. ESM_WINDOW enables sliding-window embedding of
+# sequences longer than 510 residues instead of truncating them.
+ESM_WINDOW = int(os.environ['ESM_WINDOW']) if os.environ.get('ESM_WINDOW') else None
+ESM_STRIDE = int(os.environ['ESM_STRIDE']) if os.environ.get('ESM_STRIDE') else None
+ESM_MODEL = os.environ.get('ESM_MODEL', "facebook/esm2_t6_8M_UR50D")
+# Torch threads and batch geometry measured on this host (python -m scripts.autotune);
+# ESM_AUTOTUNE=1 calibrates at startup when no result exists for this CPU yet
+if os.environ.get('ESM_AUTOTUNE') == '1':
+    ensure_profile(ESM_MODEL)
+extractor = EmbeddingExtractor(model_name=ESM_MODEL, window=ESM_WINDOW, stride=ESM_STRIDE)
+
+def apply_tuned_threads():
+    """
+    Sets this process's torch threads from the tuning profile. Single-process servers only:
+    a pre-fork master must leave them alone (inter-op threads cannot change once set, and
+    forked workers inherit them); wsgi.after_fork configures each worker instead.
+    """
+    if extractor.tuning is not None:
+        logger.info(f"Applied tuned torch threads: {extractor.tuning.apply_threads()} intra-op, "
+                    f"{extractor.tuning.inter_op_threads} inter-op")
+
+def classify_embeddings(bundle, embeddings):
+    """
+    Vectorized classification of a stack of embeddings with one model version.
+    Returns (pred_idx, confidence, coords) arrays, one row per embedding.
+    """
+    metrics.inc('protein_api_predictions_total', embeddings.shape[0], model_version=bundle.version)
+    return bundle.classify(embeddings, timer=lambda stage: metrics.timer('protein_api_stage_seconds', stage=stage))
+
+# --- Optional model cascade: low-confidence predictions are re-run on a larger ESM-2 ---
+# CASCADE_MODEL names the larger checkpoint; its classifier is published to CASCADE_REGISTRY_DIR
+# (train on that checkpoint's embeddings, then python -m scripts.publish_model --registry ...).
+CASCADE_MODEL = os.environ.get('CASCADE_MODEL')
+cascade = Cascade(
+    CASCADE_MODEL,
+    ModelRegistry(os.environ.get('CASCADE_REGISTRY_DIR', 'models/registry-large'),
+                  backend=CLASSIFIER_BACKEND, knn_k=KNN_K),
+    threshold=float(os.environ.get('CASCADE_THRESHOLD', 0.7)),
+    window=ESM_WINDOW, stride=ESM_STRIDE
+) if CASCADE_MODEL else None
+
+def apply_cascade(bundle, sequences, pred_idx, confidence):
+    """
+    Final (families, confidence, escalated) per sequence: small-model answers, with those
+    below CASCADE_THRESHOLD replaced by the large stage when a cascade is configured.
+    Call inside the request's admission, which then covers the large-model work too.
+    """
+    families, confidence, escalated = run_cascade(
+        cascade, bundle, sequences, pred_idx, confidence,
+        timer=lambda stage: metrics.timer('protein_api_stage_seconds', stage=stage))
+    if cascade is not None:
+        metrics.inc('protein_api_cascade_predictions_total', int((~escalated).sum()), stage='small')
+        metrics.inc('protein_api_cascade_predictions_total', int(escalated.sum()), stage='large')
+    return families, confidence, escalated
+
+def embed_sequence(cleaned_seq):
+    """Embeds one validated sequence, recording tokenize/forward stage timings."""
+    metrics.observe('protein_api_sequence_length', len(cleaned_seq))
+    timings = {}
+    embedding = extractor.get_embeddings([cleaned_seq], timings=timings)
+    for stage, seconds in timings.items():
+        metrics.observe('protein_api_stage_seconds', seconds, stage=stage)
+    return embedding
 
 @app.route('/api/predict', methods=['POST'])
 @require_api_key
@@ -204,42 +308,36 @@ def predict():
     sequence = data.get('sequence', '')
 
     # [P1] Validate input
-    cleaned_seq, error = validate_sequence(sequence)
+    with metrics.timer('protein_api_stage_seconds', stage='validate'):
+        cleaned_seq, error = validate_sequence(sequence)
     if error:
         return error
 
-    # Generate real ESM-2 embedding
-    embedding = extractor.get_embeddings([cleaned_seq])
+    # Predict with the version that was active when the request started
+    bundle = model_registry.active
 
-    # Predict
-    if model:
-        pred_idx = model.predict(embedding)[0]
-
-        # Get confidence via predict_proba
-        try:
-            probs = model.predict_proba(embedding)[0]
-            confidence = float(probs[pred_idx])
-        except Exception:
-            confidence = -1.0  # Indicate confidence unavailable (was 0.95 — misleading)
-
-        family_name = label_mapping.get(pred_idx, f"Family_{pred_idx}")
-
-        # Get 2D coordinate for visualization
-        if pca_model:
-            coord = pca_model.transform(embedding)[0]
-            pca_x, pca_y = float(coord[0]), float(coord[1])
-        else:
-            pca_x, pca_y = 0.0, 0.0
-
-        return jsonify({
-            'family': family_name,
-            'confidence': confidence,
-            'pca_x': pca_x,
-            'pca_y': pca_y,
-            'sequence': cleaned_seq
-        })
-    else:
-        return jsonify({'error': 'Model not loaded'}), 500
+    # Embedding, classification and any large-model escalation all run under one admission
+    try:
+        with admitted('interactive', len(cleaned_seq)):
+            embedding = embed_sequence(cleaned_seq)
+            if bundle is None or not bundle.model:
+                return jsonify({'error': 'Model not loaded'}), 500
+            pred_idx, confidence, coords = classify_embeddings(bundle, embedding)
+            families, confidence, escalated = apply_cascade(bundle, [cleaned_seq], pred_idx, confidence)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+
+    payload = {
+        'family': families[0],
+        'confidence': float(confidence[0]),
+        'pca_x': float(coords[0][0]),
+        'pca_y': float(coords[0][1]),
+        'sequence': cleaned_seq,
+        'model_version': bundle.version
+    }
+    if cascade is not None:
+        payload['escalated'] = bool(escalated[0])
+    return jsonify(payload)
 
 MAX_BATCH_SIZE = 20
 
@@ -259,62 +357,150 @@ def predict_batch():
     if len(sequences) > MAX_BATCH_SIZE:
         return jsonify({'error': f'Too many sequences ({len(sequences)}). Max is {MAX_BATCH_SIZE}.'}), 400
 
-    if not model:
+    bundle = model_registry.active
+    if bundle is None or not bundle.model:
         return jsonify({'error': 'Model not loaded'}), 500
 
-    results = []
-    for item in sequences:
+    metrics.observe('protein_api_batch_size', len(sequences))
+    results = [None] * len(sequences)
+    pending = []  # (position, name, cleaned_seq)
+    for pos, item in enumerate(sequences):
         name = item.get('name', 'Unknown')
         raw_seq = item.get('sequence', '')
 
         cleaned_seq, error = validate_sequence(raw_seq)
         if error:
-            results.append({
+            results[pos] = {
                 'name': name,
                 'error': 'Invalid sequence',
                 'family': None,
                 'confidence': None
-            })
+            }
             continue
+        pending.append((pos, name, cleaned_seq))
 
-        try:
-            embedding = extractor.get_embeddings([cleaned_seq])
-            pred_idx = model.predict(embedding)[0]
-
-            try:
-                probs = model.predict_proba(embedding)[0]
-                confidence = float(probs[pred_idx])
-            except Exception:
-                confidence = -1.0
-
-            family_name = label_mapping.get(pred_idx, f"Family_{pred_idx}")
-
-            if pca_model:
-                coord = pca_model.transform(embedding)[0]
-                pca_x, pca_y = float(coord[0]), float(coord[1])
-            else:
-                pca_x, pca_y = 0.0, 0.0
-
-            results.append({
+    valid = []  # (position, name, cleaned_seq, embedding)
+    try:
+        # The whole batch is admitted (or shed) up front, before any embedding work
+        with admitted('batch', sum(len(seq) for _, _, seq in pending)):
+            for pos, name, cleaned_seq in pending:
+                try:
+                    # Embedded one at a time so padding never changes a sequence's embedding
+                    valid.append((pos, name, cleaned_seq, embed_sequence(cleaned_seq)))
+                except Exception as e:
+                    logger.error(f"[Batch] Error classifying {name}: {traceback.format_exc()}")
+                    results[pos] = {
+                        'name': name,
+                        'error': 'Classification failed',
+                        'family': None,
+                        'confidence': None
+                    }
+            if valid:
+                # Classifier and PCA run once over the whole batch; escalations stay admitted
+                embeddings = np.concatenate([emb for _, _, _, emb in valid], axis=0)
+                pred_idx, confidence, coords = classify_embeddings(bundle, embeddings)
+                families, confidence, escalated = apply_cascade(bundle, [seq for _, _, seq, _ in valid],
+                                                                pred_idx, confidence)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+
+    if valid:
+        for row, (pos, name, cleaned_seq, _) in enumerate(valid):
+            results[pos] = {
                 'name': name,
-                'family': family_name,
-                'confidence': confidence,
-                'pca_x': pca_x,
-                'pca_y': pca_y,
+                'family': families[row],
+                'confidence': float(confidence[row]),
+                'pca_x': float(coords[row][0]),
+                'pca_y': float(coords[row][1]),
                 'sequence': cleaned_seq,
                 'error': None
-            })
-        except Exception as e:
-            logger.error(f"[Batch] Error classifying {name}: {traceback.format_exc()}")
-            results.append({
-                'name': name,
-                'error': 'Classification failed',
-                'family': None,
-                'confidence': None
-            })
+            }
+            if cascade is not None:
+                results[pos]['escalated'] = bool(escalated[row])
 
     logger.info(f"[Batch] Classified {len(results)} sequences")
-    return jsonify({'results': results})
+    return jsonify({'results': results, 'model_version': bundle.version})
+
+# --- ESMFold structure prediction, fronted by a persistent PDB cache ---
+ESMFOLD_URL = os.environ.get('ESMFOLD_URL', 'https://api.esmatlas.com/foldSequence/v1/pdb/')
+MAX_FOLD_LENGTH = 400
+
+fold_cache = ResponseCache(
+    os.environ.get('FOLD_CACHE_DIR', 'cache/fold'),
+    max_bytes=int(os.environ.get('FOLD_CACHE_MAX_MB', 256)) * 1024 * 1024,
+    ttl_seconds=float(os.environ.get('FOLD_CACHE_TTL_HOURS', 24 * 7)) * 3600
+)
+
+# --- Upstream call layer: pooled sessions, concurrency caps, retries, circuit breakers ---
+esmfold_client = UpstreamClient('ESMFold', max_concurrency=int(os.environ.get('ESMFOLD_MAX_CONCURRENCY', 4)))
+gemini_upstream = UpstreamClient('Gemini', max_concurrency=int(os.environ.get('GEMINI_MAX_CONCURRENCY', 4)))
+
+# Persistent job queue for large batches: jobs live in SQLite and are drained by
+# python -m scripts.job_worker, so they survive client disconnects and API restarts
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', 'data/jobs.sqlite3')
+jobs = JobStore(JOB_DB_PATH,
+                max_running_per_owner=int(os.environ.get('JOB_MAX_RUNNING_PER_USER', 2)),
+                max_queued_per_owner=int(os.environ.get('JOB_MAX_QUEUED_PER_USER', 20)))
+
+# Async mode: slow upstream calls run in background threads and are polled/streamed by task ID.
+# Task states are also kept in the job database, so any gunicorn worker can answer a poll.
+tasks = TaskManager(max_workers=int(os.environ.get('TASK_WORKERS', 8)), store=jobs)
+JOB_KINDS = ('classify', 'fold')
+MAX_JOB_ITEMS = int(os.environ.get('JOB_MAX_ITEMS', 50000))
+MAX_JOB_PAGE = 1000
+
+def wants_async(data):
+    return bool(data.get('async')) or request.args.get('async', '').lower() in ('1', 'true')
+
+def submit_task(fn, *args):
+    """Runs fn(*args) -> (payload, status) in the background and answers 202 with its task ID."""
+    task_id = tasks.submit(fn, *args)
+    return jsonify({'task_id': task_id, 'status': 'pending', 'status_url': f'/api/tasks/{task_id}'}), 202
+
+class ESMFoldError(Exception):
+    """Raised when the ESMFold API answers with a non-200 status (never cached)."""
+    def __init__(self, status_code):
+        super().__init__(f'ESMFold API returned {status_code}')
+        self.status_code = status_code
+
+def fetch_pdb(sequence):
+    """Calls the ESMFold API and returns the PDB text."""
+    logger.info(f"[ESMFold] Predicting structure for {len(sequence)} residues...")
+    response = esmfold_client.post(
+        ESMFOLD_URL,
+        data=sequence,
+        headers={'Content-Type': 'text/plain'},
+        timeout=60
+    )
+    if response.status_code != 200:
+        logger.error(f"[ESMFold] API error: {response.status_code} - {response.text[:200]}")
+        raise ESMFoldError(response.status_code)
+
+    logger.info(f"[ESMFold] Success! Received {len(response.text)} bytes of PDB data.")
+    return response.text
+
+def fold_sequence(cleaned_seq):
+    """Folds a validated sequence. Returns (payload, status) so it can run sync or as a task."""
+    try:
+        # Concurrent requests for the same sequence share one upstream call
+        pdb_text, cached = fold_cache.get_or_compute(
+            ResponseCache.key_for(cleaned_seq),
+            lambda: fetch_pdb(cleaned_seq)
+        )
+        if cached:
+            logger.info(f"[ESMFold] Cache hit for {len(cleaned_seq)} residues")
+        return {'pdb': pdb_text, 'cached': cached}, 200
+    except ESMFoldError as e:
+        return {'error': f'ESMFold API returned {e.status_code}'}, 502
+    except UpstreamUnavailableError as e:
+        logger.warning(f"[ESMFold] {e}")
+        return {'error': 'ESMFold API is temporarily unavailable. Please try again later.'}, 503
+    except http_requests.exceptions.Timeout:
+        return {'error': 'ESMFold API timed out (sequence may be too long)'}, 504
+    except Exception as e:
+        # [P6] Log full error internally, but send generic message to client
+        logger.error(f"[ESMFold] Error: {traceback.format_exc()}")
+        return {'error': 'Structure prediction failed. Please try again.'}, 500
 
 @app.route('/api/fold', methods=['POST'])
 @require_api_key
@@ -333,77 +519,46 @@ def fold():
         return error
 
     # Limit sequence length for the public API
-    if len(cleaned_seq) > 400:
-        cleaned_seq = cleaned_seq[:400]
+    if len(cleaned_seq) > MAX_FOLD_LENGTH:
+        cleaned_seq = cleaned_seq[:MAX_FOLD_LENGTH]
 
-    try:
-        logger.info(f"[ESMFold] Predicting structure for {len(cleaned_seq)} residues...")
-        response = http_requests.post(
-            'https://api.esmatlas.com/foldSequence/v1/pdb/',
-            data=cleaned_seq,
-            headers={'Content-Type': 'text/plain'},
-            timeout=60
-        )
+    if wants_async(data):
+        return submit_task(fold_sequence, cleaned_seq)
 
-        if response.status_code == 200:
-            pdb_text = response.text
-            logger.info(f"[ESMFold] Success! Received {len(pdb_text)} bytes of PDB data.")
-            return jsonify({'pdb': pdb_text})
-        else:
-            logger.error(f"[ESMFold] API error: {response.status_code} - {response.text[:200]}")
-            return jsonify({'error': f'ESMFold API returned {response.status_code}'}), 502
-    except http_requests.exceptions.Timeout:
-        return jsonify({'error': 'ESMFold API timed out (sequence may be too long)'}), 504
-    except Exception as e:
-        # [P6] Log full error internally, but send generic message to client
-        logger.error(f"[ESMFold] Error: {traceback.format_exc()}")
-        return jsonify({'error': 'Structure prediction failed. Please try again.'}), 500
+    payload, status = fold_sequence(cleaned_seq)
+    return jsonify(payload), status
 
 # --- Gemini AI Explainer ---
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', None)
+# Optional override of the Gemini API endpoint (e.g. a local stub for load tests)
+GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', None)
 gemini_client = None
 
 if GEMINI_API_KEY:
     try:
-        gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+        http_options = {'base_url': GEMINI_BASE_URL} if GEMINI_BASE_URL else None
+        gemini_client = genai.Client(api_key=GEMINI_API_KEY, http_options=http_options)
         logger.info("Gemini AI client initialized successfully.")
     except Exception as e:
         logger.error(f"Failed to initialize Gemini client: {e}")
 else:
-    logger.warning("GEMINI_API_KEY not set. /api/explain endpoint will be unavailable.")
-
-PROTEIN_EXPLAINER_PROMPT = """You are a brilliant molecular biologist and science communicator. A protein sequence has been classified by an ML model.
-
-Classification result:
-- **Predicted Family:** {family}
-- **Confidence:** {confidence}%
-- **Sequence length:** {seq_length} amino acids
-- **First 50 residues:** {seq_preview}...
-
-Provide a concise, engaging biological explanation structured EXACTLY as follows. Use 2-3 sentences per section. Be scientifically accurate but accessible to biology undergrads:
-
-🧬 WHAT IS THIS PROTEIN FAMILY?
-[Explain what this protein family does and its key molecular function]
-
-🏥 BIOLOGICAL SIGNIFICANCE
-[Why is this family important? Any connection to human health, diseases, or drug targets?]
-
-🔬 STRUCTURAL FEATURES
-[What structural motifs or domains are typically found in this family?]
-
-💡 INTERESTING FACT
-[One fascinating or surprising fact about this protein family]
-
-Keep the total response under 200 words. Do not use markdown headers, only use the emoji labels above. Do not mention the ML model or classification system."""
+    logger.warning("GEMINI_API_KEY not set. /api/explain will only serve cached explanations.")
+
+# Explanations are cached per normalized prompt, or per family with EXPLAIN_CACHE_KEY=family
+# (the mode scripts/warm_explanations.py precomputes for every family)
+EXPLAIN_CACHE_KEY = os.environ.get('EXPLAIN_CACHE_KEY', 'prompt').lower()
+explain_cache = ResponseCache(
+    os.environ.get('EXPLAIN_CACHE_DIR', 'cache/explain'),
+    max_bytes=int(os.environ.get('EXPLAIN_CACHE_MAX_MB', 64)) * 1024 * 1024,
+    ttl_seconds=float(os.environ.get('EXPLAIN_CACHE_TTL_HOURS', 24 * 30)) * 3600,
+    memory_items=int(os.environ.get('EXPLAIN_CACHE_MEMORY_ITEMS', 1024))
+)
 
 @app.route('/api/explain', methods=['POST'])
 @require_api_key
 @rate_limit(explain_limiter)
 def explain():
     """Generate an AI-powered explanation of the classified protein family."""
-    if not gemini_client:
-        return jsonify({'error': 'AI explainer is not configured. Set GEMINI_API_KEY environment variable.'}), 503
-
     data = request.json
     if not data:
         return jsonify({'error': 'Request body must be JSON'}), 400
@@ -415,44 +570,343 @@ def explain():
     if not family:
         return jsonify({'error': 'No protein family provided'}), 400
 
-    prompt = PROTEIN_EXPLAINER_PROMPT.format(
-        family=family,
-        confidence=round(confidence * 100, 1),
-        seq_length=len(sequence),
-        seq_preview=sequence[:50] if sequence else 'N/A'
-    )
+    prompt, cache_key = build_prompt(family, confidence, sequence, key_mode=EXPLAIN_CACHE_KEY)
+    cache_key = ResponseCache.key_for(cache_key)
 
+    # Cached explanations are served even when Gemini is not configured
+    if cache_key in explain_cache:
+        payload, status = generate_explanation(cache_key, prompt, family)
+        return jsonify(payload), status
+
+    if not gemini_client:
+        return jsonify({'error': 'AI explainer is not configured. Set GEMINI_API_KEY environment variable.'}), 503
+
+    if wants_async(data):
+        return submit_task(generate_explanation, cache_key, prompt, family)
+
+    payload, status = generate_explanation(cache_key, prompt, family)
+    return jsonify(payload), status
+
+def generate_explanation(cache_key, prompt, family):
+    """Cached Gemini call for one prompt. Returns (payload, status) so it can run sync or as a task."""
     try:
-        response = gemini_client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt
+        # Identical concurrent requests share one Gemini call
+        explanation, cached = explain_cache.get_or_compute(
+            cache_key,
+            lambda: gemini_upstream.call(
+                request_explanation, gemini_client, prompt,
+                retry_on=(genai_errors.ServerError,)
+            )
         )
-        explanation = response.text
-        logger.info(f"[Explain] Generated explanation for family: {family}")
-        return jsonify({'explanation': explanation})
+        if not cached:
+            logger.info(f"[Explain] Generated explanation for family: {family}")
+        return {'explanation': explanation, 'cached': cached}, 200
+    except UpstreamUnavailableError as e:
+        logger.warning(f"[Explain] {e}")
+        return {'error': 'AI explainer is temporarily unavailable. Please try again later.'}, 503
     except Exception as e:
         logger.error(f"[Explain] Gemini API error: {traceback.format_exc()}")
-        return jsonify({'error': 'AI explanation generation failed. Please try again.'}), 500
+        return {'error': 'AI explanation generation failed. Please try again.'}, 500
+
+@app.route('/api/tasks/<task_id>', methods=['GET'])
+@require_api_key
+@rate_limit(data_limiter)
+def task_status(task_id):
+    """Poll an async fold/explain task. 'result' holds the endpoint's normal JSON once done."""
+    task = tasks.get(task_id)
+    if task is None:
+        return jsonify({'error': 'Unknown or expired task ID'}), 404
+    return jsonify(task_payload(task_id, task))
+
+@app.route('/api/tasks/<task_id>/stream', methods=['GET'])
+@require_api_key
+def task_stream(task_id):
+    """Server-sent events: a status event every few seconds until the task finishes."""
+    if tasks.get(task_id) is None:
+        return jsonify({'error': 'Unknown or expired task ID'}), 404
+
+    def events():
+        while True:
+            task = tasks.wait(task_id, timeout=5)
+            if task is None:
+                return
+            yield f"data: {json.dumps(task_payload(task_id, task))}\n\n"
+            if task['status'] in ('done', 'failed'):
+                return
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+def task_payload(task_id, task):
+    payload = {'task_id': task_id, 'status': task['status']}
+    if task['status'] == 'done':
+        payload['result'], payload['http_status'] = task['result']
+    elif task['status'] == 'failed':
+        payload['error'] = 'Task failed. Please try again.'
+    return payload
+
+def job_owner():
+    """Jobs belong to the API key when one is sent (hashed), else to the client IP."""
+    key = request.headers.get('X-API-Key')
+    if key:
+        return 'key:' + hashlib.sha256(key.encode()).hexdigest()[:16]
+    return 'ip:' + (request.remote_addr or '127.0.0.1')
+
+@app.route('/api/jobs', methods=['POST'])
+@require_api_key
+@rate_limit(batch_limiter)
+def submit_job():
+    """
+    Queue a classify or fold job over many sequences. Returns 202 with the job ID at once;
+    poll /api/jobs/<id> for progress and page through /api/jobs/<id>/results.
+    """
+    data = request.json
+    if not data:
+        return jsonify({'error': 'Request body must be JSON'}), 400
+
+    kind = data.get('kind', 'classify')
+    if kind not in JOB_KINDS:
+        return jsonify({'error': f"Unknown job kind '{kind}'. Use one of {list(JOB_KINDS)}."}), 400
+
+    sequences = data.get('sequences', [])
+    if not sequences or not isinstance(sequences, list):
+        return jsonify({'error': 'No sequences provided'}), 400
+    if len(sequences) > MAX_JOB_ITEMS:
+        return jsonify({'error': f'Too many sequences ({len(sequences)}). Max is {MAX_JOB_ITEMS}.'}), 400
+    items = []
+    for item in sequences:
+        if isinstance(item, str):
+            item = {'sequence': item}
+        if not isinstance(item, dict):
+            return jsonify({'error': 'Each sequence must be a string or {"name", "sequence"}'}), 400
+        items.append({'name': str(item.get('name', 'Unknown')), 'sequence': str(item.get('sequence', ''))})
+
+    try:
+        priority = min(9, max(0, int(data.get('priority', 5))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'priority must be an integer from 0 (lowest) to 9'}), 400
+
+    try:
+        job_id = jobs.submit(kind, items, owner=job_owner(), priority=priority)
+    except QueueFullError as e:
+        return jsonify({'error': f'Too many unfinished jobs: {e}. Wait for some to finish.'}), 429
+
+    metrics.inc('protein_api_jobs_submitted_total', kind=kind)
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/api/jobs/{job_id}',
+        'results_url': f'/api/jobs/{job_id}/results'
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@require_api_key
+@rate_limit(data_limiter)
+def job_status(job_id):
+    """Job status and progress ({processed, total, failed, fraction})."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+@require_api_key
+@rate_limit(data_limiter)
+def job_results(job_id):
+    """One page of results (?offset=0&limit=100); available while the job is still running."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(MAX_JOB_PAGE, max(1, int(request.args.get('limit', 100))))
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+
+    results = jobs.results(job_id, offset, limit)
+    next_offset = offset + len(results)
+    return jsonify({
+        'job_id': job_id,
+        'status': job['status'],
+        'offset': offset,
+        'limit': limit,
+        'available': job['progress']['processed'],
+        'total': job['progress']['total'],
+        'results': results,
+        'next_offset': next_offset if next_offset < job['progress']['total'] else None
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+@require_api_key
+@rate_limit(data_limiter)
+def cancel_job(job_id):
+    """Cancel a queued or running job; results stored so far stay readable."""
+    if jobs.get(job_id) is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    if not jobs.cancel(job_id):
+        return jsonify({'error': 'Job has already finished'}), 409
+    return jsonify(jobs.get(job_id))
 
 @app.route('/api/data', methods=['GET'])
 @require_api_key
 @rate_limit(data_limiter)
 def get_data():
-    if embeddings_2d is None:
+    bundle = model_registry.active
+    if bundle is None or bundle.embeddings_2d is None:
         return jsonify({'error': 'Data not loaded'}), 500
 
     # Return list of points: {x, y, label}
+    embeddings_2d, labels = bundle.embeddings_2d, bundle.labels
     points = []
     for i in range(len(embeddings_2d)):
         points.append({
             'x': float(embeddings_2d[i][0]),
             'y': float(embeddings_2d[i][1]),
-            'label': label_mapping.get(int(labels[i]), f"Family_{labels[i]}")
+            'label': bundle.family(labels[i])
         })
     return jsonify(points)
 
+def collect_cache_metrics():
+    for name, cache in (('fold', fold_cache), ('explain', explain_cache)):
+        stats = cache.stats()
+        lookups = stats['hits'] + stats['misses']
+        labels = {'cache': name}
+        yield 'protein_api_cache_hits_total', 'counter', 'Response cache hits.', labels, stats['hits']
+        yield 'protein_api_cache_misses_total', 'counter', 'Response cache misses.', labels, stats['misses']
+        yield 'protein_api_cache_hit_ratio', 'gauge', 'Response cache hit ratio since start.', labels, \
+            stats['hits'] / lookups if lookups else 0.0
+        yield 'protein_api_cache_entries', 'gauge', 'Entries held by the response cache.', labels, stats['entries']
+        yield 'protein_api_cache_bytes', 'gauge', 'Compressed bytes held by the response cache.', labels, stats['bytes']
+
+def collect_model_metrics():
+    bundle = model_registry.active
+    if bundle is not None:
+        yield 'protein_api_model_info', 'gauge', 'Model version being served (value is always 1).', \
+            {'version': bundle.version, 'backend': CLASSIFIER_BACKEND}, 1
+        yield 'protein_api_model_loaded_timestamp_seconds', 'gauge', 'When the served model version was loaded.', \
+            {}, bundle.loaded_at
+    yield 'protein_api_model_loads_total', 'counter', 'Model versions loaded since start.', {}, model_registry.reloads
+
+def collect_admission_metrics():
+    if admission is None:
+        return
+    stats = admission.stats()
+    yield 'protein_api_admission_throughput_tokens_per_second', 'gauge', \
+        'Measured embedding throughput (EWMA) used for wait estimates.', {}, stats['throughput_tokens_per_second']
+    yield 'protein_api_admission_estimated_wait_seconds', 'gauge', \
+        'Estimated wait for new embedding work.', {}, stats['estimated_wait_seconds']
+    for lane, lane_stats in stats['lanes'].items():
+        yield 'protein_api_admission_in_flight_tokens', 'gauge', 'Admitted tokens not yet finished.', \
+            {'lane': lane}, lane_stats['in_flight_tokens']
+
+def collect_cascade_metrics():
+    if cascade is None:
+        return
+    yield 'protein_api_cascade_escalation_ratio', 'gauge', \
+        'Share of predictions re-run on the large model since start.', {}, cascade.escalation_rate
+    yield 'protein_api_cascade_large_loaded', 'gauge', 'Whether the large cascade stage is loaded.', {}, \
+        int(cascade.extractor is not None)
+
+def collect_job_metrics():
+    # Skip until the queue has been used, so a scrape never creates the database
+    if os.path.exists(JOB_DB_PATH):
+        for status, count in jobs.counts().items():
+            yield 'protein_api_jobs', 'gauge', 'Jobs in the persistent queue by status.', {'status': status}, count
+
+metrics.add_collector(collect_cache_metrics)
+metrics.add_collector(collect_model_metrics)
+metrics.add_collector(collect_job_metrics)
+metrics.add_collector(collect_admission_metrics)
+metrics.add_collector(collect_cascade_metrics)
+
+@app.route('/metrics', methods=['GET'])
+@require_api_key
+def metrics_endpoint():
+    """
+    Prometheus scrape endpoint. Metrics are per process: under gunicorn each worker keeps
+    its own counters and a scrape is answered by whichever worker accepts it, so values
+    are that worker's alone and may step back between scrapes.
+    """
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/reload', methods=['POST'])
+@require_admin
+def reload_model():
+    """
+    Load a model version (default: the one CURRENT names) and swap it in.
+    Loads in the background (202) unless {"wait": true}; requests keep using the old
+    version until the swap.
+    With the registry watcher running (always under gunicorn, see wsgi.py) a requested
+    version is also made CURRENT, so every worker process switches to it, not just this one.
+    """
+    data = request.get_json(silent=True) or {}
+    version = data.get('version')
+    if version is not None and version not in model_registry.versions():
+        return jsonify({'error': f"Unknown model version '{version}'", 'versions': model_registry.versions()}), 400
+    if version is not None and model_registry.watching:
+        model_registry.activate(version)
+
+    if data.get('wait'):
+        try:
+            bundle = model_registry.load(version)
+        except Exception as e:
+            logger.error(f"[Reload] Failed: {e}")
+            return jsonify({'error': 'Model load failed; previous version still served'}), 500
+        return jsonify({'model_version': bundle.version})
+
+    if not model_registry.load_in_background(version):
+        return jsonify({'error': 'A model load is already running'}), 409
+    served = model_registry.active.version if model_registry.active is not None else None
+    return jsonify({'status': 'loading', 'requested': version or model_registry.current_version(),
+                    'model_version': served}), 202
+
+@app.route('/admin/profile', methods=['POST'])
+@require_admin
+def start_profile():
+    """
+    Capture a time-boxed profile of live traffic into PROFILE_DIR.
+    Modes: 'cprofile' (.prof of every request), 'sample' (folded stacks of all threads),
+    'torch' (torch profiler Chrome traces of each get_embeddings call).
+    """
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'sample')
+    try:
+        seconds = float(data.get('seconds', 10))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds must be a number'}), 400
+    if not 0 < seconds <= MAX_PROFILE_SECONDS:
+        return jsonify({'error': f'seconds must be between 0 and {MAX_PROFILE_SECONDS}'}), 400
+
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    if mode == 'cprofile':
+        output = os.path.join(PROFILE_DIR, f'requests-{stamp}.prof')
+        if not request_profiler.start(seconds, output):
+            return jsonify({'error': 'A cProfile session is already running'}), 409
+    elif mode == 'sample':
+        output = os.path.join(PROFILE_DIR, f'stacks-{stamp}.folded')
+        start_stack_sampling(seconds, output)
+    elif mode == 'torch':
+        if extractor.trace_dir:
+            return jsonify({'error': 'A torch trace session is already running'}), 409
+        output = os.path.join(PROFILE_DIR, f'torch-{stamp}')
+        extractor.trace_dir = output
+        timer = threading.Timer(seconds, lambda: setattr(extractor, 'trace_dir', None))
+        timer.daemon = True
+        timer.start()
+    else:
+        return jsonify({'error': "mode must be one of 'cprofile', 'sample', 'torch'"}), 400
+
+    logger.info(f"[Profile] {mode} profile for {seconds}s -> {output}")
+    return jsonify({'mode': mode, 'seconds': seconds, 'output': output}), 202
+
 if __name__ == '__main__':
+    apply_tuned_threads()
     load_resources()
+    if MODEL_WATCH_SECONDS > 0:
+        model_registry.watch(MODEL_WATCH_SECONDS)
+    logger.info(f"Preloaded {explain_cache.preload()} cached explanations into memory")
+    if hasattr(signal, 'SIGUSR2'):
+        # kill -USR2 <pid> samples all threads for 30 s into PROFILE_DIR
+        install_signal_handler(signal.SIGUSR2, PROFILE_DIR)
     # --- [P3] Debug mode controlled by environment variable ---
     debug_mode = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,8 @@
+"""
+Reproducible performance benchmarks.
+
+Run everything (offline, using a tiny randomly initialized ESM-2 config):
+    python -m benchmarks.run --output bench.json
+Compare against a stored baseline and fail on regressions:
+    python -m benchmarks.run --baseline path/to/baseline.json
+"""
@@ -0,0 +1,69 @@
+import importlib
+import os
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import build_tiny_esm, metric, percentiles, random_sequences
+
+
+def load_app(workdir, lift_rate_limits=True):
+    """
+    Imports app.py against the tiny offline ESM model, with caches and rate-limit state
+    kept in workdir, a centroid classifier over random embeddings and a fitted PCA.
+    With lift_rate_limits the per-IP limits are raised out of the way.
+    """
+    os.environ["ESM_MODEL"] = build_tiny_esm(os.path.join(workdir, "tiny_esm"))
+    os.environ["FOLD_CACHE_DIR"] = os.path.join(workdir, "fold_cache")
+    os.environ["EXPLAIN_CACHE_DIR"] = os.path.join(workdir, "explain_cache")
+    sys.modules.pop("app", None)
+    app_module = importlib.import_module("app")
+
+    from sklearn.decomposition import PCA
+    from src.classifier import build_classifier
+    from src.model_registry import ModelBundle
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, app_module.extractor.hidden_dim)).astype(np.float32)
+    y = rng.integers(0, 20, size=500)
+    pca_model = PCA(n_components=2)
+    app_module.model_registry.active = ModelBundle(
+        "bench", build_classifier("centroid", X, y), {i: f"Family_{i}" for i in range(20)},
+        pca_model, pca_model.fit_transform(X), y)
+    if lift_rate_limits:
+        # Benchmarks measure latency, not the per-IP limits
+        for limiter in (app_module.predict_limiter, app_module.fold_limiter, app_module.explain_limiter,
+                        app_module.batch_limiter, app_module.data_limiter):
+            limiter.max_requests = 10 ** 9
+    return app_module
+
+
+def run(workdir, quick=False):
+    """End-to-end Flask test-client latency percentiles for /api/predict and /api/predict-batch."""
+    app_module = load_app(workdir)
+    client = app_module.app.test_client()
+    results = {}
+
+    requests_per_length = 20 if quick else 100
+    for length in (100, 400):
+        sequences = random_sequences(requests_per_length, length, seed=length)
+        client.post("/api/predict", json={"sequence": sequences[0]})  # Warm-up
+        latencies = []
+        for seq in sequences:
+            start = time.perf_counter()
+            response = client.post("/api/predict", json={"sequence": seq})
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.get_json()
+        results.update(percentiles(latencies, f"api.predict.len{length}"))
+
+    batch = [{"name": f"s{i}", "sequence": s} for i, s in enumerate(random_sequences(20, (50, 300), seed=3))]
+    latencies = []
+    for _ in range(5 if quick else 20):
+        start = time.perf_counter()
+        response = client.post("/api/predict-batch", json={"sequences": batch})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+    results.update(percentiles(latencies, "api.predict_batch.20seqs"))
+    results["api.predict_batch.20seqs.seqs_per_s"] = metric(len(batch) / np.median(latencies), "seqs/s")
+    return results
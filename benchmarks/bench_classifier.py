@@ -0,0 +1,44 @@
+import contextlib
+import io
+
+import numpy as np
+
+from src.classifier import SimpleMLP, build_classifier
+from benchmarks.common import metric, throughput, timed
+
+
+def synthetic_embeddings(n, dim=320, num_classes=50, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_classes, dim))
+    y = rng.integers(0, num_classes, size=n)
+    X = (centers[y] + rng.normal(scale=0.5, size=(n, dim))).astype(np.float32)
+    return X, y
+
+
+def run(workdir, quick=False):
+    """SimpleMLP train/predict speed plus the centroid/kNN backends' predict throughput."""
+    results = {}
+    n = 2000 if quick else 10000
+    X, y = synthetic_embeddings(n)
+    num_classes = int(y.max()) + 1
+
+    def train():
+        np.random.seed(0)
+        model = SimpleMLP(X.shape[1], 64, num_classes, learning_rate=0.1)
+        model.train(X, y, epochs=20)
+        return model
+
+    with contextlib.redirect_stdout(io.StringIO()):  # SimpleMLP prints the loss every 10 epochs
+        times = timed(train, repeat=3)
+        model = train()
+    results["classifier.simple_mlp.train_20_epochs"] = metric(
+        sorted(times)[1], "s", higher_is_better=False, samples=n)
+    results["classifier.simple_mlp.predict"] = throughput(n, timed(lambda: model.predict(X)), "seqs/s")
+
+    for backend in ("centroid", "knn"):
+        clf = build_classifier(backend, X, y)
+        queries = X[:1000]
+        results[f"classifier.{backend}.predict"] = throughput(
+            len(queries), timed(lambda: clf.predict(queries)), "seqs/s")
+
+    return results
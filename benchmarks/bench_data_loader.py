@@ -0,0 +1,34 @@
+import os
+
+from src.data_loader import clean_sequence, load_fasta
+from benchmarks.common import random_sequences, throughput, timed, write_fasta
+
+
+def run(workdir, quick=False):
+    """
+    load_fasta parsing speed (MB/s), clean_sequence throughput (residues/s) and a
+    million-record load-and-clean pass (records/s).
+    """
+    results = {}
+    num_records = 2000 if quick else 20000
+
+    fasta_path = os.path.join(workdir, "bench.fasta")
+    write_fasta(fasta_path, random_sequences(num_records, (50, 600), seed=1))
+    size_mb = os.path.getsize(fasta_path) / 1e6
+    times = timed(lambda: load_fasta(fasta_path), repeat=3)
+    results["data_loader.load_fasta"] = throughput(size_mb, times, "MB/s")
+
+    for length in (100, 2000):
+        sequences = random_sequences(200 if quick else 1000, length, seed=2)
+        times = timed(lambda: [clean_sequence(s) for s in sequences], repeat=5)
+        results[f"data_loader.clean_sequence.len{length}"] = throughput(len(sequences) * length, times, "residues/s")
+
+    # What process_data does before embedding: parse a large FASTA file and clean every record
+    num_records = 50000 if quick else 1000000
+    big_path = os.path.join(workdir, "big.fasta")
+    write_fasta(big_path, random_sequences(num_records, (30, 120), seed=3))
+    times = timed(lambda: [clean_sequence(seq) for _, seq in load_fasta(big_path)], repeat=1, warmup=0)
+    results[f"data_loader.load_and_clean.{num_records}records"] = throughput(num_records, times, "records/s")
+    os.remove(big_path)
+
+    return results
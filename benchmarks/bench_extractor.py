@@ -0,0 +1,39 @@
+import os
+
+from src.embedding_extractor import EmbeddingExtractor
+from benchmarks.common import build_tiny_esm, metric, random_sequences, throughput, timed
+
+LENGTHS = (64, 256, 510)
+BATCH_SIZES = (1, 8, 32)
+
+
+def run(workdir, quick=False):
+    """get_embeddings sequences/s and tokens/s across sequence lengths and batch sizes."""
+    extractor = EmbeddingExtractor(model_name=build_tiny_esm(os.path.join(workdir, "tiny_esm")))
+    results = {}
+    for length in LENGTHS[:2] if quick else LENGTHS:
+        for batch_size in BATCH_SIZES[:2] if quick else BATCH_SIZES:
+            sequences = random_sequences(batch_size * 2, length, seed=length)
+            times = timed(lambda: extractor.get_embeddings(sequences, batch_size=batch_size), repeat=3)
+            median = sorted(times)[len(times) // 2]
+            key = f"extractor.get_embeddings.len{length}.bs{batch_size}"
+            results[f"{key}.seqs_per_s"] = metric(len(sequences) / median, "seqs/s")
+            # +2 for the <cls>/<eos> tokens added to every sequence
+            results[f"{key}.tokens_per_s"] = metric(len(sequences) * (length + 2) / median, "tokens/s")
+
+    # Tokenization alone: HF tokenizer vs the numpy lookup-table path
+    sequences = random_sequences(64, (50, 500), seed=64)
+    tokens = sum(len(seq) + 2 for seq in sequences)
+    hf_times = timed(lambda: extractor.tokenizer(sequences, return_tensors="pt", padding=True,
+                                                 truncation=True, max_length=512), repeat=5)
+    results["extractor.tokenize.hf.tokens_per_s"] = throughput(tokens, hf_times, "tokens/s")
+    if extractor.fast_tokenizer is not None:
+        fast_times = timed(lambda: extractor.fast_tokenizer(sequences), repeat=5)
+        results["extractor.tokenize.fast.tokens_per_s"] = throughput(tokens, fast_times, "tokens/s")
+
+    # Long-sequence mode: 1500-residue proteins split into 510-residue windows, batched across sequences
+    windowed = EmbeddingExtractor(model_name=extractor.tokenizer.name_or_path, window=510, stride=255)
+    sequences = random_sequences(2 if quick else 8, 1500, seed=1500)
+    times = timed(lambda: windowed.get_embeddings(sequences, batch_size=8), repeat=3)
+    results["extractor.windowed.len1500.seqs_per_s"] = metric(len(sequences) / sorted(times)[1], "seqs/s")
+    return results
@@ -0,0 +1,90 @@
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+# ESM-2 vocabulary, in token-id order
+ESM_VOCAB = [
+    "<cls>", "<pad>", "<eos>", "<unk>",
+    "L", "A", "G", "V", "S", "E", "R", "T", "I", "D", "P", "K", "Q", "N",
+    "F", "Y", "M", "H", "W", "C", "X", "B", "U", "Z", "O", ".", "-",
+    "<null_1>", "<mask>",
+]
+
+
+def random_sequences(n, length, seed=0):
+    """n random protein sequences; length is an int or a (min, max) range."""
+    rng = random.Random(seed)
+    lo, hi = (length, length) if isinstance(length, int) else length
+    return ["".join(rng.choices(AMINO_ACIDS, k=rng.randint(lo, hi))) for _ in range(n)]
+
+
+def write_fasta(path, sequences, line_width=60):
+    with open(path, "w") as f:
+        for i, seq in enumerate(sequences):
+            f.write(f">seq{i} synthetic\n")
+            for start in range(0, len(seq), line_width):
+                f.write(seq[start:start + line_width] + "\n")
+
+
+def build_tiny_esm(directory, hidden_size=64, num_layers=2, seed=0):
+    """
+    Saves a randomly initialized ESM-2-architecture model plus tokenizer to directory,
+    so EmbeddingExtractor(model_name=directory) works without network access.
+    Shapes differ from the real checkpoint, but the code path is identical.
+    """
+    import torch
+    from transformers import EsmConfig, EsmModel, EsmTokenizer
+
+    if os.path.exists(os.path.join(directory, "config.json")):
+        return directory
+    os.makedirs(directory, exist_ok=True)
+    vocab_path = os.path.join(directory, "vocab.txt")
+    with open(vocab_path, "w") as f:
+        f.write("\n".join(ESM_VOCAB))
+
+    torch.manual_seed(seed)
+    config = EsmConfig(
+        vocab_size=len(ESM_VOCAB), hidden_size=hidden_size, num_hidden_layers=num_layers,
+        num_attention_heads=4, intermediate_size=hidden_size * 4, max_position_embeddings=1026,
+        position_embedding_type="rotary", pad_token_id=1, mask_token_id=32, token_dropout=True,
+    )
+    EsmModel(config).save_pretrained(directory)
+    EsmTokenizer(vocab_path).save_pretrained(directory)
+    return directory
+
+
+def timed(fn, repeat=5, warmup=1):
+    """Runs fn warmup+repeat times; returns the list of wall-clock seconds for the timed runs."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def metric(value, unit, higher_is_better=True, **extra):
+    """One benchmark result entry as stored in the JSON report."""
+    return dict(value=float(value), unit=unit, higher_is_better=higher_is_better, **extra)
+
+
+def throughput(amount, times, unit):
+    """Median-based throughput (amount per second) from a list of run times."""
+    return metric(amount / statistics.median(times), unit, runs=len(times))
+
+
+def percentiles(samples_seconds, prefix):
+    """p50/p95/p99 latency entries in milliseconds."""
+    ms = np.asarray(samples_seconds) * 1000
+    return {
+        f"{prefix}.p50": metric(np.percentile(ms, 50), "ms", higher_is_better=False),
+        f"{prefix}.p95": metric(np.percentile(ms, 95), "ms", higher_is_better=False),
+        f"{prefix}.p99": metric(np.percentile(ms, 99), "ms", higher_is_better=False),
+    }
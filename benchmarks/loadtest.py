@@ -0,0 +1,227 @@
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from src.data_loader import clean_sequence, load_fasta
+from benchmarks.bench_api import load_app
+from benchmarks.common import AMINO_ACIDS
+from benchmarks.stubs import FakeESMFoldHandler, FakeGeminiHandler, start_stub_server
+
+DEFAULT_MIX = "predict=80,predict_batch=5,fold=10,explain=5"
+
+
+def build_sequence_pool(fasta_path=None, size=500, seed=0):
+    """
+    Sequences to send. From a FASTA file when given, otherwise synthetic sequences with a
+    log-normal length distribution (median ~300 residues, like typical protein chains).
+    """
+    rng = random.Random(seed)
+    if fasta_path:
+        pool = [clean_sequence(seq) for _, seq in load_fasta(fasta_path)]
+        pool = [seq for seq in pool if 0 < len(seq) <= 2000]
+        if not pool:
+            raise ValueError(f"No usable sequences in {fasta_path}")
+        return [rng.choice(pool) for _ in range(size)]
+
+    lengths = np.clip(np.random.default_rng(seed).lognormal(mean=np.log(300), sigma=0.6, size=size), 30, 2000)
+    return ["".join(rng.choices(AMINO_ACIDS, k=int(n))) for n in lengths]
+
+
+def make_request(endpoint, rng, pool):
+    """Returns (method, path, json_body) for one request to the given endpoint."""
+    seq = rng.choice(pool)
+    if endpoint == "predict":
+        return "POST", "/api/predict", {"sequence": seq}
+    if endpoint == "predict_batch":
+        batch = [{"name": f"seq{i}", "sequence": rng.choice(pool)} for i in range(rng.randint(5, 20))]
+        return "POST", "/api/predict-batch", {"sequences": batch}
+    if endpoint == "fold":
+        return "POST", "/api/fold", {"sequence": seq[:400]}
+    if endpoint == "explain":
+        family = f"Family_{rng.randrange(20)}"
+        return "POST", "/api/explain", {"family": family, "confidence": rng.random(), "sequence": seq}
+    if endpoint == "data":
+        return "GET", "/api/data", None
+    raise ValueError(f"Unknown endpoint '{endpoint}'")
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, weight = part.split("=")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def start_app(workdir, fold_latency, gemini_latency, rate_limits=True):
+    """Starts stub upstreams and the real Flask app (tiny offline ESM) on localhost ports."""
+    from werkzeug.serving import make_server
+
+    fold_server, fold_url = start_stub_server(FakeESMFoldHandler, fold_latency)
+    gemini_server, gemini_url = start_stub_server(FakeGeminiHandler, gemini_latency)
+    os.environ["ESMFOLD_URL"] = f"{fold_url}/foldSequence/v1/pdb/"
+    os.environ["GEMINI_API_KEY"] = "stub-key"
+    os.environ["GEMINI_BASE_URL"] = gemini_url
+
+    app_module = load_app(workdir, lift_rate_limits=not rate_limits)
+    logging.disable(logging.INFO)  # Per-request access/info logs would dominate the run
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", [server, fold_server, gemini_server]
+
+
+class LoadGenerator:
+    def __init__(self, base_url, weights, pool, seed=0, timeout=120):
+        """
+        Drives the API and records (endpoint, outcome, latency) for every request.
+        Outcome is the HTTP status code or the exception class name.
+        """
+        self.base_url = base_url
+        self.endpoints = list(weights)
+        self.weights = [weights[e] for e in self.endpoints]
+        self.pool = pool
+        self.seed = seed
+        self.timeout = timeout
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _send(self, rng, scheduled_at=None):
+        endpoint = rng.choices(self.endpoints, weights=self.weights)[0]
+        method, path, body = make_request(endpoint, rng, self.pool)
+        start = time.perf_counter()
+        try:
+            response = self._session().request(method, self.base_url + path, json=body, timeout=self.timeout)
+            outcome = response.status_code
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        end = time.perf_counter()
+        # Open-loop latency is measured from the scheduled send time (no coordinated omission)
+        latency = end - (scheduled_at if scheduled_at is not None else start)
+        with self._lock:
+            self.records.append((endpoint, outcome, latency))
+
+    def run_closed_loop(self, concurrency, duration):
+        """`concurrency` clients each send their next request as soon as the previous one returns."""
+        deadline = time.perf_counter() + duration
+
+        def client(index):
+            rng = random.Random(self.seed + index)
+            while time.perf_counter() < deadline:
+                self._send(rng)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def run_open_loop(self, rps, duration, max_inflight=256):
+        """Requests start on a fixed schedule of `rps` per second, whether or not earlier ones finished."""
+        rng = random.Random(self.seed)
+        start = time.perf_counter()
+        total = int(rps * duration)
+        with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+            for i in range(total):
+                scheduled_at = start + i / rps
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, random.Random(rng.random()), scheduled_at)
+
+
+def summarize(records, elapsed):
+    """Per-endpoint throughput, latency percentiles (successful requests) and error breakdown."""
+    by_endpoint = defaultdict(list)
+    for endpoint, outcome, latency in records:
+        by_endpoint[endpoint].append((outcome, latency))
+
+    report = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        ok = [latency for outcome, latency in rows if isinstance(outcome, int) and outcome < 400]
+        errors = Counter(str(outcome) for outcome, _ in rows if not (isinstance(outcome, int) and outcome < 400))
+        entry = {
+            "requests": len(rows),
+            "ok": len(ok),
+            "throughput_rps": len(ok) / elapsed,
+            "errors": dict(errors),
+        }
+        if ok:
+            ms = np.asarray(ok) * 1000
+            entry.update({f"p{p}_ms": float(np.percentile(ms, p)) for p in (50, 95, 99)})
+        report[endpoint] = entry
+    return report
+
+
+def print_report(report, elapsed):
+    print(f"\n{'endpoint':15s} {'reqs':>7s} {'ok/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s}  errors")
+    for endpoint, entry in report.items():
+        lat = [f"{entry.get(k, float('nan')):9.1f}" for k in ("p50_ms", "p95_ms", "p99_ms")]
+        errors = ", ".join(f"{k}×{v}" for k, v in sorted(entry["errors"].items())) or "-"
+        print(f"{endpoint:15s} {entry['requests']:7d} {entry['throughput_rps']:8.1f} {' '.join(lat)}  {errors}")
+    print(f"\nElapsed: {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline load test: runs the API against stub ESMFold/Gemini servers and reports "
+                    "throughput, latency percentiles and errors per endpoint."
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=8, help="Closed loop: number of concurrent clients")
+    mode.add_argument("--rps", type=float, default=None, help="Open loop: target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to generate load")
+    parser.add_argument("--mix", type=str, default=DEFAULT_MIX, help=f"Endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--fasta", type=str, default=None, help="Draw sequences from this FASTA file")
+    parser.add_argument("--fold_latency", type=float, default=0.5, help="Stub ESMFold latency in seconds")
+    parser.add_argument("--gemini_latency", type=float, default=1.0, help="Stub Gemini latency in seconds")
+    parser.add_argument("--no_rate_limits", action="store_true",
+                        help="Lift the per-IP limits (all load comes from one IP) to measure raw capacity")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        base_url, servers = start_app(workdir, args.fold_latency, args.gemini_latency,
+                                      rate_limits=not args.no_rate_limits)
+        generator = LoadGenerator(base_url, parse_mix(args.mix), build_sequence_pool(args.fasta, seed=args.seed),
+                                  seed=args.seed)
+        label = f"{args.rps} rps open loop" if args.rps else f"{args.concurrency} concurrent clients"
+        print(f"Driving {base_url} with {label} for {args.duration:.0f}s...")
+
+        start = time.perf_counter()
+        if args.rps:
+            generator.run_open_loop(args.rps, args.duration)
+        else:
+            generator.run_closed_loop(args.concurrency, args.duration)
+        elapsed = time.perf_counter() - start
+
+        for server in servers:
+            server.shutdown()
+
+    report = summarize(generator.records, elapsed)
+    print_report(report, elapsed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "elapsed_s": elapsed, "endpoints": report}, f, indent=2)
+        print(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
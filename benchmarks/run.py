@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from benchmarks import bench_api, bench_classifier, bench_data_loader, bench_extractor
+
+SUITES = {
+    "data_loader": bench_data_loader,
+    "extractor": bench_extractor,
+    "classifier": bench_classifier,
+    "api": bench_api,
+}
+
+
+def environment():
+    import numpy
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def run_suites(names, quick=False):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            print(f"Running {name} benchmarks...")
+            suite_results = SUITES[name].run(workdir, quick=quick)
+            for key, entry in suite_results.items():
+                print(f"  {key}: {entry['value']:.4g} {entry['unit']}")
+            results.update(suite_results)
+    return {"environment": environment(), "quick": quick, "results": results}
+
+
+def compare(baseline, current, threshold):
+    """
+    Compares two reports metric by metric. Returns a list of
+    (name, baseline_value, current_value, relative_change, regressed) for shared metrics,
+    where relative_change > 0 always means "better".
+    """
+    rows = []
+    for name, base in sorted(baseline["results"].items()):
+        cur = current["results"].get(name)
+        if cur is None or base["value"] == 0:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if not base.get("higher_is_better", True):
+            change = -change
+        rows.append((name, base["value"], cur["value"], change, change < -threshold))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"\n{'metric':60s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, base, cur, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:60s} {base:12.4g} {cur:12.4g} {change:+8.1%}{flag}")
+    regressions = sum(1 for row in rows if row[4])
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%} out of {len(rows)} compared metrics.")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="Suite to run (repeatable); default runs all")
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads for a fast smoke run")
+    parser.add_argument("--output", type=str, default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Baseline JSON report to compare against (exit code 1 on regression)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Only compare two existing reports, without running anything")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Relative slowdown tolerated before flagging a regression (default 0.15)")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if print_comparison(compare(baseline, current, args.threshold), args.threshold) else 0)
+
+    report = run_suites(args.suite or list(SUITES), quick=args.quick)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote report to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        sys.exit(1 if print_comparison(compare(baseline, report, args.threshold), args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real upstreams
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+
+class FakeESMFoldHandler(_StubHandler):
+    latency = 0.5
+
+    def do_POST(self):
+        sequence = self._read_body().decode("utf-8")
+        time.sleep(self.latency)
+        atoms = "\n".join(
+            f"ATOM  {i + 1:5d}  CA  ALA A{i + 1:4d}    {i * 3.8:8.3f}{0.0:8.3f}{0.0:8.3f}  1.00 90.00           C"
+            for i in range(len(sequence))
+        )
+        self._send(200, f"HEADER    STUB ESMFOLD\n{atoms}\nEND\n", "text/plain")
+
+
+class FakeGeminiHandler(_StubHandler):
+    latency = 1.0
+
+    def do_POST(self):
+        # Mimics POST /v1beta/models/<model>:generateContent
+        self._read_body()
+        time.sleep(self.latency)
+        text = "🧬 WHAT IS THIS PROTEIN FAMILY?\nStub explanation generated for load testing."
+        body = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]}
+        self._send(200, json.dumps(body), "application/json")
+
+
+def start_stub_server(handler_cls, latency):
+    """Starts a threaded stub server on a free localhost port; returns (server, base_url)."""
+    handler = type(handler_cls.__name__, (handler_cls,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
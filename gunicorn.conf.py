@@ -0,0 +1,17 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Threads serve I/O-bound requests (ESMFold/Gemini) while torch uses the worker's cores
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = 120
+# Load the app once in the master so workers share its memory copy-on-write (see wsgi.py)
+preload_app = True
+pidfile = os.environ.get('GUNICORN_PIDFILE', None)
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.after_fork(server.cfg.workers)
@@ -0,0 +1,53 @@
+import os
+import argparse
+
+from dotenv import load_dotenv
+
+from src.autotune import (BATCH_SIZES, LENGTH_BUCKETS, TUNING_FILE, calibrate, host_key, load_profile,
+                          save_profile, thread_options)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        description="Calibrate torch threads and batch geometry for ESM-2 on this host. The result is "
+                    "saved per CPU model and core count and loaded automatically by EmbeddingExtractor "
+                    "and the API.")
+    parser.add_argument("--model", type=str, default=os.environ.get("ESM_MODEL", "facebook/esm2_t6_8M_UR50D"))
+    parser.add_argument("--output", type=str, default=TUNING_FILE, help="Tuning file (ESM_TUNING_FILE)")
+    parser.add_argument("--threads", type=str, default=None,
+                        help="Comma-separated intra/inter pairs to try, e.g. '8/1,4/1,4/2' (default: derived "
+                             "from the core count)")
+    parser.add_argument("--lengths", type=str, default=",".join(map(str, LENGTH_BUCKETS)),
+                        help="Length buckets (residues, at most 510)")
+    parser.add_argument("--batch_sizes", type=str, default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--seconds", type=float, default=0.3, help="Minimum timing per measurement")
+    parser.add_argument("--show", action="store_true", help="Print the saved profile for this host and exit")
+    args = parser.parse_args()
+
+    print(f"Host: {host_key()}")
+    if args.show:
+        profile = load_profile(args.model, args.output)
+        print(profile.to_dict() if profile else f"No tuning for {args.model} in {args.output}")
+        return
+
+    threads = [tuple(int(n) for n in pair.split("/")) for pair in args.threads.split(",")] \
+        if args.threads else thread_options()
+    lengths = [int(n) for n in args.lengths.split(",")]
+    if max(lengths) > 510:
+        parser.error("lengths must be at most 510 residues")
+    print(f"Sweeping {len(threads)} thread settings x {len(lengths)} lengths x "
+          f"{len(args.batch_sizes.split(','))} batch sizes...")
+    profile = calibrate(args.model, threads=threads, lengths=lengths,
+                        batch_sizes=[int(n) for n in args.batch_sizes.split(",")], min_seconds=args.seconds)
+    print(f"Threads: {profile.intra_op_threads} intra-op, {profile.inter_op_threads} inter-op "
+          f"({profile.tokens_per_second:.0f} tokens/s)")
+    for bucket in profile.buckets:
+        print(f"  <= {bucket['max_length']:>3} residues: batch {bucket['batch_size']:>2}, "
+              f"{bucket['token_budget']} tokens")
+    save_profile(args.model, profile, args.output)
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import os
+import csv
+import argparse
+import multiprocessing
+from collections import deque
+
+import numpy as np
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+from src.cascade import Cascade, apply_cascade
+from src.data_loader import check_sequence, iter_fasta
+from src.embedding_extractor import EmbeddingExtractor
+from src.model_registry import LEGACY_PATHS, ModelRegistry
+from src.prefork import configure_worker_torch
+
+# escalated stays empty without a --cascade_model
+COLUMNS = ("name", "family", "confidence", "pca_x", "pca_y", "length", "model_version", "escalated", "error")
+
+# Same limit as the API's MAX_SEQ_LENGTH
+MAX_SEQ_LENGTH = 2000
+
+_extractor = None
+
+
+def _init_worker(model_name, window, stride, workers):
+    """Loads one extractor per worker process, with cores split between workers."""
+    global _extractor
+    if workers:
+        configure_worker_torch(workers)
+    # Masked pooling equals the API's one-sequence-at-a-time embedding, but lets sequences share a batch
+    _extractor = EmbeddingExtractor(model_name=model_name, window=window, stride=stride, pooling='masked_mean')
+
+
+def _embed_batch(sequences):
+    return _extractor.get_embeddings(sequences, batch_size=len(sequences))
+
+
+def count_records(path):
+    """Number of FASTA headers, for the progress bar (a byte scan, much cheaper than parsing)."""
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.startswith(b'>'))
+
+
+def length_buckets(sequences, batch_size):
+    """Batches of positions into sequences, sorted by length so each batch pads little."""
+    order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def add_cascade_arguments(parser):
+    """The API's CASCADE_* settings as command-line options."""
+    parser.add_argument("--cascade_model", type=str, default=os.environ.get("CASCADE_MODEL"),
+                        help="Larger ESM checkpoint that re-classifies low-confidence predictions (the API's "
+                             "CASCADE_MODEL; default: no cascade)")
+    parser.add_argument("--cascade_registry", type=str,
+                        default=os.environ.get("CASCADE_REGISTRY_DIR", "models/registry-large"),
+                        help="Registry of classifiers trained on the larger checkpoint (CASCADE_REGISTRY_DIR)")
+    parser.add_argument("--cascade_threshold", type=float, default=float(os.environ.get("CASCADE_THRESHOLD", 0.7)),
+                        help="Confidence below which a prediction escalates (CASCADE_THRESHOLD)")
+
+
+def cascade_from_args(args):
+    """The Cascade configured like the API's, or None without --cascade_model."""
+    if not args.cascade_model:
+        return None
+    return Cascade(args.cascade_model,
+                   ModelRegistry(args.cascade_registry, backend=args.backend, knn_k=args.knn_k),
+                   threshold=args.cascade_threshold, window=args.window, stride=args.stride)
+
+
+class TsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file, delimiter='\t', lineterminator='\n')
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows([[("" if row[col] is None else row[col]) for col in COLUMNS] for row in rows])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("name", pa.string()), ("family", pa.string()), ("confidence", pa.float64()),
+            ("pca_x", pa.float64()), ("pca_y", pa.float64()), ("length", pa.int64()),
+            ("model_version", pa.string()), ("escalated", pa.bool_()), ("error", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        # One row group per chunk, so results are on disk as they are produced
+        columns = {col: [row[col] for row in rows] for col in COLUMNS}
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, fmt=None):
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'tsv')
+    if fmt == 'parquet':
+        try:
+            return ParquetWriter(path)
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); use a .tsv output instead")
+    return TsvWriter(path)
+
+
+class BulkClassifier:
+    def __init__(self, bundle, model_name, window=None, stride=None, workers=0, batch_size=32,
+                 chunk_size=2048, max_length=MAX_SEQ_LENGTH, cascade=None):
+        """
+        Streams FASTA records through validation, embedding and classification without the
+        Flask app, using the same validation rules, extractor and ModelBundle.classify.
+        Args:
+            bundle (ModelBundle): Model version to classify with.
+            model_name (str): ESM checkpoint (the API's ESM_MODEL).
+            window, stride (int): Sliding-window settings (the API's ESM_WINDOW/ESM_STRIDE).
+            workers (int): Embedding processes; 0 embeds in this process.
+            batch_size (int): Sequences per forward pass (length-bucketed).
+            chunk_size (int): Records read, classified and written at a time.
+            max_length (int): Longer sequences are reported as errors; None disables the check.
+            cascade (Cascade): Re-classifies low-confidence predictions with a larger model,
+                as the API does; rows then fill the 'escalated' column.
+        """
+        self.bundle = bundle
+        self.cascade = cascade
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.max_length = max_length
+        self.pool = None
+        if workers > 0:
+            # spawn: workers must not inherit torch's thread pools from a forked parent
+            ctx = multiprocessing.get_context('spawn')
+            self.pool = ctx.Pool(workers, initializer=_init_worker, initargs=(model_name, window, stride, workers))
+        else:
+            _init_worker(model_name, window, stride, 0)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+    def _submit(self, records):
+        """Validates one chunk and queues its embedding batches; returns the pending chunk."""
+        rows, positions, sequences = [], [], []
+        for name, raw in records:
+            cleaned, error, _ = check_sequence(raw, self.max_length)
+            rows.append({"name": name, "family": None, "confidence": None, "pca_x": None, "pca_y": None,
+                         "length": len(cleaned) if cleaned else len(raw), "model_version": self.bundle.version,
+                         "escalated": None, "error": error})
+            if error is None:
+                positions.append(len(rows) - 1)
+                sequences.append(cleaned)
+
+        batches = []
+        for bucket in length_buckets(sequences, self.batch_size):
+            batch = [sequences[i] for i in bucket]
+            result = self.pool.apply_async(_embed_batch, (batch,)) if self.pool else batch
+            batches.append((bucket, result))
+        return rows, positions, sequences, batches
+
+    def _finish(self, pending):
+        rows, positions, sequences, batches = pending
+        if positions:
+            embeddings = None
+            for bucket, result in batches:
+                emb = result.get() if self.pool else _embed_batch(result)
+                if embeddings is None:
+                    embeddings = np.empty((len(positions), emb.shape[1]), dtype=emb.dtype)
+                embeddings[bucket] = emb
+
+            pred_idx, confidence, coords = self.bundle.classify(embeddings)
+            families, confidence, escalated = apply_cascade(self.cascade, self.bundle, sequences,
+                                                            pred_idx, confidence)
+            for row, pos in enumerate(positions):
+                rows[pos].update(family=families[row], confidence=float(confidence[row]),
+                                 pca_x=float(coords[row][0]), pca_y=float(coords[row][1]))
+                if self.cascade is not None:
+                    rows[pos]["escalated"] = bool(escalated[row])
+        return rows
+
+    def classify_records(self, records):
+        """Validates, embeds and classifies one chunk; returns its result rows in input order."""
+        return self._finish(self._submit(records))
+
+    def run(self, records, writer, progress=None):
+        """Classifies records into writer in input order; returns (classified, failed) counts."""
+        classified = failed = 0
+        pending = deque()
+
+        def drain():
+            nonlocal classified, failed
+            rows = self._finish(pending.popleft())
+            writer.write(rows)
+            errors = sum(row["error"] is not None for row in rows)
+            classified += len(rows) - errors
+            failed += errors
+            if progress is not None:
+                progress.update(len(rows))
+
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == self.chunk_size:
+                pending.append(self._submit(chunk))
+                chunk = []
+                # Keep the next chunk's batches queued while this one is classified and written
+                if len(pending) > 1:
+                    drain()
+        if chunk:
+            pending.append(self._submit(chunk))
+        while pending:
+            drain()
+        return classified, failed
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        description="Classify a FASTA file offline with the production model, without the API server. "
+                    "Results match /api/predict for the same model version and ESM settings."
+    )
+    parser.add_argument("--input", type=str, required=True, help="FASTA file")
+    parser.add_argument("--output", type=str, required=True, help="Results file (.tsv, or .parquet with pyarrow)")
+    parser.add_argument("--format", type=str, default=None, choices=["tsv", "parquet"],
+                        help="Output format (default: from the --output extension)")
+    parser.add_argument("--registry", type=str, default=os.environ.get("MODEL_REGISTRY_DIR", "models/registry"),
+                        help="Registry directory (same as the API's MODEL_REGISTRY_DIR)")
+    parser.add_argument("--version", type=str, default=None, help="Model version (default: CURRENT)")
+    parser.add_argument("--backend", type=str, default=os.environ.get("CLASSIFIER_BACKEND", "mlp").lower(),
+                        choices=["mlp", "centroid", "knn"], help="Classifier backend (the API's CLASSIFIER_BACKEND)")
+    parser.add_argument("--knn_k", type=int, default=int(os.environ.get("KNN_K", 5)))
+    parser.add_argument("--model", type=str, default=os.environ.get("ESM_MODEL", "facebook/esm2_t6_8M_UR50D"),
+                        help="ESM checkpoint (the API's ESM_MODEL)")
+    parser.add_argument("--window", type=int,
+                        default=int(os.environ["ESM_WINDOW"]) if os.environ.get("ESM_WINDOW") else None,
+                        help="Sliding-window size (the API's ESM_WINDOW)")
+    parser.add_argument("--stride", type=int,
+                        default=int(os.environ["ESM_STRIDE"]) if os.environ.get("ESM_STRIDE") else None)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="Embedding worker processes (0 = embed in the main process)")
+    parser.add_argument("--batch_size", type=int, default=32, help="Sequences per forward pass")
+    parser.add_argument("--chunk_size", type=int, default=2048, help="Records classified and written at a time")
+    parser.add_argument("--max_length", type=int, default=MAX_SEQ_LENGTH,
+                        help="Report longer sequences as errors, like the API (0 = no limit)")
+    add_cascade_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error: File {args.input} not found.")
+        return
+
+    registry = ModelRegistry(args.registry, backend=args.backend, knn_k=args.knn_k,
+                             fallback_paths=dict(LEGACY_PATHS))
+    bundle = registry.load(args.version)
+    if bundle is None or not bundle.model:
+        print("Error: Model not loaded.")
+        return
+
+    try:
+        writer = open_writer(args.output, args.format)
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    classifier = BulkClassifier(bundle, args.model, window=args.window, stride=args.stride, workers=args.workers,
+                                batch_size=args.batch_size, chunk_size=args.chunk_size,
+                                max_length=args.max_length or None, cascade=cascade_from_args(args))
+    try:
+        with tqdm(total=count_records(args.input), unit="seq", desc=f"Classifying ({bundle.version})") as progress:
+            classified, failed = classifier.run(iter_fasta(args.input), writer, progress)
+    finally:
+        classifier.close()
+        writer.close()
+    print(f"Classified {classified} sequences ({failed} rejected) with model {bundle.version}; wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from src.classifier import CLASSIFIER_BACKENDS, _l2_normalize, fit_classifier
+from src.dedup import group_train_test_split
+from src.embedding_codecs import decode_blocks, make_codec
+from src.embedding_store import EmbeddingStore
+
+DEFAULT_ENCODINGS = "float32,float16,int8,pq32,pq16,pq8"
+
+
+def top_neighbours(queries, reference, k, chunk_size=1024):
+    """Indices of each query's k most cosine-similar reference rows (unordered)."""
+    reference = _l2_normalize(reference)
+    k = min(k, len(reference))
+    out = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), chunk_size):
+        sims = _l2_normalize(queries[start:start + chunk_size]) @ reference.T
+        out[start:start + len(sims)] = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    return out
+
+
+def neighbour_recall(exact, approx):
+    """Mean fraction of each query's exact neighbours that the approximate search also returns."""
+    hits = [len(np.intersect1d(e, a, assume_unique=True)) for e, a in zip(exact, approx)]
+    return float(np.mean(hits) / exact.shape[1]) if len(hits) else 0.0
+
+
+def evaluate_encodings(X_train, y_train, X_test, y_test, encodings, backend="knn", k=5, recall_k=10, seed=0):
+    """
+    Encodes the training (reference) vectors with each encoding and measures what is lost
+    against float32: classifier accuracy on float32 queries (as at serving time, where
+    queries are freshly embedded) and recall@recall_k of the exact cosine neighbours.
+    The mlp starts from the same seeded weights for every encoding, so its accuracy loss
+    is the encoding's alone. Returns one dict per encoding.
+    """
+    exact = top_neighbours(X_test, X_train, recall_k)
+    baseline = None
+    report = []
+    for encoding in encodings:
+        codec = make_codec(encoding).fit(X_train)
+        decoded = decode_blocks(codec, codec.encode(X_train))
+        model = fit_classifier(backend, decoded, y_train, k=k, seed=seed)
+        accuracy = float(np.mean(model.predict(X_test) == y_test)) if len(y_test) else float("nan")
+        baseline = accuracy if baseline is None else baseline
+        dim = X_train.shape[1]
+        report.append({
+            "encoding": encoding,
+            "bytes_per_vector": codec.bytes_per_vector(dim),
+            "compression": 4 * dim / codec.bytes_per_vector(dim),
+            "relative_error": float(np.linalg.norm(decoded - X_train) / np.linalg.norm(X_train)),
+            "accuracy": accuracy,
+            "accuracy_loss": baseline - accuracy,
+            f"recall@{recall_k}": neighbour_recall(exact, top_neighbours(X_test, decoded, recall_k)),
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure accuracy and neighbour-recall loss of compressed embedding encodings.")
+    parser.add_argument("--embeddings", type=str, default="data/embeddings.npy", help="float32 embeddings (.npy)")
+    parser.add_argument("--store", type=str, default=None, help="Read --feature from this embedding store instead")
+    parser.add_argument("--feature", type=str, default=None, help="Store feature to evaluate")
+    parser.add_argument("--labels", type=str, default="data/labels.npy")
+    parser.add_argument("--groups", type=str, default="data/groups.npy",
+                        help="Duplicate groups from process_data --dedup, for a group-aware split (if present)")
+    parser.add_argument("--encodings", type=str, default=DEFAULT_ENCODINGS,
+                        help="Comma-separated encodings; the first is the baseline (pq<n> = n subspaces)")
+    parser.add_argument("--backend", type=str, default="knn", choices=["mlp"] + sorted(CLASSIFIER_BACKENDS))
+    parser.add_argument("--k", type=int, default=5, help="Neighbours for the knn backend")
+    parser.add_argument("--recall_k", type=int, default=10, help="Neighbours compared for recall")
+    parser.add_argument("--max_queries", type=int, default=2000, help="Held-out vectors evaluated")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+    if args.store and not args.feature:
+        parser.error("--store requires --feature")
+
+    if args.store:
+        X = EmbeddingStore(args.store).read(args.feature, rows=slice(None))
+    else:
+        X = np.load(args.embeddings)
+    y = np.load(args.labels)
+    groups = np.load(args.groups) if os.path.exists(args.groups) else None
+
+    if groups is not None and len(groups) == len(y):
+        train_idx, test_idx = group_train_test_split(groups, test_fraction=0.2, seed=args.seed)
+    else:
+        order = np.random.default_rng(args.seed).permutation(len(y))
+        split = max(1, int(0.8 * len(y)))
+        train_idx, test_idx = order[:split], order[split:]
+    test_idx = test_idx[:args.max_queries]
+    print(f"Reference set: {len(train_idx)} vectors x {X.shape[1]} dims, queries: {len(test_idx)}")
+
+    report = evaluate_encodings(np.asarray(X[train_idx], dtype=np.float32), y[train_idx],
+                                np.asarray(X[test_idx], dtype=np.float32), y[test_idx],
+                                [e.strip() for e in args.encodings.split(",") if e.strip()],
+                                backend=args.backend, k=args.k, recall_k=args.recall_k, seed=args.seed)
+
+    recall_key = f"recall@{args.recall_k}"
+    print(f"{'encoding':<10}{'bytes/vec':>10}{'ratio':>8}{'rel.err':>9}{'accuracy':>10}{'loss':>8}{recall_key:>11}")
+    for row in report:
+        print(f"{row['encoding']:<10}{row['bytes_per_vector']:>10}{row['compression']:>7.1f}x"
+              f"{row['relative_error']:>9.4f}{row['accuracy']:>10.4f}{row['accuracy_loss']:>8.4f}"
+              f"{row[recall_key]:>11.4f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import argparse
+
+import joblib
+import numpy as np
+
+from src.classifier import CLASSIFIER_BACKENDS, fit_classifier
+from src.embedding_store import EmbeddingStore
+from src.evaluation import Evaluation, stratified_kfold, write_report
+
+
+def evaluate_probabilities(proba, y, num_classes, chunk_size=4096, classes=None, **kwargs):
+    """Evaluation of stored probabilities (e.g. a memory-mapped .npy), read chunk by chunk."""
+    evaluation = Evaluation(num_classes, **kwargs)
+    for start in range(0, len(y), chunk_size):
+        evaluation.update(y[start:start + chunk_size], np.asarray(proba[start:start + chunk_size]), classes)
+    return evaluation
+
+
+def cross_validate(X, y, num_classes, folds=5, backend="knn", k=5, seed=0, chunk_size=4096,
+                   probabilities=None, **kwargs):
+    """
+    Stratified k-fold: each fold's classifier scores its held-out records chunk by chunk.
+    seed fixes both the folds and the mlp's initial weights, so a rerun reproduces the report.
+    Out-of-fold probabilities go to probabilities ((n, num_classes) array) when given.
+    """
+    evaluation = Evaluation(num_classes, **kwargs)
+    for fold, (train_idx, test_idx) in enumerate(stratified_kfold(y, folds, seed=seed)):
+        model = fit_classifier(backend, np.asarray(X[train_idx]), y[train_idx], num_classes, k, seed=seed)
+        classes = getattr(model, "classes_", None)
+        for start in range(0, len(test_idx), chunk_size):
+            rows = test_idx[start:start + chunk_size]
+            proba = model.predict_proba(np.asarray(X[rows]))
+            evaluation.update(y[rows], proba, classes)
+            if probabilities is not None:
+                full = np.zeros((len(rows), num_classes), dtype=np.float32)
+                full[:, np.arange(proba.shape[1]) if classes is None else classes] = proba
+                probabilities[rows] = full
+        print(f"Fold {fold + 1}/{folds}: {len(test_idx)} held-out records")
+    return evaluation
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Per-class evaluation report (confusions, P/R/F1, top-k, calibration) as JSON/CSV.")
+    parser.add_argument("--probabilities", type=str, default=None,
+                        help="Evaluate stored predicted probabilities (.npy, rows aligned with --labels) "
+                             "instead of cross-validating")
+    parser.add_argument("--classes", type=str, default=None,
+                        help="Label id of each --probabilities column (.npy; default 0..n-1)")
+    parser.add_argument("--embeddings", type=str, default="data/embeddings.npy")
+    parser.add_argument("--store", type=str, default=None, help="Cross-validate on --feature of this store")
+    parser.add_argument("--feature", type=str, default=None)
+    parser.add_argument("--labels", type=str, default="data/labels.npy")
+    parser.add_argument("--label_encoder", type=str, default="models/label_encoder.joblib",
+                        help="Family names for the report (if present)")
+    parser.add_argument("--folds", type=int, default=5, help="Stratified k-fold splits")
+    parser.add_argument("--backend", type=str, default="knn", choices=["mlp"] + sorted(CLASSIFIER_BACKENDS))
+    parser.add_argument("--k", type=int, default=5, help="Neighbours for the knn backend")
+    parser.add_argument("--top_k", type=str, default="1,5", help="Comma-separated k for top-k accuracy")
+    parser.add_argument("--bins", type=int, default=15, help="Calibration bins")
+    parser.add_argument("--confusions", type=int, default=50, help="Largest confusions listed")
+    parser.add_argument("--chunk_size", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the folds and the mlp's initial weights")
+    parser.add_argument("--save_probabilities", type=str, default=None,
+                        help="Write out-of-fold probabilities here (.npy), reusable with --probabilities")
+    parser.add_argument("--output_dir", type=str, default="results/evaluation")
+    args = parser.parse_args()
+    if args.store and not args.feature:
+        parser.error("--store requires --feature")
+
+    y = np.load(args.labels).astype(np.int64)
+    labels = None
+    if args.label_encoder and os.path.exists(args.label_encoder):
+        encoder = joblib.load(args.label_encoder)
+        labels = [str(label) for label in getattr(encoder, "classes_", [])] or None
+    num_classes = max(int(y.max()) + 1, len(labels or []))
+    if labels is not None and len(labels) < num_classes:
+        labels = None
+    options = {"top_k": [int(k) for k in args.top_k.split(",")], "bins": args.bins}
+
+    if args.probabilities:
+        proba = np.load(args.probabilities, mmap_mode="r")
+        classes = np.load(args.classes) if args.classes else None
+        evaluation = evaluate_probabilities(proba, y, num_classes, args.chunk_size, classes, **options)
+    else:
+        X = EmbeddingStore(args.store).read(args.feature) if args.store else np.load(args.embeddings, mmap_mode="r")
+        probabilities = None
+        if args.save_probabilities:
+            probabilities = np.lib.format.open_memmap(args.save_probabilities, mode="w+", dtype=np.float32,
+                                                      shape=(len(y), num_classes))
+        evaluation = cross_validate(X, y, num_classes, args.folds, args.backend, args.k, args.seed,
+                                    args.chunk_size, probabilities, **options)
+        if probabilities is not None:
+            probabilities.flush()
+            print(f"Saved out-of-fold probabilities to {args.save_probabilities}")
+
+    report = evaluation.report(labels, confusions=args.confusions)
+    os.makedirs(args.output_dir, exist_ok=True)
+    write_report(report, json_path=os.path.join(args.output_dir, "report.json"),
+                 per_class_csv=os.path.join(args.output_dir, "per_class.csv"),
+                 confusions_csv=os.path.join(args.output_dir, "top_confusions.csv"))
+
+    print(f"Records: {report['n']}  accuracy: {report['accuracy']:.4f}  macro F1: {report['macro']['f1']:.4f}  "
+          f"ECE: {report['ece']:.4f}")
+    print("Top-k accuracy: " + ", ".join(f"top-{k} {v:.4f}" for k, v in report["top_k_accuracy"].items()))
+    for row in report["top_confusions"][:10]:
+        print(f"  {row['true']} -> {row['predicted']}: {row['count']} ({row['fraction_of_true']:.1%} of true)")
+    print(f"Saved report.json, per_class.csv and top_confusions.csv to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
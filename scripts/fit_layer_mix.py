@@ -0,0 +1,84 @@
+import os
+import argparse
+
+import numpy as np
+
+from src.classifier import build_classifier, CLASSIFIER_BACKENDS
+from src.dedup import train_test_indices
+from src.embedding_store import LAYER_MIX, EmbeddingStore
+
+
+def probe_scores(store, names, y, train_idx, groups=None, backend="centroid", k=5, seed=0,
+                 validation_fraction=0.25):
+    """
+    Accuracy of a cheap probe classifier per stored layer, fitted and scored inside
+    train_idx only (a held-out validation part of it), so the test split stays unseen.
+    """
+    inner_groups = None if groups is None else groups[train_idx]
+    fit_part, val_part = train_test_indices(len(train_idx), inner_groups, validation_fraction, seed)
+    fit_rows, val_rows = np.sort(train_idx[fit_part]), np.sort(train_idx[val_part])
+    kwargs = {"k": k} if backend == "knn" else {}
+    scores = []
+    for name in names:
+        model = build_classifier(backend, store.read(name, rows=fit_rows), y[fit_rows], **kwargs)
+        scores.append(float(np.mean(model.predict(store.read(name, rows=val_rows)) == y[val_rows])))
+    return scores
+
+
+def mix_weights(scores, temperature=0.02):
+    """Softmax of the probe scores: layers within about temperature of the best share the weight."""
+    scores = np.asarray(scores, dtype=np.float64)
+    weights = np.exp((scores - scores.max()) / temperature)
+    return weights / weights.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Learn per-layer weights for the stored ESM-2 layers (process_data --layers) from a probe "
+                    "classifier's accuracy on the training split. Saves them with the store; train on the mix with "
+                    "train_model --feature layer_mix.")
+    parser.add_argument("--store", type=str, default="data/store")
+    parser.add_argument("--labels", type=str, default="data/labels.npy")
+    parser.add_argument("--groups", type=str, default="data/groups.npy",
+                        help="Duplicate groups from process_data --dedup, for group-aware splits (if present)")
+    parser.add_argument("--layers", type=str, default=None,
+                        help="Comma-separated stored features to mix (default: every layer_<n>)")
+    parser.add_argument("--probe", type=str, default="centroid", choices=sorted(CLASSIFIER_BACKENDS))
+    parser.add_argument("--k", type=int, default=5, help="Neighbours for the knn probe")
+    parser.add_argument("--temperature", type=float, default=0.02,
+                        help="Softmax temperature over probe accuracies (lower = closer to the single best layer)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed of the train/test split; train_model reuses it for --feature layer_mix")
+    args = parser.parse_args()
+
+    store = EmbeddingStore(args.store)
+    y = np.load(args.labels)
+    if len(y) != store.rows:
+        parser.error(f"{args.labels} has {len(y)} labels but {args.store} has {store.rows} rows")
+    groups = np.load(args.groups) if os.path.exists(args.groups) else None
+    if groups is not None and len(groups) != len(y):
+        print(f"Warning: {args.groups} does not match the store; ignoring it.")
+        groups = None
+
+    if args.layers:
+        names = [name.strip() for name in args.layers.split(",") if name.strip()]
+    else:
+        names = [name for name in store.features if name.startswith("layer_") and name[6:].isdigit()]
+    if len(names) < 2:
+        parser.error(f"need at least two layers to mix; {args.store} holds {store.features}")
+
+    train_idx, _ = train_test_indices(len(y), groups, test_fraction=0.2, seed=args.seed)
+    scores = probe_scores(store, names, y, train_idx, groups, args.probe, args.k, args.seed)
+    weights = mix_weights(scores, args.temperature)
+
+    store.update_attrs(**{LAYER_MIX: {"layers": names, "weights": weights.tolist(), "scores": scores,
+                                      "probe": args.probe, "temperature": args.temperature,
+                                      "split_seed": args.seed}})
+    for name, score, weight in zip(names, scores, weights):
+        print(f"{name:<12} probe accuracy {score:.4f}  weight {weight:.3f}")
+    print(f"Saved the layer mix to {args.store}; train on it with: "
+          f"python -m scripts.train_model --feature {LAYER_MIX}")
+
+
+if __name__ == "__main__":
+    main()
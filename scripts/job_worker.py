@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+import signal
+import socket
+import logging
+import argparse
+import traceback
+import threading
+import multiprocessing
+
+from dotenv import load_dotenv
+
+from scripts.classify import MAX_SEQ_LENGTH, BulkClassifier, add_cascade_arguments, cascade_from_args
+from src.data_loader import check_sequence
+from src.job_queue import JobStore
+from src.model_registry import LEGACY_PATHS, ModelRegistry
+from src.prefork import configure_worker_torch
+from src.response_cache import ResponseCache
+from src.upstream import UpstreamClient
+
+logger = logging.getLogger("job_worker")
+
+# Same limit as the API's MAX_FOLD_LENGTH
+MAX_FOLD_LENGTH = 400
+
+
+class Folder:
+    def __init__(self, url, cache_dir):
+        """ESMFold calls for fold jobs, sharing the API's on-disk fold cache."""
+        self.url = url
+        self.client = UpstreamClient('ESMFold', max_concurrency=1)
+        self.cache = ResponseCache(cache_dir)
+
+    def fetch(self, sequence):
+        response = self.client.post(self.url, data=sequence, headers={'Content-Type': 'text/plain'}, timeout=60)
+        if response.status_code != 200:
+            raise RuntimeError(f'ESMFold API returned {response.status_code}')
+        return response.text
+
+    def fold_items(self, items):
+        rows = []
+        for item in items:
+            row = {'name': item.get('name', 'Unknown'), 'pdb': None, 'cached': None, 'error': None}
+            cleaned, error, _ = check_sequence(item.get('sequence', ''), MAX_SEQ_LENGTH)
+            if error:
+                row['error'] = error
+            else:
+                cleaned = cleaned[:MAX_FOLD_LENGTH]
+                try:
+                    row['pdb'], row['cached'] = self.cache.get_or_compute(
+                        ResponseCache.key_for(cleaned), lambda: self.fetch(cleaned))
+                except Exception as e:
+                    logger.warning(f"[Fold] {row['name']}: {e}")
+                    row['error'] = 'Structure prediction failed'
+            rows.append(row)
+        return rows
+
+
+def run_job(store, job, handlers, chunk_size, heartbeat_seconds=None):
+    """
+    Processes a claimed job chunk by chunk from its last stored item, storing each chunk's
+    rows (and progress) before starting the next. Stops early if the job is cancelled.
+    With heartbeat_seconds, a background thread also heart-beats the job that often, so a
+    chunk that runs longer than the stale timeout (slow fold calls) is not requeued meanwhile.
+    """
+    handler = handlers.get(job['kind'])
+    if handler is None:
+        store.finish(job['job_id'], error=f"Unsupported job kind '{job['kind']}'")
+        return
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(heartbeat_seconds):
+            try:
+                if not store.heartbeat(job['job_id']):
+                    return
+            except Exception as e:
+                logger.warning(f"[Job {job['job_id']}] Heartbeat failed: {e}")
+
+    if heartbeat_seconds:
+        threading.Thread(target=beat, name=f"heartbeat-{job['job_id']}", daemon=True).start()
+    try:
+        _process_chunks(store, job, handler, chunk_size)
+    finally:
+        stop.set()
+
+
+def _process_chunks(store, job, handler, chunk_size):
+    items = job['items']
+    start = job['progress']['processed']
+    try:
+        while start < len(items):
+            rows = handler(items[start:start + chunk_size])
+            failed = sum(row['error'] is not None for row in rows)
+            if not store.record_results(job['job_id'], start, rows, failed):
+                logger.info(f"[Job {job['job_id']}] Cancelled")
+                return
+            start += len(rows)
+    except Exception:
+        logger.error(f"[Job {job['job_id']}] Failed: {traceback.format_exc()}")
+        store.finish(job['job_id'], error='Job failed')
+        return
+    store.finish(job['job_id'])
+    logger.info(f"[Job {job['job_id']}] Done ({len(items)} items)")
+
+
+def worker_main(index, args):
+    """One worker process: claims jobs until stopped."""
+    # Below the API's priority, and on its share of the cores, so interactive requests stay fast
+    os.nice(args.nice)
+    configure_worker_torch(args.workers)
+    logging.basicConfig(level=logging.INFO, format=f'%(asctime)s [worker{index}] %(levelname)s %(message)s')
+
+    store = JobStore(args.db)
+    registry = ModelRegistry(args.registry, backend=args.backend, knn_k=args.knn_k,
+                             fallback_paths=dict(LEGACY_PATHS))
+    bundle = registry.load()
+    if bundle is None or not bundle.model:
+        logger.error("Model not loaded; worker exiting")
+        return
+    if args.watch_seconds > 0:
+        registry.watch(args.watch_seconds)
+    classifier = BulkClassifier(bundle, args.model, window=args.window, stride=args.stride,
+                                batch_size=args.batch_size, cascade=cascade_from_args(args))
+    folder = Folder(args.esmfold_url, args.fold_cache_dir)
+
+    def classify(items):
+        # Each chunk uses the version active when it starts, like one API request
+        classifier.bundle = registry.active
+        return classifier.classify_records([(item.get('name', 'Unknown'), item.get('sequence', ''))
+                                            for item in items])
+
+    handlers = {'classify': classify, 'fold': folder.fold_items}
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    last_requeue = 0.0
+    while True:
+        if time.time() - last_requeue > args.stale_after / 2:
+            requeued = store.requeue_stale(args.stale_after)
+            if requeued:
+                logger.warning(f"Requeued {requeued} job(s) from unresponsive workers")
+            last_requeue = time.time()
+        job = store.claim(name)
+        if job is None:
+            time.sleep(args.poll_interval)
+            continue
+        logger.info(f"[Job {job['job_id']}] {job['kind']} of {job['progress']['total']} items "
+                    f"(priority {job['priority']}, from item {job['progress']['processed']})")
+        # Fold items are slow upstream calls: small chunks keep stored progress current
+        chunk_size = args.fold_chunk_size if job['kind'] == 'fold' else args.chunk_size
+        run_job(store, job, handlers, chunk_size, heartbeat_seconds=args.stale_after / 4)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        description="Run job workers that drain the persistent /api/jobs queue (classify and fold jobs)."
+    )
+    parser.add_argument("--db", type=str, default=os.environ.get("JOB_DB_PATH", "data/jobs.sqlite3"),
+                        help="Job database (the API's JOB_DB_PATH)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="Worker processes")
+    parser.add_argument("--batch_size", type=int, default=32, help="Sequences per forward pass")
+    parser.add_argument("--chunk_size", type=int, default=256,
+                        help="Items processed between progress/result commits")
+    parser.add_argument("--fold_chunk_size", type=int, default=8,
+                        help="Items per commit for fold jobs (each item is an ESMFold call)")
+    parser.add_argument("--poll_interval", type=float, default=1.0, help="Seconds between polls of an empty queue")
+    parser.add_argument("--stale_after", type=float, default=600.0,
+                        help="Requeue running jobs whose worker has not heart-beaten for this many seconds "
+                             "(workers heart-beat every quarter of this while a job runs)")
+    parser.add_argument("--nice", type=int, default=10, help="Scheduling niceness of worker processes")
+    parser.add_argument("--registry", type=str, default=os.environ.get("MODEL_REGISTRY_DIR", "models/registry"))
+    parser.add_argument("--watch_seconds", type=float, default=float(os.environ.get("MODEL_WATCH_SECONDS", 30)),
+                        help="Poll the registry's CURRENT this often and hot-swap new versions")
+    parser.add_argument("--backend", type=str, default=os.environ.get("CLASSIFIER_BACKEND", "mlp").lower(),
+                        choices=["mlp", "centroid", "knn"])
+    parser.add_argument("--knn_k", type=int, default=int(os.environ.get("KNN_K", 5)))
+    parser.add_argument("--model", type=str, default=os.environ.get("ESM_MODEL", "facebook/esm2_t6_8M_UR50D"))
+    parser.add_argument("--window", type=int,
+                        default=int(os.environ["ESM_WINDOW"]) if os.environ.get("ESM_WINDOW") else None)
+    parser.add_argument("--stride", type=int,
+                        default=int(os.environ["ESM_STRIDE"]) if os.environ.get("ESM_STRIDE") else None)
+    add_cascade_arguments(parser)
+    parser.add_argument("--esmfold_url", type=str,
+                        default=os.environ.get("ESMFOLD_URL", "https://api.esmatlas.com/foldSequence/v1/pdb/"))
+    parser.add_argument("--fold_cache_dir", type=str, default=os.environ.get("FOLD_CACHE_DIR", "cache/fold"))
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    processes = [ctx.Process(target=worker_main, args=(i, args), name=f"job-worker-{i}")
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+
+    def stop(signum, frame):
+        # An interrupted job is requeued after --stale_after and resumes from its last stored chunk
+        for process in processes:
+            process.terminate()
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"Started {len(processes)} job worker(s) on {args.db}")
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
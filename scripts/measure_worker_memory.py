@@ -0,0 +1,130 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+
+import requests
+
+SMAPS_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_smaps_rollup(pid):
+    """Memory totals (kB) for one process from /proc/<pid>/smaps_rollup (Linux >= 4.14)."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(":") in SMAPS_FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1])
+    values["USS"] = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    values["Shared"] = values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0)
+    return values
+
+
+def child_pids(pid):
+    """Direct children of pid, found by scanning /proc/*/stat."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Field 4 (ppid) follows the parenthesised command name, which may contain spaces
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def measure(master_pid):
+    rows = [("master", master_pid, read_smaps_rollup(master_pid))]
+    rows += [(f"worker{i}", pid, read_smaps_rollup(pid)) for i, pid in enumerate(child_pids(master_pid))]
+    return rows
+
+
+def print_table(rows):
+    print(f"{'process':10s} {'pid':>8s} {'RSS MB':>9s} {'PSS MB':>9s} {'USS MB':>9s} {'shared MB':>10s}")
+    for name, pid, mem in rows:
+        print(f"{name:10s} {pid:8d} {mem['Rss'] / 1024:9.1f} {mem['Pss'] / 1024:9.1f} "
+              f"{mem['USS'] / 1024:9.1f} {mem['Shared'] / 1024:10.1f}")
+    total_pss = sum(mem["Pss"] for _, _, mem in rows) / 1024
+    total_rss = sum(mem["Rss"] for _, _, mem in rows) / 1024
+    print(f"\nTotal PSS (real footprint): {total_pss:.1f} MB   Sum of RSS (naive): {total_rss:.1f} MB")
+
+
+def launch(workers, port, warmup_requests):
+    """Starts gunicorn with the production config; returns (process, master_pid)."""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port))
+    process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], env=env)
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            if len(child_pids(process.pid)) >= workers:
+                requests.get(f"http://127.0.0.1:{port}/api/data", timeout=5)
+                break
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    else:
+        raise RuntimeError("gunicorn did not become ready")
+
+    # Touch the request path in every worker so lazily allocated memory is counted
+    for i in range(warmup_requests):
+        requests.post(f"http://127.0.0.1:{port}/api/predict", json={"sequence": "MKTVRQERLK" * (1 + i % 30)},
+                      timeout=120)
+    return process, process.pid
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report per-worker memory (RSS, PSS and unique USS from /proc/<pid>/smaps_rollup) "
+                    "of a pre-fork server. USS is what each extra worker really costs."
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--pid", type=int, help="Master process id")
+    target.add_argument("--pidfile", type=str, help="File holding the master pid (gunicorn --pid)")
+    target.add_argument("--launch", action="store_true",
+                        help="Start gunicorn -c gunicorn.conf.py wsgi:app, warm it up, measure and stop it")
+    parser.add_argument("--workers", type=int, default=4, help="Workers to start with --launch")
+    parser.add_argument("--port", type=int, default=5055, help="Port for --launch")
+    parser.add_argument("--warmup_requests", type=int, default=40, help="/api/predict calls before measuring")
+    parser.add_argument("--json", type=str, default=None, help="Also write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    if sys.platform != "linux":
+        print("Error: smaps_rollup is only available on Linux.")
+        return
+
+    process = None
+    if args.launch:
+        process, master_pid = launch(args.workers, args.port, args.warmup_requests)
+    elif args.pidfile:
+        with open(args.pidfile) as f:
+            master_pid = int(f.read().strip())
+    else:
+        master_pid = args.pid
+
+    try:
+        rows = measure(master_pid)
+    finally:
+        if process is not None:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=60)
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([{"process": name, "pid": pid, **mem} for name, pid, mem in rows], f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
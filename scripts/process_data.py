@@ -1,16 +1,84 @@
 import os
+import json
 import numpy as np
 import argparse
 from src.data_loader import load_fasta, clean_sequence, encode_labels
+from src.dedup import dedup_sequences
 from src.embedding_extractor import EmbeddingExtractor
+from src.embedding_store import EmbeddingStore, RaggedStore
+from src.manifest import Manifest, record_ids
+from src.profiling import cprofile_to
+
+# Masked pooling makes a sequence's embedding independent of the batch it is embedded in (and
+# equal to the API's one-sequence embedding), so full and incremental builds produce the same rows
+POOLING = "masked_mean"
+
+def pooling_key(args):
+    """The pooling recorded in the store attrs and the manifest (windowed pooling names its windows)."""
+    if not args.window:
+        return POOLING
+    return f"{POOLING}/window={args.window}/stride={args.stride or args.window // 2}"
 
 def main():
     parser = argparse.ArgumentParser(description="Extract protein embeddings.")
     parser.add_argument("--input", type=str, default="data/sample.fasta", help="Path to input FASTA file")
     parser.add_argument("--output_dir", type=str, default="data", help="Directory to save embeddings")
     parser.add_argument("--model", type=str, default="facebook/esm2_t6_8M_UR50D", help="Model name")
+    parser.add_argument("--window", type=int, default=None,
+                        help="Embed long sequences as overlapping windows of this many residues (max 510) "
+                             "instead of truncating them")
+    parser.add_argument("--stride", type=int, default=None, help="Residues between windows (default window // 2)")
+    parser.add_argument("--dedup", type=str, default="exact", choices=["none", "exact", "near"],
+                        help="exact embeds each distinct sequence once; near also groups near-duplicates "
+                             "(k-mer MinHash) so training splits keep them on one side")
+    parser.add_argument("--near_threshold", type=float, default=0.9,
+                        help="Estimated k-mer Jaccard similarity for --dedup near")
+    parser.add_argument("--layers", type=str, default=None,
+                        help="Comma-separated ESM-2 layers to pool in the same forward pass (e.g. '2,4,-1,avg'; "
+                             "'avg' = uniform mean of all layers; learned weights: scripts.fit_layer_mix). "
+                             "Written side by side to <output_dir>/store")
+    parser.add_argument("--store_encoding", type=str, default=None,
+                        help="Re-encode the --layers store features: float16, int8 or pq<subspaces> (e.g. pq16); "
+                             "see scripts/encoding_report.py for the accuracy cost of each")
+    parser.add_argument("--residues", type=str, default=None, choices=["float16", "int8"],
+                        help="Also save per-residue states of the last layer to <output_dir>/residues "
+                             "(ragged, memory-mapped) in this encoding")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Keep <output_dir>/store and a manifest of (record ID, sequence hash, model, pooling) "
+                             "-> row; reruns embed only new or changed records and tombstone removed ones")
+    parser.add_argument("--compact", action="store_true",
+                        help="With --incremental: drop tombstoned rows from the store (renumbers rows)")
+    parser.add_argument("--profile", type=str, default=None,
+                        help="Write cProfile stats to this .prof file and torch traces to <profile>.torch/")
     args = parser.parse_args()
+    if args.incremental and args.residues:
+        parser.error("--residues is not supported with --incremental")
+    if args.compact and not args.incremental:
+        parser.error("--compact requires --incremental")
+
+    with cprofile_to(args.profile):
+        run(args)
 
+def extract(extractor, sequences, layers, residue_writer=None, chunk_size=1024):
+    """
+    Embeds sequences chunk by chunk (a multiple of the batch size, so batches are unchanged);
+    per-residue states go straight to residue_writer instead of accumulating in memory.
+    """
+    parts = []
+    for start in range(0, len(sequences), chunk_size):
+        chunk = list(sequences[start:start + chunk_size])
+        if residue_writer is None:
+            parts.append(extractor.get_embeddings(chunk, layers=layers))
+            continue
+        pooled, residues = extractor.get_embeddings(chunk, layers=layers, return_residues=True)
+        for states in residues:
+            residue_writer.append(states)
+        parts.append(pooled)
+    if layers is None:
+        return np.concatenate(parts, axis=0)
+    return {name: np.concatenate([part[name] for part in parts], axis=0) for name in parts[0]}
+
+def run(args):
     # 1. Load Data
     print(f"Loading data from {args.input}...")
     try:
@@ -40,14 +108,57 @@ def main():
         labels.append("Family_Unknown") 
 
     encoded_labels, label_mapping = encode_labels(labels)
-    
+
+    if args.incremental:
+        embeddings = update_store(args, record_ids(headers), cleaned_sequences)
+        if embeddings is None:
+            return
+        groups = None
+        if args.dedup != "none":
+            near_threshold = args.near_threshold if args.dedup == "near" else None
+            groups = dedup_sequences(cleaned_sequences, near_threshold=near_threshold)[2]
+        save_outputs(args, embeddings, encoded_labels, groups)
+        return
+
     # 3. Extract Embeddings
     print(f"Initializing model {args.model}...")
-    extractor = EmbeddingExtractor(model_name=args.model)
-    
-    print(f"Extracting embeddings for {len(cleaned_sequences)} sequences...")
-    embeddings = extractor.get_embeddings(cleaned_sequences)
+    extractor = EmbeddingExtractor(model_name=args.model, window=args.window, stride=args.stride, pooling=POOLING)
+    if args.profile:
+        extractor.trace_dir = args.profile + ".torch"
     
+    # The last layer is always extracted: it is what embeddings.npy and the API use
+    layers = None
+    if args.layers:
+        layers = [-1] + [layer.strip() for layer in args.layers.split(",") if layer.strip()]
+        names = extractor.layer_feature_names(layers)
+        layers = [layer for i, layer in enumerate(layers) if names[i] not in names[:i]]
+
+    residue_writer = None
+    if args.residues:
+        residue_writer = RaggedStore.create(os.path.join(args.output_dir, "residues"), extractor.hidden_dim,
+                                            dtype=args.residues)
+
+    groups = index_map = None
+    if args.dedup == "none":
+        print(f"Extracting embeddings for {len(cleaned_sequences)} sequences...")
+        features = extract(extractor, cleaned_sequences, layers, residue_writer)
+    else:
+        near_threshold = args.near_threshold if args.dedup == "near" else None
+        unique_sequences, index_map, groups = dedup_sequences(cleaned_sequences, near_threshold=near_threshold)
+        print(f"De-duplicated {len(cleaned_sequences)} records to {len(unique_sequences)} unique sequences "
+              f"({len(np.unique(groups))} groups)")
+        print(f"Extracting embeddings for {len(unique_sequences)} sequences...")
+        # Embed each distinct sequence once, then fan the vectors back out to every record
+        features = extract(extractor, unique_sequences, layers, residue_writer)
+        if layers is None:
+            features = features[index_map]
+        else:
+            features = {name: values[index_map] for name, values in features.items()}
+
+    if layers is None:
+        embeddings = features
+    else:
+        embeddings = features[extractor.layer_feature_names([-1])[0]]
     print(f"Embeddings shape: {embeddings.shape}")
     
     # 4. Save
@@ -59,7 +170,122 @@ def main():
     np.save(lbl_path, np.array(encoded_labels))
     
     print(f"Saved embeddings to {emb_path}")
+
+    if layers is not None:
+        store_dir = os.path.join(args.output_dir, "store")
+        store = EmbeddingStore.create(
+            store_dir, len(embeddings), {name: values.shape[1] for name, values in features.items()},
+            attrs={"model": args.model, "pooling": pooling_key(args), "window": args.window, "stride": args.stride}
+        )
+        store.write_rows(0, features)
+        store.flush()
+        if args.store_encoding:
+            for name in store.features:
+                store.encode(name, args.store_encoding)
+            print(f"Encoded layer features as {args.store_encoding}")
+        print(f"Saved layer features {store.features} to {store_dir}")
     print(f"Saved labels to {lbl_path}")
 
+    if residue_writer is not None:
+        # Duplicate records point at their sequence's single stored matrix
+        residues = residue_writer.close(index=index_map, attrs={"model": args.model, "layer": "last"})
+        print(f"Saved per-residue states ({args.residues}, {int(residues.offsets[-1])} residues) "
+              f"to {residues.root}")
+
+    save_groups(args.output_dir, groups)
+
+def save_outputs(args, embeddings, encoded_labels, groups):
+    os.makedirs(args.output_dir, exist_ok=True)
+    np.save(os.path.join(args.output_dir, "embeddings.npy"), embeddings)
+    np.save(os.path.join(args.output_dir, "labels.npy"), np.array(encoded_labels))
+    print(f"Saved embeddings {embeddings.shape} and labels to {args.output_dir}")
+    save_groups(args.output_dir, groups)
+
+def save_groups(output_dir, groups):
+    """
+    Writes groups.npy for group-aware splits, or removes one left by an earlier build when
+    this build has no groups (--dedup none), so training never splits on stale groups.
+    """
+    groups_path = os.path.join(output_dir, "groups.npy")
+    if groups is not None:
+        np.save(groups_path, groups)
+        print(f"Saved duplicate groups to {groups_path}")
+    elif os.path.exists(groups_path):
+        os.remove(groups_path)
+        print(f"Removed {groups_path} from an earlier build (no groups with --dedup none)")
+
+def update_store(args, ids, sequences):
+    """
+    Incremental build: diffs the records against <output_dir>/store/manifest.sqlite3, embeds
+    only new sequences into rows appended to the store, tombstones rows no record uses and
+    writes store/changes.json (rows added/removed in this generation) for downstream
+    artifacts. Returns the last-layer embeddings in record order, or None on error.
+    """
+    store_dir = os.path.join(args.output_dir, "store")
+    manifest = Manifest(os.path.join(store_dir, "manifest.sqlite3"))
+    pooling = pooling_key(args)
+    store = EmbeddingStore(store_dir) if os.path.exists(os.path.join(store_dir, "store.json")) else None
+    if store is not None and store.attrs.get("generation") != manifest.generation:
+        print(f"Error: {store_dir} and its manifest are out of sync (interrupted build?). "
+              f"Remove the directory and rebuild.")
+        return None
+
+    diff = manifest.diff(zip(ids, sequences), args.model, pooling)
+    print(f"Manifest generation {manifest.generation}: {len(diff.added)} added, {len(diff.changed)} changed, "
+          f"{len(diff.removed)} removed, {diff.unchanged} unchanged records; "
+          f"{len(diff.to_embed)} sequences to embed")
+
+    extractor = None
+    if diff.to_embed or store is None:
+        print(f"Initializing model {args.model}...")
+        extractor = EmbeddingExtractor(model_name=args.model, window=args.window, stride=args.stride,
+                                       pooling=POOLING)
+    layers = [-1] + [layer.strip() for layer in (args.layers or "").split(",") if layer.strip()]
+    if extractor is not None:
+        names = extractor.layer_feature_names(layers)
+        layers = [layer for i, layer in enumerate(layers) if names[i] not in names[:i]]
+        names = extractor.layer_feature_names(layers)
+        if store is not None and sorted(names) != sorted(store.features):
+            print(f"Error: {store_dir} holds features {store.features}, not {names}. "
+                  f"Use a new --output_dir for different --layers.")
+            return None
+
+    if diff.empty and store is not None:
+        print("Store is up to date; nothing to embed.")
+    else:
+        start = manifest.rows
+        new_rows = {seq_hash: start + i for i, seq_hash in enumerate(diff.to_embed)}
+        features = extract(extractor, list(diff.to_embed.values()), layers) if diff.to_embed else None
+        if store is None:
+            dims = {name: extractor.hidden_dim for name in extractor.layer_feature_names(layers)}
+            store = EmbeddingStore.create(store_dir, 0, dims, attrs={
+                "model": args.model, "pooling": pooling, "last_feature": extractor.layer_feature_names([-1])[0]})
+        store.grow(start + len(new_rows))
+        if features is not None:
+            store.write_rows(start, features)
+            store.flush()
+        store.update_attrs(generation=manifest.generation + 1, model=args.model, pooling=pooling)
+        generation = manifest.commit(diff, new_rows, args.model, pooling)
+        changes = manifest.changes(generation - 1)
+        with open(os.path.join(store_dir, "changes.json"), "w") as f:
+            json.dump({"generation": generation, "since": generation - 1, **changes}, f)
+        print(f"Generation {generation}: {len(changes['added'])} rows added, "
+              f"{len(changes['removed'])} rows tombstoned ({store.rows} rows stored)")
+
+    if args.compact:
+        keep = manifest.live_rows()
+        if len(keep) < store.rows:
+            store.compact(keep)
+            store.update_attrs(generation=manifest.generation + 1)
+            manifest.compact()
+            generation = manifest.generation
+            with open(os.path.join(store_dir, "changes.json"), "w") as f:
+                json.dump({"generation": generation, "since": generation - 1, "compacted": True}, f)
+            print(f"Compacted store to {store.rows} rows (generation {generation}; row numbers changed)")
+        else:
+            print("No tombstoned rows to compact.")
+
+    return store.read(store.attrs["last_feature"], rows=manifest.record_rows(ids))
+
 if __name__ == "__main__":
     main()
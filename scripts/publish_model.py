@@ -0,0 +1,61 @@
+import os
+import argparse
+
+from dotenv import load_dotenv
+
+from src.model_registry import ModelRegistry
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        description="Publish model artifacts as a new registry version (or switch versions). "
+                    "A running API picks it up via POST /admin/reload or MODEL_WATCH_SECONDS."
+    )
+    parser.add_argument("--registry", type=str, default=os.environ.get("MODEL_REGISTRY_DIR", "models/registry"),
+                        help="Registry directory (same as the API's MODEL_REGISTRY_DIR)")
+    parser.add_argument("--model", type=str, default=None, help="Classifier (joblib)")
+    parser.add_argument("--label_encoder", type=str, default=None, help="Label encoder (joblib)")
+    parser.add_argument("--embeddings", type=str, default=None, help="Training embeddings (.npy)")
+    parser.add_argument("--labels", type=str, default=None, help="Training labels (.npy)")
+    parser.add_argument("--backend", type=str, default=os.environ.get("CLASSIFIER_BACKEND", "mlp").lower(),
+                        help="Backend the API serves with (decides which artifacts a version needs)")
+    parser.add_argument("--no_inherit", action="store_true",
+                        help="Don't copy artifacts not given from the current version")
+    parser.add_argument("--version", type=str, default=None, help="Version name (default: timestamp)")
+    parser.add_argument("--no_activate", action="store_true", help="Publish without pointing CURRENT at it")
+    parser.add_argument("--activate", type=str, default=None, metavar="VERSION",
+                        help="Only point CURRENT at an existing version (rollback)")
+    parser.add_argument("--list", action="store_true", help="List versions and exit")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry, backend=args.backend)
+    if args.list:
+        current = registry.current_version()
+        for version in registry.versions():
+            print(f"{'*' if version == current else ' '} {version}")
+        return
+    if args.activate:
+        registry.activate(args.activate)
+        print(f"CURRENT -> {args.activate}")
+        return
+
+    artifacts = {name: path for name, path in (("model", args.model), ("label_encoder", args.label_encoder),
+                                               ("embeddings", args.embeddings), ("labels", args.labels)) if path}
+    if not artifacts:
+        parser.error("nothing to publish: pass at least one of --model/--label_encoder/--embeddings/--labels")
+    current = None if args.no_inherit else registry.current_version()
+    inherited = [] if current is None else sorted(
+        name for name, path in registry.paths_for(current).items() if name not in artifacts and os.path.exists(path))
+    try:
+        version = registry.publish(artifacts, version=args.version, activate=not args.no_activate,
+                                   inherit=not args.no_inherit)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Published {sorted(artifacts)} as version {version}" + ("" if args.no_activate else " (CURRENT)"))
+    if inherited:
+        print(f"Copied {inherited} from version {current}")
+
+
+if __name__ == "__main__":
+    main()
@@ -126,6 +126,13 @@ else:
     labels = ["Family A"] * 50
 
 
+# 3b. De-duplicate: PDB chains repeat the same sequence across structureIds, so embed
+# each distinct sequence once and fan the vectors back out with an index map
+position = {}
+index_map = np.array([position.setdefault(seq, len(position)) for seq in sequences])
+unique_sequences = list(position)
+print(f"{len(sequences)} records, {len(unique_sequences)} unique sequences")
+
 # 4. Extract Embeddings
 print("Extracting embeddings...")
 batch_size = 8
@@ -133,8 +140,8 @@ embeddings = []
 
 model.eval()
 with torch.no_grad():
-    for i in range(0, len(sequences), batch_size):
-        batch_seqs = sequences[i:i+batch_size]
+    for i in range(0, len(unique_sequences), batch_size):
+        batch_seqs = unique_sequences[i:i+batch_size]
         
         # Tokenize
         inputs = tokenizer(batch_seqs, return_tensors="pt", padding=True, truncation=True, max_length=512)
@@ -149,7 +156,7 @@ with torch.no_grad():
         batch_embeddings = outputs.last_hidden_state.mean(dim=1)
         embeddings.append(batch_embeddings.cpu().numpy())
 
-X = np.concatenate(embeddings)
+X = np.concatenate(embeddings)[index_map]
 print(f"Extracted shape: {X.shape}")
 
 # 5. Train Classifier
@@ -166,6 +173,7 @@ print(f"Training score: {clf.score(X, y):.4f}")
 print("Saving artifacts...")
 np.save("embeddings_real.npy", X)
 np.save("labels_real.npy", y)
+np.save("groups_real.npy", index_map)  # Identical sequences share a group: split by group to avoid leakage
 
 with open("real_model.pkl", "wb") as f:
     pickle.dump(clf, f)
@@ -1,32 +1,59 @@
 import numpy as np
 import os
-from src.classifier import SimpleMLP
+import argparse
+import joblib
+from src.classifier import SimpleMLP, build_classifier, CLASSIFIER_BACKENDS
+from src.dedup import train_test_indices
+from src.embedding_store import LAYER_MIX, EmbeddingStore
+from src.evaluation import Evaluation
+from src.profiling import cprofile_to
 
 def main():
+    parser = argparse.ArgumentParser(description="Train a protein family classifier on stored embeddings.")
+    parser.add_argument("--backend", type=str, default="mlp", choices=["mlp"] + sorted(CLASSIFIER_BACKENDS),
+                        help="mlp trains SimpleMLP; centroid/knn are built directly from the stored embeddings")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours for the knn backend")
+    parser.add_argument("--output", type=str, default=None, help="Optional path to save the fitted classifier (joblib)")
+    parser.add_argument("--feature", type=str, default=None,
+                        help="Train on this feature of data/store instead of data/embeddings.npy: e.g. layer_3 "
+                             "or layer_avg (uniform mean of all layers) from process_data --layers, or layer_mix "
+                             "(learned layer weights, python -m scripts.fit_layer_mix)")
+    parser.add_argument("--profile", type=str, default=None, help="Write cProfile stats of the run to this .prof file")
+    args = parser.parse_args()
+
+    with cprofile_to(args.profile):
+        run(args)
+
+def run(args):
     print("Loading data...")
     if not os.path.exists("data/embeddings.npy") or not os.path.exists("data/labels.npy"):
         print("Error: data/embeddings.npy or data/labels.npy not found. Run process_data.py first.")
         return
 
-    X = np.load("data/embeddings.npy")
+    if args.feature:
+        store = EmbeddingStore("data/store")
+        X = store.read(args.feature, rows=slice(None))
+        print(f"Using stored feature {args.feature} ({store.attrs.get('model')})")
+    else:
+        X = np.load("data/embeddings.npy")
     y = np.load("data/labels.npy")
 
     print(f"Loaded X: {X.shape}, y: {y.shape}")
     
-    # Shuffle indices
-    indices = np.arange(X.shape[0])
-    np.random.shuffle(indices)
-    X = X[indices]
-    y = y[indices]
+    groups = np.load("data/groups.npy") if os.path.exists("data/groups.npy") else None
+    if groups is not None and len(groups) != len(y):
+        print("Warning: data/groups.npy does not match the embeddings; ignoring it.")
+        groups = None
 
-    # Simple Train/Test split (80/20)
-    split_idx = int(X.shape[0] * 0.8)
-    # Ensure at least 1 sample in test if data is tiny
-    if split_idx == X.shape[0] and X.shape[0] > 1:
-        split_idx -= 1
-        
-    X_train, X_test = X[:split_idx], X[split_idx:]
-    y_train, y_test = y[:split_idx], y[split_idx:]
+    # A fitted layer mix saw only the training rows of its seeded split: reuse that split
+    seed = store.attrs[LAYER_MIX]["split_seed"] if args.feature == LAYER_MIX else None
+    # Simple Train/Test split (80/20); with duplicate/near-duplicate groups from
+    # process_data --dedup, each group stays on one side
+    train_idx, test_idx = train_test_indices(len(y), groups, test_fraction=0.2, seed=seed)
+    if groups is not None:
+        print(f"Group-aware split over {len(np.unique(groups))} sequence groups")
+    X_train, X_test = X[train_idx], X[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
 
     print(f"Training on {X_train.shape[0]} samples, Testing on {X_test.shape[0]} samples")
 
@@ -40,28 +67,41 @@ def main():
     else:
         num_classes = 2 # fallback
 
-    hidden_dim = 64
+    if args.backend == "mlp":
+        hidden_dim = 64
 
-    print(f"Initializing MLP: Input={input_dim}, Hidden={hidden_dim}, Output={num_classes}")
-    
-    model = SimpleMLP(input_dim, hidden_dim, num_classes, learning_rate=0.1)
-    
-    print("Starting training...")
-    # Train for more epochs since it's fast
-    model.train(X_train, y_train, epochs=200)
+        print(f"Initializing MLP: Input={input_dim}, Hidden={hidden_dim}, Output={num_classes}")
+
+        model = SimpleMLP(input_dim, hidden_dim, num_classes, learning_rate=0.1)
+
+        print("Starting training...")
+        # Train for more epochs since it's fast
+        model.train(X_train, y_train, epochs=200)
+    else:
+        # Prototype/kNN backends only store vectors, so "training" is a single pass
+        print(f"Building {args.backend} classifier over {X_train.shape[0]} embeddings...")
+        kwargs = {"k": args.k} if args.backend == "knn" else {}
+        model = build_classifier(args.backend, X_train, y_train, **kwargs)
 
     print("\nEvaluating...")
     if X_test.shape[0] > 0:
         predictions = model.predict(X_test)
         accuracy = np.mean(predictions == y_test)
         print(f"Test Accuracy: {accuracy * 100:.2f}%")
-        print(f"Predictions: {predictions}")
-        print(f"True Labels: {y_test}")
+        evaluation = Evaluation(int(num_classes))
+        evaluation.update(y_test, model.predict_proba(X_test), getattr(model, "classes_", None))
+        report = evaluation.report()
+        print(f"Macro F1: {report['macro']['f1']:.4f}, top-5 accuracy: {report['top_k_accuracy']['5'] * 100:.2f}%, "
+              f"ECE: {report['ece']:.4f} (full report: python -m scripts.evaluate)")
     else:
         print("Test set is empty (too few samples), running evaluation on TRAIN set instead.")
         predictions = model.predict(X_train)
         accuracy = np.mean(predictions == y_train)
         print(f"Train Accuracy: {accuracy * 100:.2f}%")
 
+    if args.output:
+        joblib.dump(model, args.output)
+        print(f"Saved classifier to {args.output}")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,85 @@
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import joblib
+from dotenv import load_dotenv
+from google import genai
+from google.genai import errors as genai_errors
+
+from src.explainer import build_family_prompt, request_explanation
+from src.model_registry import LEGACY_PATHS, ModelRegistry
+from src.response_cache import ResponseCache
+from src.upstream import UpstreamClient
+
+
+def served_label_encoder(registry_dir):
+    """The label encoder of the version the API serves: the registry's CURRENT, else the legacy path."""
+    registry = ModelRegistry(registry_dir)
+    version = registry.current_version()
+    return registry.paths_for(version)['label_encoder'] if version else LEGACY_PATHS['label_encoder']
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(
+        description="Precompute per-family explanations into the /api/explain cache "
+                    "(served when the API runs with EXPLAIN_CACHE_KEY=family)."
+    )
+    parser.add_argument("--registry", type=str, default=os.environ.get("MODEL_REGISTRY_DIR", "models/registry"),
+                        help="Model registry the API serves from (same as its MODEL_REGISTRY_DIR)")
+    parser.add_argument("--label_encoder", type=str, default=None,
+                        help="Label encoder whose classes_ list the families to warm "
+                             "(default: the one of the registry's current version)")
+    parser.add_argument("--cache_dir", type=str, default=os.environ.get("EXPLAIN_CACHE_DIR", "cache/explain"),
+                        help="Explanation cache directory (same as the API's EXPLAIN_CACHE_DIR)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel Gemini calls")
+    parser.add_argument("--limit", type=int, default=None, help="Only warm the first N families")
+    parser.add_argument("--force", action="store_true", help="Regenerate explanations that are already cached")
+    args = parser.parse_args()
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        print("Error: GEMINI_API_KEY not set.")
+        return
+
+    label_encoder = args.label_encoder or served_label_encoder(args.registry)
+    print(f"Families from {label_encoder}")
+    families = list(joblib.load(label_encoder).classes_)[:args.limit]
+    cache = ResponseCache(
+        args.cache_dir,
+        max_bytes=int(os.environ.get("EXPLAIN_CACHE_MAX_MB", 64)) * 1024 * 1024,
+        ttl_seconds=float(os.environ.get("EXPLAIN_CACHE_TTL_HOURS", 24 * 30)) * 3600
+    )
+    client = genai.Client(api_key=api_key)
+    upstream = UpstreamClient("Gemini", max_concurrency=args.concurrency, acquire_timeout=None)
+
+    todo = []
+    for family in families:
+        prompt, cache_key = build_family_prompt(family)
+        key = ResponseCache.key_for(cache_key)
+        if args.force or key not in cache:
+            todo.append((family, prompt, key))
+    print(f"{len(families) - len(todo)}/{len(families)} families already cached, generating {len(todo)}...")
+
+    def warm(family, prompt, key):
+        text = upstream.call(request_explanation, client, prompt, retry_on=(genai_errors.ServerError,))
+        cache.put(key, text)
+        return family
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = {pool.submit(warm, *item): item[0] for item in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+                print(f"[{done}/{len(todo)}] {futures[future]}")
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(todo)}] {futures[future]} FAILED: {e}")
+
+    print(f"Done. {len(todo) - failed} generated, {failed} failed. Cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
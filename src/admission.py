@@ -0,0 +1,118 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when admitting a request would push its estimated wait past the lane deadline."""
+    def __init__(self, lane, estimated_wait, retry_after):
+        super().__init__(f"{lane} lane overloaded (estimated wait {estimated_wait:.1f}s)")
+        self.lane = lane
+        self.estimated_wait = estimated_wait
+        self.retry_after = retry_after
+
+
+class Lane:
+    def __init__(self, name, deadline_seconds, max_tokens=None):
+        """
+        One class of traffic sharing the embedding model.
+        Args:
+            name (str): Lane name ('interactive', 'batch').
+            deadline_seconds (float): Reject when the estimated completion time exceeds this.
+            max_tokens (int): Optional cap on this lane's in-flight tokens, so bursts in one
+                lane cannot fill the model's backlog for the others.
+        """
+        self.name = name
+        self.deadline = deadline_seconds
+        self.max_tokens = max_tokens
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+
+class AdmissionController:
+    def __init__(self, lanes, alpha=0.3, sample_seconds=0.5, initial_tokens_per_second=None):
+        """
+        Global load shedding for embedding work, measured in tokens (residues).
+        In-flight tokens across all lanes, divided by an EWMA of the measured token throughput,
+        estimate how long a new request would wait. Requests whose estimate exceeds their
+        lane's deadline are rejected up front with a Retry-After hint instead of queueing
+        until they time out. The limit is per process, like the model it protects.
+        Args:
+            lanes (list[Lane]): Traffic lanes.
+            alpha (float): EWMA weight of each new throughput sample.
+            sample_seconds (float): Busy time aggregated into one throughput sample.
+            initial_tokens_per_second (float): Throughput assumed before the first sample;
+                None admits everything (except lane caps) until one is measured.
+        """
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.alpha = alpha
+        self.sample_seconds = sample_seconds
+        self.throughput = initial_tokens_per_second
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_event = time.monotonic()
+        self._sample_tokens = 0
+        self._sample_busy = 0.0
+
+    def _account_busy(self, now):
+        # Throughput is measured over time with work in flight, so idle gaps do not dilute it
+        if self._in_flight > 0:
+            self._sample_busy += now - self._last_event
+        self._last_event = now
+
+    def estimated_wait(self, cost=0):
+        """Seconds until cost more tokens would finish behind everything already in flight."""
+        if not self.throughput:
+            return 0.0
+        return (self._in_flight + cost) / self.throughput
+
+    def acquire(self, lane_name, cost):
+        """Admits cost tokens into a lane or raises AdmissionRejected. Pair with release()."""
+        lane = self.lanes[lane_name]
+        with self._lock:
+            # An idle lane or server always admits, so one oversized request still runs
+            over_cap = lane.max_tokens is not None and lane.in_flight > 0 and lane.in_flight + cost > lane.max_tokens
+            wait = self.estimated_wait(cost)
+            if self._in_flight > 0 and (over_cap or wait > lane.deadline):
+                lane.rejected += 1
+                backlog_wait = self.estimated_wait()
+                retry_after = max(1, math.ceil(backlog_wait if over_cap else wait - lane.deadline))
+                raise AdmissionRejected(lane_name, wait, retry_after)
+            self._account_busy(time.monotonic())
+            self._in_flight += cost
+            lane.in_flight += cost
+            lane.admitted += 1
+
+    def release(self, lane_name, cost):
+        lane = self.lanes[lane_name]
+        with self._lock:
+            self._account_busy(time.monotonic())
+            self._in_flight -= cost
+            lane.in_flight -= cost
+            self._sample_tokens += cost
+            if self._sample_busy >= self.sample_seconds:
+                rate = self._sample_tokens / self._sample_busy
+                self.throughput = rate if self.throughput is None else \
+                    self.alpha * rate + (1 - self.alpha) * self.throughput
+                self._sample_tokens, self._sample_busy = 0, 0.0
+
+    @contextmanager
+    def admit(self, lane_name, cost):
+        """with controller.admit('interactive', tokens): ... — raises AdmissionRejected when overloaded."""
+        self.acquire(lane_name, cost)
+        try:
+            yield
+        finally:
+            self.release(lane_name, cost)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight_tokens': self._in_flight,
+                'throughput_tokens_per_second': self.throughput or 0.0,
+                'estimated_wait_seconds': self.estimated_wait(),
+                'lanes': {name: {'in_flight_tokens': lane.in_flight, 'admitted': lane.admitted,
+                                 'rejected': lane.rejected} for name, lane in self.lanes.items()},
+            }
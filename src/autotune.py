@@ -0,0 +1,216 @@
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import time
+
+logger = logging.getLogger(__name__)
+
+TUNING_FILE = os.environ.get('ESM_TUNING_FILE', 'cache/esm_tuning.json')
+# Representative sequence lengths (residues); each is the upper bound of a length bucket
+LENGTH_BUCKETS = (64, 256, 510)
+BATCH_SIZES = (1, 4, 8, 16, 32)
+AMINO_ACIDS = 'ACDEFGHIKLMNPQRSTVWY'
+
+
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine() or 'unknown'
+
+
+def host_key():
+    """Tuning results only transfer between hosts with the same CPU model and core count."""
+    return f'{cpu_model()} x{os.cpu_count() or 1}'
+
+
+def thread_options(cpu_count=None):
+    """Candidate (intra-op, inter-op) torch thread counts for this host."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    intra = sorted({cpu_count, max(1, cpu_count // 2), max(1, cpu_count // 4)}, reverse=True)
+    return [(threads, inter) for threads in intra for inter in (1, 2)]
+
+
+def padded_tokens(length, pad_to_multiple_of=None):
+    """Tokens per row for a sequence of length residues: <cls> and <eos>, rounded up to the padding multiple."""
+    tokens = length + 2
+    if pad_to_multiple_of:
+        tokens = -(-tokens // pad_to_multiple_of) * pad_to_multiple_of
+    return tokens
+
+
+class TuningProfile:
+    def __init__(self, intra_op_threads, inter_op_threads, buckets, tokens_per_second=None):
+        """
+        Best torch threads and batch geometry measured on one host for one model.
+        Args:
+            intra_op_threads, inter_op_threads (int): torch thread pools.
+            buckets (list[dict]): Ascending {'max_length', 'batch_size', 'token_budget'}; a
+                batch of sequences up to max_length residues holds at most token_budget tokens.
+            tokens_per_second (float): Measured throughput of the chosen settings.
+        """
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.buckets = sorted(buckets, key=lambda bucket: bucket['max_length'])
+        self.tokens_per_second = tokens_per_second
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['intra_op_threads'], data['inter_op_threads'], data['buckets'],
+                   data.get('tokens_per_second'))
+
+    def to_dict(self):
+        return {'intra_op_threads': self.intra_op_threads, 'inter_op_threads': self.inter_op_threads,
+                'buckets': self.buckets, 'tokens_per_second': self.tokens_per_second}
+
+    def token_budget(self, length):
+        """Tokens per batch for sequences of this many residues (the smallest bucket that fits)."""
+        for bucket in self.buckets:
+            if length <= bucket['max_length']:
+                return bucket['token_budget']
+        return self.buckets[-1]['token_budget']
+
+    def plan_batches(self, lengths, pad_to_multiple_of=None):
+        """
+        Groups sequence indices into length-sorted batches within the token budget of each
+        batch's longest sequence (padded tokens count). Only valid where results do not
+        depend on batch composition (masked pooling).
+        pad_to_multiple_of: the tokenizer's padding multiple, so the budget is checked
+        against the padded batch width actually run.
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches, batch = [], []
+        for i in order:
+            tokens = padded_tokens(lengths[i], pad_to_multiple_of)
+            if batch and (len(batch) + 1) * tokens > self.token_budget(lengths[i]):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def apply_threads(self, max_threads=None):
+        """Sets torch's thread pools; max_threads caps intra-op threads (e.g. a pre-fork worker's share)."""
+        import torch
+
+        threads = self.intra_op_threads if max_threads is None else min(self.intra_op_threads, max_threads)
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError:
+            pass  # Already fixed once inter-op parallel work has run in this process
+        return threads
+
+
+def load_profile(model_name, path=None):
+    """This host's saved TuningProfile for model_name, or None."""
+    path = path or TUNING_FILE
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    entry = data.get(host_key(), {}).get(model_name)
+    return TuningProfile.from_dict(entry) if entry else None
+
+
+def save_profile(model_name, profile, path=None):
+    """Stores profile under this host's key, keeping entries for other hosts and models."""
+    path = path or TUNING_FILE
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {}
+    entry = profile.to_dict()
+    entry['measured_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    data.setdefault(host_key(), {})[model_name] = entry
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _sweep(model_name, intra, inter, lengths, batch_sizes, min_seconds):
+    """Runs in a fresh process (inter-op threads are fixed once set). Returns {length: {batch: tokens/s}}."""
+    import numpy as np
+    import torch
+    from src.embedding_extractor import EmbeddingExtractor
+
+    torch.set_num_threads(intra)
+    torch.set_num_interop_threads(inter)
+    extractor = EmbeddingExtractor(model_name=model_name, pooling='masked_mean', tuning=None)
+    results = {}
+    for length in lengths:
+        results[length] = {}
+        for batch_size in batch_sizes:
+            rng = np.random.default_rng(length)
+            sequences = [''.join(rng.choice(list(AMINO_ACIDS), size=length)) for _ in range(batch_size)]
+            extractor.get_embeddings(sequences, batch_size=batch_size)  # Warm-up
+            runs, start = 0, time.perf_counter()
+            while runs < 2 or time.perf_counter() - start < min_seconds:
+                extractor.get_embeddings(sequences, batch_size=batch_size)
+                runs += 1
+            results[length][batch_size] = runs * batch_size * (length + 2) / (time.perf_counter() - start)
+    return results
+
+
+def choose_profile(measurements, pad_to_multiple_of=None):
+    """
+    Picks the thread setting with the best geometric-mean throughput over length buckets,
+    then each bucket's fastest batch size under it.
+    Args:
+        measurements (dict): (intra, inter) -> {length: {batch_size: tokens/s}}.
+        pad_to_multiple_of (int): Padding multiple the sweep ran with; budgets count padded tokens.
+    """
+    def score(results):
+        return math.exp(sum(math.log(max(by_batch.values())) for by_batch in results.values()) / len(results))
+
+    (intra, inter), results = max(measurements.items(), key=lambda item: score(item[1]))
+    buckets = []
+    for length, by_batch in sorted(results.items()):
+        batch_size = max(by_batch, key=by_batch.get)
+        buckets.append({'max_length': length, 'batch_size': batch_size,
+                        'token_budget': batch_size * padded_tokens(length, pad_to_multiple_of)})
+    return TuningProfile(intra, inter, buckets, tokens_per_second=score(results))
+
+
+def calibrate(model_name, threads=None, lengths=LENGTH_BUCKETS, batch_sizes=BATCH_SIZES, min_seconds=0.3):
+    """
+    Short synthetic sweep over torch threads and batch geometry on this host. Each thread
+    setting runs in its own spawned process, since inter-op threads cannot change once
+    torch has used them. Returns the chosen TuningProfile (not saved).
+    """
+    measurements = {}
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for intra, inter in threads or thread_options():
+            started = time.perf_counter()
+            measurements[(intra, inter)] = pool.apply(
+                _sweep, (model_name, intra, inter, tuple(lengths), tuple(batch_sizes), min_seconds))
+            logger.info(f"[Autotune] threads={intra}/{inter} measured in {time.perf_counter() - started:.1f}s")
+    from src.embedding_extractor import PAD_BUCKET
+
+    return choose_profile(measurements, PAD_BUCKET)
+
+
+def ensure_profile(model_name, path=None, **kwargs):
+    """This host's profile for model_name, calibrating and saving one first if there is none."""
+    profile = load_profile(model_name, path)
+    # A spawned child re-imports the parent's __main__; never start a nested calibration there
+    if profile is None and multiprocessing.parent_process() is None:
+        logger.info(f"[Autotune] No tuning for {model_name} on {host_key()}; calibrating...")
+        profile = calibrate(model_name, **kwargs)
+        save_profile(model_name, profile, path)
+    return profile
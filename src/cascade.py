@@ -0,0 +1,128 @@
+import contextlib
+import logging
+import threading
+import time
+
+import numpy as np
+
+from src.embedding_extractor import EmbeddingExtractor
+
+logger = logging.getLogger(__name__)
+
+
+class Cascade:
+    def __init__(self, model_name, registry, threshold=0.7, window=None, stride=None, retry_seconds=60.0):
+        """
+        Second stage of a confidence-gated model cascade. Every sequence is classified by
+        the small model first; only predictions below threshold are re-embedded with a
+        larger ESM-2 checkpoint and classified by that checkpoint's own classifier.
+        The large extractor and its model version load on the first escalation.
+        Args:
+            model_name (str): Larger ESM-2 checkpoint, e.g. facebook/esm2_t12_35M_UR50D.
+            registry (ModelRegistry): Versions trained on that checkpoint's embeddings.
+            threshold (float): Small-model confidence below which a prediction escalates.
+            window, stride (int): Sliding-window settings for the large extractor.
+            retry_seconds (float): After a failed load, escalations are skipped this long.
+        """
+        self.model_name = model_name
+        self.registry = registry
+        self.threshold = threshold
+        self.window = window
+        self.stride = stride
+        self.retry_seconds = retry_seconds
+        self.extractor = None
+        self.last_error = None
+        self._failed_at = None
+        self._load_lock = threading.Lock()
+        self.seen = 0
+        self.escalated = 0
+        self._stats_lock = threading.Lock()
+
+    def needs_escalation(self, confidence):
+        """Boolean mask of predictions to escalate (unavailable confidence, -1, never escalates)."""
+        confidence = np.asarray(confidence)
+        return (confidence >= 0) & (confidence < self.threshold)
+
+    def _ready(self):
+        bundle = self.registry.active
+        return self.extractor is not None and bundle is not None and bundle.model is not None
+
+    def _ensure_loaded(self):
+        """Loads the large stage once; returns False while it is unavailable."""
+        if self._ready():
+            return True
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_seconds:
+            return False
+        with self._load_lock:
+            if self._ready():
+                return True
+            try:
+                bundle = self.registry.active
+                if bundle is None or bundle.model is None:
+                    bundle = self.registry.load()
+                    if bundle.model is None:
+                        raise RuntimeError(f"no classifier in {self.registry.root}")
+                if self.extractor is None:
+                    # Masked pooling: batched results equal one-at-a-time embedding
+                    self.extractor = EmbeddingExtractor(model_name=self.model_name, window=self.window,
+                                                        stride=self.stride, pooling='masked_mean')
+            except Exception as e:
+                self.last_error = str(e)
+                self._failed_at = time.monotonic()
+                logger.error(f"[Cascade] Large stage unavailable, serving small-model results: {e}")
+                return False
+            self._failed_at = None
+            self.last_error = None
+            return True
+
+    def observe(self, seen, escalated):
+        """Counts predictions and escalations for the escalation-rate metric."""
+        with self._stats_lock:
+            self.seen += seen
+            self.escalated += escalated
+
+    @property
+    def escalation_rate(self):
+        return self.escalated / self.seen if self.seen else 0.0
+
+    def classify(self, sequences, timings=None):
+        """
+        Embeds and classifies sequences with the large stage.
+        Returns (families, confidence, version), or None if the stage is unavailable.
+        """
+        if not self._ensure_loaded():
+            return None
+        bundle = self.registry.active
+        embeddings = self.extractor.get_embeddings(list(sequences), timings=timings)
+        pred_idx, confidence, _ = bundle.classify(embeddings)
+        return [bundle.family(idx) for idx in pred_idx], confidence, bundle.version
+
+
+def apply_cascade(cascade, bundle, sequences, pred_idx, confidence, timer=None):
+    """
+    Final (families, confidence, escalated) per sequence: the small model's answers
+    (bundle's pred_idx/confidence), with those below the cascade threshold replaced by the
+    large stage. With cascade None, or the large stage unavailable, nothing escalates.
+    Shared by the API, scripts/classify.py and the job workers so all three agree.
+    Args:
+        timer (callable): Optional stage -> context manager, timing the escalation.
+    """
+    families = [bundle.family(idx) for idx in pred_idx]
+    confidence = np.array(confidence, dtype=float)
+    escalated = np.zeros(len(families), dtype=bool)
+    if cascade is None:
+        return families, confidence, escalated
+
+    rows = np.flatnonzero(cascade.needs_escalation(confidence))
+    if rows.size:
+        with timer('cascade') if timer is not None else contextlib.nullcontext():
+            result = cascade.classify([sequences[i] for i in rows])
+        if result is not None:
+            large_families, large_confidence, _ = result
+            for row, i in enumerate(rows):
+                families[i] = large_families[row]
+                confidence[i] = large_confidence[row]
+            escalated[rows] = True
+
+    cascade.observe(len(families), int(escalated.sum()))
+    return families, confidence, escalated
@@ -1,9 +1,10 @@
 import numpy as np
 
 class SimpleMLP:
-    def __init__(self, input_dim, hidden_dim, output_dim, learning_rate=0.01):
+    def __init__(self, input_dim, hidden_dim, output_dim, learning_rate=0.01, seed=None):
         """
         Initializes a simple 2-layer MLP.
+        With seed the initial weights are reproducible; without it they come from np.random.
         """
         self.input_dim = input_dim
         self.hidden_dim = hidden_dim
@@ -11,9 +12,10 @@ class SimpleMLP:
         self.lr = learning_rate
 
         # Initialize weights (Xavier/Glorot initialization)
-        self.W1 = np.random.randn(input_dim, hidden_dim) * np.sqrt(2. / input_dim)
+        rng = np.random if seed is None else np.random.RandomState(seed)
+        self.W1 = rng.randn(input_dim, hidden_dim) * np.sqrt(2. / input_dim)
         self.b1 = np.zeros((1, hidden_dim))
-        self.W2 = np.random.randn(hidden_dim, output_dim) * np.sqrt(2. / hidden_dim)
+        self.W2 = rng.randn(hidden_dim, output_dim) * np.sqrt(2. / hidden_dim)
         self.b2 = np.zeros((1, output_dim))
 
     def relu(self, z):
@@ -87,3 +89,152 @@ class SimpleMLP:
     def predict(self, X):
         probs = self.forward(X)
         return np.argmax(probs, axis=1)
+
+    def predict_proba(self, X):
+        return self.forward(X)
+
+
+def _l2_normalize(X):
+    X = np.asarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.maximum(norms, 1e-12)
+
+
+class PrototypeClassifier:
+    def __init__(self, temperature=0.05):
+        """
+        Nearest-centroid classifier over stored training embeddings.
+        Each family is represented by the mean of its (L2-normalized) vectors,
+        so adding sequences or whole new families only updates running sums.
+        Args:
+            temperature (float): Softmax temperature applied to cosine similarities.
+        """
+        self.temperature = temperature
+        self.sums = None
+        self.counts = None
+
+    @property
+    def classes_(self):
+        return np.arange(len(self.counts) if self.counts is not None else 0)
+
+    def fit(self, X, y):
+        self.sums = None
+        self.counts = None
+        return self.add(X, y)
+
+    def add(self, X, y):
+        """
+        Appends labelled vectors. Labels beyond the current class count grow the table.
+        """
+        X = _l2_normalize(X)
+        y = np.asarray(y, dtype=np.int64)
+        num_classes = int(y.max()) + 1 if y.size else 0
+        if self.sums is None:
+            self.sums = np.zeros((num_classes, X.shape[1]), dtype=np.float64)
+            self.counts = np.zeros(num_classes, dtype=np.int64)
+        elif num_classes > len(self.counts):
+            extra = num_classes - len(self.counts)
+            self.sums = np.vstack([self.sums, np.zeros((extra, self.sums.shape[1]))])
+            self.counts = np.concatenate([self.counts, np.zeros(extra, dtype=np.int64)])
+
+        np.add.at(self.sums, y, X)
+        self.counts += np.bincount(y, minlength=len(self.counts))
+        self._centroids = _l2_normalize(self.sums / np.maximum(self.counts, 1)[:, None])
+        return self
+
+    def predict_proba(self, X):
+        sims = _l2_normalize(X) @ self._centroids.T
+        # Families without any vectors can never be predicted
+        sims[:, self.counts == 0] = -np.inf
+        logits = sims / self.temperature
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return np.argmax(self.predict_proba(X), axis=1)
+
+
+class KNNClassifier:
+    def __init__(self, k=5, chunk_size=256):
+        """
+        k-nearest-neighbour vote over stored training embeddings (cosine similarity).
+        Args:
+            k (int): Number of neighbours that vote.
+            chunk_size (int): Queries scored per matrix multiply, bounds peak memory.
+        """
+        self.k = k
+        self.chunk_size = chunk_size
+        self.X = None
+        self.y = None
+        self.num_classes = 0
+
+    @property
+    def classes_(self):
+        return np.arange(self.num_classes)
+
+    def fit(self, X, y):
+        self.X = None
+        self.y = None
+        self.num_classes = 0
+        return self.add(X, y)
+
+    def add(self, X, y):
+        """
+        Appends labelled vectors to the reference set; no retraining needed.
+        """
+        X = _l2_normalize(X)
+        y = np.asarray(y, dtype=np.int64)
+        self.X = X if self.X is None else np.vstack([self.X, X])
+        self.y = y if self.y is None else np.concatenate([self.y, y])
+        self.num_classes = max(self.num_classes, int(y.max()) + 1 if y.size else 0)
+        return self
+
+    def predict_proba(self, X):
+        Q = _l2_normalize(X)
+        k = min(self.k, self.X.shape[0])
+        probs = np.zeros((Q.shape[0], self.num_classes), dtype=np.float32)
+
+        for start in range(0, Q.shape[0], self.chunk_size):
+            sims = Q[start:start + self.chunk_size] @ self.X.T
+            neighbours = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            votes = self.y[neighbours]
+            rows = np.repeat(np.arange(votes.shape[0]), k)
+            block = np.bincount(
+                rows * self.num_classes + votes.ravel(),
+                minlength=votes.shape[0] * self.num_classes
+            ).reshape(votes.shape[0], self.num_classes)
+            probs[start:start + self.chunk_size] = block / k
+
+        return probs
+
+    def predict(self, X):
+        return np.argmax(self.predict_proba(X), axis=1)
+
+
+CLASSIFIER_BACKENDS = {
+    'centroid': PrototypeClassifier,
+    'knn': KNNClassifier,
+}
+
+
+def build_classifier(backend, X, y, **kwargs):
+    """
+    Builds an embedding-store backed classifier ('centroid' or 'knn') from training vectors.
+    The returned object exposes predict / predict_proba like the sklearn MLP.
+    """
+    if backend not in CLASSIFIER_BACKENDS:
+        raise ValueError(f"Unknown classifier backend '{backend}'. Choose from {sorted(CLASSIFIER_BACKENDS)}.")
+    return CLASSIFIER_BACKENDS[backend](**kwargs).fit(X, y)
+
+
+def fit_classifier(backend, X, y, num_classes=None, k=5, seed=0):
+    """
+    Fits the classifier the offline reports compare: SimpleMLP ('mlp', initialised from
+    seed so repeated fits differ only in their data) or a build_classifier backend.
+    """
+    if backend == 'mlp':
+        num_classes = num_classes or int(np.max(y)) + 1
+        model = SimpleMLP(X.shape[1], 64, num_classes, learning_rate=0.1, seed=seed)
+        model.train(X, y, epochs=200)
+        return model
+    return build_classifier(backend, X, y, **({'k': k} if backend == 'knn' else {}))
@@ -1,14 +1,16 @@
 import os
+import string
 
-def load_fasta(file_path):
+import numpy as np
+
+def iter_fasta(file_path):
     """
-    Reads a FASTA file and returns a list of sequence records.
-    Each record is a tuple (header, sequence).
+    Streams (header, sequence) records from a FASTA file without holding the whole
+    file in memory.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    sequences = []
     current_header = None
     current_seq = []
 
@@ -19,34 +21,105 @@ def load_fasta(file_path):
                 continue
             if line.startswith(">"):
                 if current_header:
-                    sequences.append((current_header, "".join(current_seq)))
+                    yield current_header, "".join(current_seq)
                 current_header = line[1:]
                 current_seq = []
             else:
                 current_seq.append(line)
-        
-        # Add the last sequence
+
+        # Yield the last sequence
         if current_header:
-            sequences.append((current_header, "".join(current_seq)))
-            
-    return sequences
+            yield current_header, "".join(current_seq)
+
+def load_fasta(file_path):
+    """
+    Reads a FASTA file and returns a list of sequence records.
+    Each record is a tuple (header, sequence).
+    """
+    return list(iter_fasta(file_path))
+
+VALID_AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWXY"  # 20 standard residues plus X
+AMBIGUOUS_AMINO_ACIDS = "BZJOU"
+
+# Byte tables for normalize_sequence: upper-case, map ambiguous codes to X, drop whitespace
+_NORMALIZE_TABLE = bytes.maketrans(
+    (string.ascii_lowercase + AMBIGUOUS_AMINO_ACIDS + AMBIGUOUS_AMINO_ACIDS.lower()).encode(),
+    (string.ascii_uppercase + "X" * 2 * len(AMBIGUOUS_AMINO_ACIDS)).encode(),
+)
+_WHITESPACE = b" \t\r\n\v\f"
+_VALID_BYTES = VALID_AMINO_ACIDS.encode()
+_VALID_LUT = np.zeros(256, dtype=bool)
+_VALID_LUT[np.frombuffer(_VALID_BYTES, dtype=np.uint8)] = True
+
+
+def normalize_sequence(sequence, strip_headers=False):
+    """
+    Normalizes a raw protein sequence in a few C-level passes (bytes.translate):
+    upper-cases it, maps ambiguous codes (B, Z, J, O, U) to X and removes whitespace.
+    Args:
+        sequence (str): Raw sequence.
+        strip_headers (bool): Drop FASTA header lines (lines starting with '>') from pasted
+            FASTA text, and any remaining '>' characters.
+    Returns:
+        tuple: (cleaned, invalid_positions) - invalid_positions is a list of indices into
+            cleaned of characters outside VALID_AMINO_ACIDS (empty when valid).
+    """
+    delete = _WHITESPACE
+    if strip_headers and ">" in sequence:
+        if "\n" in sequence:
+            sequence = "\n".join(line for line in sequence.splitlines() if not line.lstrip().startswith(">"))
+        delete = _WHITESPACE + b">"  # A stray '>' on a single line is dropped, not reported
+
+    # One byte per character (non-ASCII becomes '?', which is invalid) keeps positions aligned
+    data = sequence.encode("ascii", "replace").translate(_NORMALIZE_TABLE, delete)
+    if not data.translate(None, _VALID_BYTES):
+        return data.decode("ascii"), []
+
+    positions = np.flatnonzero(~_VALID_LUT[np.frombuffer(data, dtype=np.uint8)]).tolist()
+    if sequence.isascii():
+        return data.decode("ascii"), positions
+    # Keep the original non-ASCII characters so errors can show them
+    cleaned = "".join(
+        c if ord(c) >= 128 else chr(b)
+        for c, b in zip(sequence.translate({c: None for c in delete}), data)
+    )
+    return cleaned, positions
+
+
+def check_sequence(raw_sequence, max_length=None):
+    """
+    The API's validation rules without the HTTP layer, shared with offline tools.
+    Returns (cleaned, error, invalid_positions); error is None when the sequence is valid.
+    invalid_positions are 1-based residue positions in the cleaned sequence, as in the error message.
+    """
+    if not raw_sequence:
+        return None, 'No sequence provided', []
+
+    cleaned, invalid_positions = normalize_sequence(raw_sequence, strip_headers=True)
+
+    if len(cleaned) == 0:
+        return None, 'Sequence is empty after cleaning', []
+
+    if max_length is not None and len(cleaned) > max_length:
+        return None, f'Sequence too long ({len(cleaned)} chars). Max is {max_length}.', []
+
+    if invalid_positions:
+        invalid_chars = sorted({cleaned[i] for i in invalid_positions})
+        positions = [i + 1 for i in invalid_positions]
+        shown = ', '.join(str(position) for position in positions[:10])
+        more = ', ...' if len(positions) > 10 else ''
+        return None, (f'Invalid characters in sequence: {invalid_chars} at positions {shown}{more}. '
+                      f'Only standard amino acid letters are allowed.'), positions
+
+    return cleaned, None, []
+
 
 def clean_sequence(sequence):
     """
     Replaces non-standard amino acids (B, Z, J, O, U) with 'X'.
-    And ensures the sequence is upper case.
-    """
-    sequence = sequence.upper()
-    # Replacements for common ambiguous codes
-    # B -> Asn or Asp -> X
-    # Z -> Gln or Glu -> X
-    # J -> Leu or Ile -> X
-    # O -> Pyrrolysine -> X
-    # U -> Selenocysteine -> X
-    
-    replacements = {'B': 'X', 'Z': 'X', 'J': 'X', 'O': 'X', 'U': 'X'}
-    cleaned_seq = "".join([replacements.get(aa, aa) for aa in sequence])
-    return cleaned_seq
+    And ensures the sequence is upper case (whitespace is removed).
+    """
+    return normalize_sequence(sequence)[0]
 
 def encode_labels(labels):
     """
@@ -0,0 +1,138 @@
+import numpy as np
+
+
+def exact_dedup(sequences):
+    """
+    Hash-based exact de-duplication.
+    Returns (unique_sequences, index_map) where unique_sequences keeps first-seen order and
+    sequences[i] == unique_sequences[index_map[i]], so per-unique results (e.g. embeddings)
+    fan back out to every record with results[index_map].
+    """
+    position = {}
+    index_map = np.empty(len(sequences), dtype=np.int64)
+    for i, seq in enumerate(sequences):
+        index_map[i] = position.setdefault(seq, len(position))
+    return list(position), index_map
+
+
+def _mix64(x):
+    """splitmix64 finalizer: a fast, well-distributed 64-bit hash of each element."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _kmer_codes(sequence, k):
+    """Each k-mer packed into one integer (5 bits per residue, so k <= 12)."""
+    residues = np.frombuffer(sequence.encode('ascii', 'replace'), dtype=np.uint8).astype(np.uint64) & np.uint64(31)
+    if len(residues) < k:
+        residues = np.pad(residues, (0, k - len(residues)))
+    n = len(residues) - k + 1
+    codes = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        codes = (codes << np.uint64(5)) | residues[j:j + n]
+    return np.unique(codes)
+
+
+def minhash_signatures(sequences, k=5, num_perm=64, seed=0):
+    """
+    MinHash signatures over each sequence's set of k-mers, shape (n, num_perm).
+    The fraction of equal positions between two rows estimates their k-mer Jaccard similarity.
+    """
+    if not 0 < k <= 12:
+        raise ValueError("k must be between 1 and 12")
+    salts = np.random.default_rng(seed).integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)[:, None]
+    signatures = np.empty((len(sequences), num_perm), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for i, seq in enumerate(sequences):
+            hashed = _mix64(_kmer_codes(seq, k))
+            signatures[i] = _mix64(hashed[None, :] ^ salts).min(axis=1)
+    return signatures
+
+
+def lsh_bands(num_perm, threshold):
+    """(bands, rows) with bands * rows == num_perm whose LSH S-curve midpoint is closest to threshold."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1.0 / br[0]) ** (1.0 / br[1]) - threshold))
+
+
+def near_duplicate_clusters(sequences, threshold=0.9, k=5, num_perm=64, seed=0):
+    """
+    Clusters sequences whose estimated k-mer Jaccard similarity is >= threshold, using
+    MinHash + banded LSH so only colliding candidate pairs are compared (no all-pairs pass).
+    Returns an int array of cluster ids (the smallest member index of each cluster).
+    """
+    n = len(sequences)
+    parent = np.arange(n)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    if n < 2:
+        return parent
+    signatures = minhash_signatures(sequences, k=k, num_perm=num_perm, seed=seed)
+    bands, rows = lsh_bands(num_perm, threshold)
+
+    for band in range(bands):
+        buckets = {}
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            buckets.setdefault(block[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b:
+                    continue
+                if np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return np.array([find(i) for i in range(n)])
+
+
+def dedup_sequences(sequences, near_threshold=None, k=5, num_perm=64):
+    """
+    Exact de-duplication plus optional near-duplicate grouping.
+    Returns (unique_sequences, index_map, groups):
+        unique_sequences / index_map as in exact_dedup;
+        groups[i] is a group id per record: records with identical sequences always share
+            one, and with near_threshold set so do near-duplicate clusters. Keep groups
+            together when splitting train/test to avoid leakage.
+    """
+    unique_sequences, index_map = exact_dedup(sequences)
+    if near_threshold is None:
+        return unique_sequences, index_map, index_map.copy()
+    clusters = near_duplicate_clusters(unique_sequences, threshold=near_threshold, k=k, num_perm=num_perm)
+    return unique_sequences, index_map, clusters[index_map]
+
+
+def group_train_test_split(groups, test_fraction=0.2, seed=None):
+    """
+    Random train/test split of record indices that never puts members of one group on
+    both sides. Returns (train_idx, test_idx).
+    """
+    groups = np.asarray(groups)
+    unique_groups = np.unique(groups)
+    rng = np.random.default_rng(seed)
+    rng.shuffle(unique_groups)
+    test_groups = unique_groups[:int(round(len(unique_groups) * test_fraction))]
+    is_test = np.isin(groups, test_groups)
+    return rng.permutation(np.flatnonzero(~is_test)), rng.permutation(np.flatnonzero(is_test))
+
+
+def train_test_indices(n, groups=None, test_fraction=0.2, seed=None):
+    """
+    The train/test split of n records used for training: group-aware when groups are
+    given, otherwise a shuffled split that keeps at least one test record. Deterministic
+    for a given seed. Returns (train_idx, test_idx).
+    """
+    if groups is not None:
+        return group_train_test_split(groups, test_fraction, seed)
+    order = np.random.default_rng(seed).permutation(n)
+    split = int(n * (1 - test_fraction))
+    if split == n and n > 1:
+        split -= 1
+    return order[:split], order[split:]
@@ -0,0 +1,194 @@
+import numpy as np
+
+DEFAULT_BLOCK_ROWS = 65536
+
+
+class Codec:
+    """Fixed-size vector encoding: fit() on sample vectors, then encode()/decode() row blocks."""
+    name = None
+
+    @property
+    def fitted(self):
+        return True
+
+    def fit(self, X):
+        return self
+
+    def encode(self, X):
+        raise NotImplementedError
+
+    def decode(self, codes):
+        raise NotImplementedError
+
+    def state(self):
+        """Arrays that, with the codec name, fully describe the fitted codec."""
+        return {}
+
+    def bytes_per_vector(self, dim):
+        raise NotImplementedError
+
+    def output_dim(self, width):
+        """Decoded dimension of codes that are width columns wide."""
+        return width
+
+
+class Float32Codec(Codec):
+    name = 'float32'
+
+    def encode(self, X):
+        return np.asarray(X, dtype=np.float32)
+
+    def decode(self, codes):
+        return np.asarray(codes, dtype=np.float32)
+
+    def bytes_per_vector(self, dim):
+        return 4 * dim
+
+
+class Float16Codec(Codec):
+    name = 'float16'
+
+    def encode(self, X):
+        return np.asarray(X, dtype=np.float16)
+
+    def decode(self, codes):
+        return np.asarray(codes, dtype=np.float32)
+
+    def bytes_per_vector(self, dim):
+        return 2 * dim
+
+
+class ScalarInt8Codec(Codec):
+    name = 'int8'
+
+    def __init__(self, low=None, scale=None):
+        """8-bit scalar quantization: each dimension's [min, max] from fit() maps onto 0..255."""
+        self.low = low
+        self.scale = scale
+
+    @property
+    def fitted(self):
+        return self.low is not None
+
+    def fit(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        self.low = X.min(axis=0)
+        self.scale = (X.max(axis=0) - self.low) / 255.0
+        self.scale[self.scale == 0] = 1.0
+        return self
+
+    def encode(self, X):
+        codes = np.rint((np.asarray(X, dtype=np.float32) - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scale + self.low
+
+    def state(self):
+        return {'low': self.low, 'scale': self.scale}
+
+    def bytes_per_vector(self, dim):
+        return dim
+
+
+class PQCodec(Codec):
+    name = 'pq'
+
+    def __init__(self, subspaces=16, centroids=256, sample_rows=65536, seed=0, codebooks=None):
+        """
+        Product quantization: each vector is split into `subspaces` equal chunks and every
+        chunk is stored as the uint8 index of its nearest k-means centroid, so a vector
+        costs `subspaces` bytes plus a shared codebook.
+        Args:
+            subspaces (int): Chunks per vector (must divide the dimension).
+            centroids (int): Codebook size per subspace (at most 256).
+            sample_rows (int): Rows sampled to train the codebooks.
+            seed (int): Sampling and k-means seed.
+            codebooks (np.ndarray): (subspaces, centroids, dim // subspaces), when already fitted.
+        """
+        if not 0 < centroids <= 256:
+            raise ValueError("centroids must be between 1 and 256")
+        self.subspaces = subspaces
+        self.centroids = centroids
+        self.sample_rows = sample_rows
+        self.seed = seed
+        self.codebooks = codebooks
+
+    @property
+    def fitted(self):
+        return self.codebooks is not None
+
+    def fit(self, X):
+        from sklearn.cluster import KMeans
+
+        X = np.asarray(X, dtype=np.float32)
+        n, dim = X.shape
+        if dim % self.subspaces:
+            raise ValueError(f"{self.subspaces} subspaces do not divide dimension {dim}")
+        rng = np.random.default_rng(self.seed)
+        if n > self.sample_rows:
+            X = X[np.sort(rng.choice(n, self.sample_rows, replace=False))]
+        k = min(self.centroids, len(X))
+        sub = X.reshape(len(X), self.subspaces, -1)
+        self.codebooks = np.stack([
+            KMeans(n_clusters=k, n_init=1, max_iter=50, random_state=self.seed).fit(sub[:, s]).cluster_centers_
+            for s in range(self.subspaces)
+        ]).astype(np.float32)
+        return self
+
+    def encode(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        sub = X.reshape(len(X), self.subspaces, -1)
+        codes = np.empty((len(X), self.subspaces), dtype=np.uint8)
+        norms = (self.codebooks ** 2).sum(axis=2)  # (subspaces, k)
+        for s in range(self.subspaces):
+            # argmin ||x - c||^2 = argmin ||c||^2 - 2 x.c
+            codes[:, s] = np.argmin(norms[s] - 2.0 * sub[:, s] @ self.codebooks[s].T, axis=1)
+        return codes
+
+    def decode(self, codes):
+        # (n, subspaces) codes gather (n, subspaces, dsub) centroids in one indexing operation
+        return self.codebooks[np.arange(self.subspaces), codes.astype(np.intp)].reshape(len(codes), -1)
+
+    def state(self):
+        return {'codebooks': self.codebooks}
+
+    def bytes_per_vector(self, dim):
+        return self.subspaces
+
+    def output_dim(self, width):
+        return self.codebooks.shape[0] * self.codebooks.shape[2]
+
+
+def make_codec(encoding):
+    """Codec for an encoding name: float32, float16, int8 or pq<subspaces> (e.g. pq16)."""
+    if encoding == 'float32':
+        return Float32Codec()
+    if encoding == 'float16':
+        return Float16Codec()
+    if encoding == 'int8':
+        return ScalarInt8Codec()
+    if encoding.startswith('pq') and encoding[2:].isdigit():
+        return PQCodec(subspaces=int(encoding[2:]))
+    raise ValueError(f"Unknown encoding '{encoding}'. Use float32, float16, int8 or pq<subspaces>.")
+
+
+def codec_from_state(encoding, state):
+    """Rebuilds a fitted codec from its name and state() arrays."""
+    codec = make_codec(encoding)
+    if isinstance(codec, ScalarInt8Codec):
+        codec.low, codec.scale = state['low'], state['scale']
+    elif isinstance(codec, PQCodec):
+        codec.codebooks = state['codebooks']
+        codec.centroids = codec.codebooks.shape[1]
+    return codec
+
+
+def decode_blocks(codec, codes, rows=None, block_rows=DEFAULT_BLOCK_ROWS):
+    """Decodes codes (optionally only rows) to float32 one block at a time."""
+    if rows is not None:
+        codes = codes[rows]
+    out = np.empty((len(codes), codec.output_dim(codes.shape[1])), dtype=np.float32)
+    for start in range(0, len(codes), block_rows):
+        out[start:start + block_rows] = codec.decode(np.asarray(codes[start:start + block_rows]))
+    return out
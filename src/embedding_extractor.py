@@ -1,50 +1,260 @@
+import os
+import threading
+import time
 import numpy as np
 import torch
 from transformers import AutoTokenizer, AutoModel
+from src.autotune import load_profile
+from src.fast_tokenizer import ByteTokenizer
+from src.profiling import torch_trace
+
+MAX_LENGTH = 512  # Tokens per forward pass, including <cls> and <eos>
+PAD_BUCKET = 32  # Masked-pooling and window batches are padded to a multiple of this many tokens
+DEFAULT_BATCH_SIZE = 8
+
+
+def window_spans(length, window, stride):
+    """
+    (start, end) residue spans of overlapping windows covering a sequence of `length`.
+    The last window is aligned to the end of the sequence so every window is full length.
+    """
+    if length <= window:
+        return [(0, length)]
+    starts = list(range(0, length - window + 1, stride))
+    if starts[-1] + window < length:
+        starts.append(length - window)
+    return [(start, start + window) for start in starts]
+
 
 class EmbeddingExtractor:
-    def __init__(self, model_name="facebook/esm2_t6_8M_UR50D", device=None):
+    def __init__(self, model_name="facebook/esm2_t6_8M_UR50D", device=None, window=None, stride=None,
+                 fast_tokenizer=True, pooling='mean', tuning='auto'):
         """
         Initializes the ESM-2 embedding extractor.
         Uses CPU-only torch for lightweight local inference.
         Args:
             model_name (str): HuggingFace model name.
             device (str): Device to use (defaults to CPU).
+            window (int): Enables long-sequence mode: sequences are split into overlapping
+                windows of this many residues (at most MAX_LENGTH - 2) instead of being
+                truncated. None keeps the original truncate-at-512-tokens behaviour.
+            stride (int): Residues between window starts (defaults to window // 2).
+            fast_tokenizer (bool): Tokenize with the numpy lookup-table ByteTokenizer when it
+                reproduces the checkpoint's tokenizer; batches it cannot encode fall back to HF.
+            pooling (str): 'mean' averages every position of the padded batch (the original
+                behaviour, so a sequence's embedding depends on its batch-mates); 'masked_mean'
+                averages only real tokens, which matches 'mean' on a batch of one and lets
+                long and short sequences share a batch without changing results.
+            tuning: 'auto' loads this host's saved TuningProfile for model_name (see
+                scripts/autotune.py), None disables it, or pass a TuningProfile. With masked
+                pooling, get_embeddings() without a batch_size then batches by its token budgets.
         """
+        if pooling not in ('mean', 'masked_mean'):
+            raise ValueError("pooling must be 'mean' or 'masked_mean'")
+        self.pooling = pooling
+        if window is not None and not 0 < window <= MAX_LENGTH - 2:
+            raise ValueError(f"window must be between 1 and {MAX_LENGTH - 2} residues")
+        self.window = window
+        self.stride = stride or (window // 2 if window else None)
+        if self.stride is not None and self.stride <= 0:
+            raise ValueError("stride must be positive")
         print(f"Loading ESM-2 model: {model_name}...")
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.fast_tokenizer = ByteTokenizer.from_hf(self.tokenizer, MAX_LENGTH) if fast_tokenizer else None
         self.model = AutoModel.from_pretrained(model_name).to(self.device)
         self.model.eval()
         self.hidden_dim = self.model.config.hidden_size  # 320 for t6_8M
+        self.tuning = load_profile(model_name) if tuning == 'auto' else tuning
+        # When set, every get_embeddings call writes a torch profiler Chrome trace here
+        self.trace_dir = None
+        self._trace_lock = threading.Lock()  # torch allows one active profiler at a time
         print(f"ESM-2 loaded on {self.device} (hidden_dim={self.hidden_dim})")
 
-    def get_embeddings(self, sequences, batch_size=8):
+    def get_embeddings(self, sequences, batch_size=None, timings=None, layers=None, return_residues=False):
         """
         Generates real ESM-2 embeddings for a list of protein sequences.
+        In long-sequence mode (window set) windows from all sequences are batched together
+        and each sequence's embedding is the length-weighted mean of its window embeddings.
         Args:
             sequences (list): List of protein sequence strings.
-            batch_size (int): Batch size for processing.
+            batch_size (int): Batch size for processing. None uses the tuned token budgets
+                when a tuning profile is loaded and pooling is masked, otherwise 8.
+            timings (dict): Optional; seconds spent in 'tokenize' and 'forward' are added to it.
+            layers (list): Optional layers to pool, all from the same forward pass: ints index
+                hidden_states (0 = token embeddings, -1 = last layer) and 'avg' is the uniform
+                mean of every transformer layer's pooled output (for learned per-layer
+                weights see scripts.fit_layer_mix).
+            return_residues (bool): Also return the last layer's per-residue states (special
+                tokens dropped). Without a window, residues past MAX_LENGTH - 2 are truncated;
+                in window mode each residue averages the windows that cover it.
         Returns:
-            numpy.ndarray: Array of shape (num_sequences, hidden_dim).
+            numpy.ndarray: Array of shape (num_sequences, hidden_dim); with layers, a dict
+            {feature name: array} keyed by layer_feature_names(layers). With return_residues,
+            a (pooled, residues) tuple where residues is a list of (length, hidden_dim) arrays.
+        """
+        specs = self.resolve_layers(layers) if layers is not None else None
+        trace_dir = self.trace_dir
+        if trace_dir and self._trace_lock.acquire(blocking=False):
+            try:
+                path = os.path.join(trace_dir, f"get_embeddings-{time.time_ns()}.json")
+                with torch_trace(path):
+                    outputs, residues = self._embed(sequences, batch_size, timings, specs, return_residues)
+            finally:
+                self._trace_lock.release()
+        else:
+            outputs, residues = self._embed(sequences, batch_size, timings, specs, return_residues)
+        pooled = outputs[0] if specs is None else {name: output for (name, _), output in zip(specs, outputs)}
+        return (pooled, residues) if return_residues else pooled
+
+    def resolve_layers(self, layers):
+        """[(feature name, hidden_states index or 'avg')] with negative indices made absolute."""
+        num_layers = self.model.config.num_hidden_layers
+        specs = []
+        for layer in layers:
+            if layer == 'avg':
+                specs.append(('layer_avg', 'avg'))
+                continue
+            index = int(layer)
+            index = index + num_layers + 1 if index < 0 else index
+            if not 0 <= index <= num_layers:
+                raise ValueError(f"layer {layer} out of range for a {num_layers}-layer model")
+            specs.append((f'layer_{index}', index))
+        return specs
+
+    def layer_feature_names(self, layers):
+        return [name for name, _ in self.resolve_layers(layers)]
+
+    def _tokenize(self, batch, pad_to_multiple_of=None):
+        if self.fast_tokenizer is not None:
+            inputs = self.fast_tokenizer(batch, max_length=MAX_LENGTH, pad_to_multiple_of=pad_to_multiple_of)
+            if inputs is not None:
+                return inputs
+        return self.tokenizer(
+            batch,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=MAX_LENGTH,
+            pad_to_multiple_of=pad_to_multiple_of
+        )
+
+    @staticmethod
+    def _masked_mean(hidden, attention_mask):
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        return (hidden * mask).sum(dim=1) / mask.sum(dim=1)
+
+    def _pooled(self, inputs, specs, masked):
+        """
+        One forward pass; returns the pooled (batch, hidden_dim) tensor for each spec and
+        the last layer's hidden states.
         """
-        all_embeddings = []
+        if masked:
+            pool = lambda hidden: self._masked_mean(hidden, inputs["attention_mask"])
+        else:
+            # Mean pooling over sequence length
+            pool = lambda hidden: hidden.mean(dim=1)
+        if specs is None:
+            last = self.model(**inputs).last_hidden_state
+            return [pool(last)], last
+
+        states = self.model(**inputs, output_hidden_states=True).hidden_states
+        pooled = []
+        for _, index in specs:
+            if index == 'avg':
+                pooled.append(torch.stack([pool(hidden) for hidden in states[1:]]).mean(dim=0))
+            else:
+                pooled.append(pool(states[index]))
+        return pooled, states[-1]
+
+    @staticmethod
+    def _residue_states(last, attention_mask):
+        """Per-row residue states as numpy arrays, without <cls>, <eos> and padding."""
+        lengths = attention_mask.sum(dim=1).tolist()
+        last = last.cpu().numpy()
+        return [last[row, 1:length - 1] for row, length in enumerate(lengths)]
+
+    def _batches(self, lengths, batch_size, masked, sort=False):
+        """Index lists to embed together: the tuned token budgets, or fixed-size batches."""
+        if batch_size is None and masked and self.tuning is not None:
+            return self.tuning.plan_batches(lengths, PAD_BUCKET)
+        batch_size = batch_size or DEFAULT_BATCH_SIZE
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i]) if sort else list(range(len(lengths)))
+        return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+    def _embed(self, sequences, batch_size, timings, specs=None, return_residues=False):
+        if self.window is not None:
+            return self._embed_windows(sequences, batch_size, timings, specs, return_residues)
+        masked = self.pooling == 'masked_mean'
+        all_embeddings = [np.zeros((len(sequences), self.hidden_dim), dtype=np.float32) for _ in (specs or [None])]
+        residues = [None] * len(sequences) if return_residues else None
+
+        with torch.no_grad():
+            for batch_idx in self._batches([min(len(seq), MAX_LENGTH - 2) for seq in sequences], batch_size, masked):
+                batch = [sequences[j] for j in batch_idx]
+                start = time.perf_counter()
+                inputs = self._tokenize(batch, pad_to_multiple_of=PAD_BUCKET if masked else None)
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                tokenized = time.perf_counter()
+
+                pooled, last = self._pooled(inputs, specs, masked)
+                for output, batch_emb in zip(all_embeddings, pooled):
+                    output[batch_idx] = batch_emb.cpu().numpy()
+                if residues is not None:
+                    for j, states in zip(batch_idx, self._residue_states(last, inputs["attention_mask"])):
+                        residues[j] = states
+
+                if timings is not None:
+                    timings['tokenize'] = timings.get('tokenize', 0.0) + tokenized - start
+                    timings['forward'] = timings.get('forward', 0.0) + time.perf_counter() - tokenized
+
+        return all_embeddings, residues
+
+    def _embed_windows(self, sequences, batch_size, timings, specs=None, return_residues=False):
+        owners, chunks, weights, starts = [], [], [], []
+        for index, seq in enumerate(sequences):
+            for start, end in window_spans(len(seq), self.window, self.stride):
+                owners.append(index)
+                chunks.append(seq[start:end])
+                weights.append(end - start)
+                starts.append(start)
+        if return_residues:
+            # Overlapping windows are averaged per residue
+            residue_sums = [np.zeros((len(seq), self.hidden_dim), dtype=np.float32) for seq in sequences]
+            residue_counts = [np.zeros((len(seq), 1), dtype=np.float32) for seq in sequences]
+
+        # Length-sorted batches keep padding small; masked pooling makes the result
+        # independent of how windows are grouped.
+        window_embs = [np.zeros((len(chunks), self.hidden_dim), dtype=np.float32) for _ in (specs or [None])]
 
         with torch.no_grad():
-            for i in range(0, len(sequences), batch_size):
-                batch = sequences[i:i + batch_size]
-                inputs = self.tokenizer(
-                    batch,
-                    return_tensors="pt",
-                    padding=True,
-                    truncation=True,
-                    max_length=512
-                )
+            for batch_idx in self._batches([len(chunk) for chunk in chunks], batch_size, masked=True, sort=True):
+                start = time.perf_counter()
+                # Padding is masked out of the pooling here, so bucketed widths are safe
+                inputs = self._tokenize([chunks[j] for j in batch_idx], pad_to_multiple_of=PAD_BUCKET)
                 inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                tokenized = time.perf_counter()
+
+                pooled, last = self._pooled(inputs, specs, masked=True)
+                for window_emb, batch_emb in zip(window_embs, pooled):
+                    window_emb[batch_idx] = batch_emb.cpu().numpy()
+                if return_residues:
+                    for j, states in zip(batch_idx, self._residue_states(last, inputs["attention_mask"])):
+                        span = slice(starts[j], starts[j] + len(states))
+                        residue_sums[owners[j]][span] += states
+                        residue_counts[owners[j]][span] += 1
 
-                outputs = self.model(**inputs)
-                # Mean pooling over sequence length
-                batch_emb = outputs.last_hidden_state.mean(dim=1)
-                all_embeddings.append(batch_emb.cpu().numpy())
+                if timings is not None:
+                    timings['tokenize'] = timings.get('tokenize', 0.0) + tokenized - start
+                    timings['forward'] = timings.get('forward', 0.0) + time.perf_counter() - tokenized
 
-        return np.concatenate(all_embeddings, axis=0).astype(np.float32)
+        weights = np.asarray(weights, dtype=np.float32)
+        owners = np.asarray(owners)
+        totals = np.bincount(owners, weights=weights, minlength=len(sequences))[:, None].astype(np.float32)
+        results = []
+        for window_emb in window_embs:
+            embeddings = np.zeros((len(sequences), self.hidden_dim), dtype=np.float32)
+            np.add.at(embeddings, owners, window_emb * weights[:, None])
+            results.append(embeddings / totals)
+        residues = [total / count for total, count in zip(residue_sums, residue_counts)] if return_residues else None
+        return results, residues
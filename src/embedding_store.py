@@ -0,0 +1,345 @@
+import io
+import json
+import os
+
+import numpy as np
+
+from src.embedding_codecs import DEFAULT_BLOCK_ROWS, codec_from_state, decode_blocks, make_codec
+
+META_FILE = 'store.json'
+# Virtual feature: learned weighted average of stored layers (see read())
+LAYER_MIX = 'layer_mix'
+
+
+class EmbeddingStore:
+    def __init__(self, root):
+        """
+        Directory of row-aligned feature matrices: <root>/<feature>.npy, one row per record,
+        plus store.json describing them. Several features of the same records (for example
+        pooled outputs of different ESM-2 layers) live side by side, so trying another one
+        is a file read instead of a re-embedding run. Matrices are memory-mapped on read.
+        Features can be re-encoded (float16, int8, product quantization) with encode();
+        read() always returns float32. Use EmbeddingStore.create() to write a new store.
+        """
+        self.root = root
+        with open(os.path.join(root, META_FILE)) as f:
+            self.meta = json.load(f)
+        self._arrays = {}
+        self._codecs = {}
+
+    @classmethod
+    def create(cls, root, rows, features, attrs=None, dtype='float32'):
+        """
+        Allocates a store for rows records and returns it open for write_rows().
+        Args:
+            root (str): Store directory (created; existing features are replaced).
+            rows (int): Number of records.
+            features (dict): Feature name -> dimension.
+            attrs (dict): JSON-serializable provenance (model, pooling, layers, ...).
+            dtype (str): Storage dtype.
+        """
+        os.makedirs(root, exist_ok=True)
+        meta = {
+            'rows': int(rows),
+            'features': {name: {'dim': int(dim), 'dtype': dtype, 'file': f'{name}.npy'}
+                         for name, dim in features.items()},
+            'attrs': attrs or {},
+        }
+        store = cls.__new__(cls)
+        store.root, store.meta, store._arrays, store._codecs = root, meta, {}, {}
+        for name, info in meta['features'].items():
+            store._arrays[name] = np.lib.format.open_memmap(
+                os.path.join(root, info['file']), mode='w+', dtype=dtype, shape=(meta['rows'], info['dim']))
+        store._write_meta()
+        return store
+
+    def _write_meta(self):
+        tmp = os.path.join(self.root, f'{META_FILE}.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.root, META_FILE))
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    @property
+    def features(self):
+        return list(self.meta['features'])
+
+    @property
+    def attrs(self):
+        return self.meta['attrs']
+
+    def update_attrs(self, **attrs):
+        self.meta['attrs'].update(attrs)
+        self._write_meta()
+
+    def write_rows(self, start, block):
+        """
+        Writes {feature: (n, dim) array} into rows start..start+n-1 of every feature given,
+        encoding them with the feature's fitted codec if it is not stored as float32 (the
+        codec is not refitted: int8 values outside its range clip, PQ maps to existing centroids).
+        """
+        for name, values in block.items():
+            if self.encoding(name) != 'float32':
+                values = self._codec(name).encode(values)
+            self._writable(name)[start:start + len(values)] = values
+
+    def _writable(self, name):
+        array = self._arrays.get(name)
+        if array is None or not array.flags.writeable:
+            path = os.path.join(self.root, self._info(name)['file'])
+            array = self._arrays[name] = np.load(path, mmap_mode='r+')
+        return array
+
+    def grow(self, rows):
+        """
+        Extends every feature to rows rows in place (new rows are zero until written).
+        The .npy headers are rewritten in their padded space, so no existing data is copied.
+        """
+        self.flush()
+        for name in self.features:
+            self._arrays.pop(name, None)
+            with open(os.path.join(self.root, self._info(name)['file']), 'r+b') as f:
+                version = np.lib.format.read_magic(f)
+                read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else \
+                    np.lib.format.read_array_header_2_0
+                shape, _, dtype = read_header(f)
+                data_start = f.tell()
+                header = io.BytesIO()
+                write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else \
+                    np.lib.format.write_array_header_2_0
+                write_header(header, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                                      'shape': (int(rows), shape[1])})
+                if len(header.getvalue()) != data_start:
+                    raise RuntimeError(f"cannot grow {name} in place: header size changed")
+                f.seek(0)
+                f.write(header.getvalue())
+                f.truncate(data_start + int(rows) * shape[1] * dtype.itemsize)
+        self.meta['rows'] = int(rows)
+        self._write_meta()
+
+    def compact(self, keep, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        Rewrites every feature with only the rows in keep (ascending), which become rows
+        0..len(keep)-1. Stored codes are copied as is; nothing is decoded or re-encoded.
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        for name in self.features:
+            source = self.raw(name)
+            path = os.path.join(self.root, self._info(name)['file'])
+            target = np.lib.format.open_memmap(path + '.tmp', mode='w+', dtype=source.dtype,
+                                               shape=(len(keep), source.shape[1]))
+            for start in range(0, len(keep), block_rows):
+                target[start:start + block_rows] = source[keep[start:start + block_rows]]
+            target.flush()
+            del target, source
+            self._arrays.pop(name, None)
+            os.replace(path + '.tmp', path)
+        self.meta['rows'] = len(keep)
+        self._write_meta()
+
+    def flush(self):
+        for array in self._arrays.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def encoding(self, name):
+        info = self._info(name)
+        return info.get('encoding', info['dtype'])
+
+    def _info(self, name):
+        if name not in self.meta['features']:
+            raise KeyError(f"Unknown feature '{name}'. Stored: {self.features}")
+        return self.meta['features'][name]
+
+    def _codec(self, name):
+        if name not in self._codecs:
+            info = self._info(name)
+            state = {}
+            if info.get('codec_file'):
+                with np.load(os.path.join(self.root, info['codec_file'])) as data:
+                    state = dict(data)
+            self._codecs[name] = codec_from_state(self.encoding(name), state)
+        return self._codecs[name]
+
+    def raw(self, name):
+        """A feature's stored matrix (memory-mapped, still encoded: float16 values, uint8 codes, ...)."""
+        if name not in self._arrays:
+            path = os.path.join(self.root, self._info(name)['file'])
+            self._arrays[name] = np.load(path, mmap_mode='r')
+        return self._arrays[name]
+
+    def read(self, name, rows=None, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        A feature matrix as float32: the memory-mapped file itself for float32 features,
+        otherwise rows (default all) decoded block by block into an in-memory array.
+        'layer_mix' (when not stored) is the layer mix fitted by scripts.fit_layer_mix,
+        computed from the stored layers with the weights saved in attrs['layer_mix'].
+        """
+        if name == LAYER_MIX and name not in self.meta['features'] and LAYER_MIX in self.attrs:
+            mix = self.attrs[LAYER_MIX]
+            values = self.layer_average(mix['layers'], mix['weights'], block_rows)
+            return values if rows is None else values[rows]
+        array = self.raw(name)
+        if self.encoding(name) == 'float32':
+            return array if rows is None else np.asarray(array[rows])
+        return decode_blocks(self._codec(name), array, rows=rows, block_rows=block_rows)
+
+    def encode(self, name, encoding, codec=None, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        Re-encodes a stored feature in place, e.g. 'float16' (half the size), 'int8'
+        (a quarter) or 'pq16' (16 bytes per vector plus codebooks). The codec is fitted
+        on the stored values unless an already fitted one is given (to share codebooks
+        between stores). Returns the codec.
+        """
+        codec = codec or make_codec(encoding)
+        if not codec.fitted:
+            codec.fit(self.read(name))
+        old_file = self._info(name)['file']
+        source = self.raw(name)
+        file = f'{name}.{encoding}.npy'
+        first = codec.encode(self.read(name, rows=slice(0, 1)))
+        codes = np.lib.format.open_memmap(os.path.join(self.root, file + '.tmp'), mode='w+',
+                                          dtype=first.dtype, shape=(self.rows, first.shape[1]))
+        old_codec = self._codec(name)
+        for start in range(0, self.rows, block_rows):
+            block = old_codec.decode(np.asarray(source[start:start + block_rows]))
+            codes[start:start + len(block)] = codec.encode(block)
+        codes.flush()
+        del codes
+        self._arrays.pop(name, None)
+        os.replace(os.path.join(self.root, file + '.tmp'), os.path.join(self.root, file))
+        info = self.meta['features'][name]
+        info.update(file=file, dtype=str(first.dtype), encoding=encoding, codec_file=None)
+        state = codec.state()
+        if state:
+            info['codec_file'] = f'{name}.{encoding}.codec.npz'
+            np.savez(os.path.join(self.root, info['codec_file']), **state)
+        self._write_meta()
+        self._codecs[name] = codec
+        if old_file != file:
+            os.remove(os.path.join(self.root, old_file))
+        return codec
+
+    def nbytes(self, name):
+        """Bytes a feature occupies on disk, including its codebook."""
+        info = self._info(name)
+        files = [info['file']] + ([info['codec_file']] if info.get('codec_file') else [])
+        return sum(os.path.getsize(os.path.join(self.root, file)) for file in files)
+
+    def layer_average(self, names, weights=None, block_rows=DEFAULT_BLOCK_ROWS):
+        """
+        Weighted average of several stored features (e.g. a scalar mix of layers fitted
+        offline), computed in row blocks. weights default to uniform and are normalized.
+        """
+        weights = np.ones(len(names)) if weights is None else np.asarray(weights, dtype=np.float64)
+        weights = (weights / weights.sum()).astype(np.float32)
+        out = np.empty((self.rows, self._info(names[0])['dim']), dtype=np.float32)
+        for start in range(0, self.rows, block_rows):
+            end = min(start + block_rows, self.rows)
+            out[start:end] = sum(w * self.read(name, rows=slice(start, end)) for w, name in zip(weights, names))
+        return out
+
+
+RAGGED_META_FILE = 'ragged.json'
+RAGGED_DTYPES = ('float16', 'int8')
+
+
+class RaggedStore:
+    def __init__(self, root):
+        """
+        Variable-length per-record matrices (e.g. per-residue ESM-2 states) stored as one
+        concatenated (total_rows, dim) matrix plus an offsets array, so record i is the
+        O(1) slice values[offsets[i]:offsets[i + 1]] with no padding on disk.
+        values are float16, or int8 with one float32 scale per row (symmetric quantization).
+        Everything is memory-mapped; use RaggedStore.create() to write a new store.
+        """
+        self.root = root
+        with open(os.path.join(root, RAGGED_META_FILE)) as f:
+            self.meta = json.load(f)
+        self.dim = self.meta['dim']
+        self.dtype = self.meta['dtype']
+        self.offsets = np.load(os.path.join(root, 'offsets.npy'), mmap_mode='r')
+        total = int(self.offsets[-1])
+        self.values = np.memmap(os.path.join(root, 'values.bin'), dtype=self.dtype, mode='r',
+                                shape=(total, self.dim)) if total else np.zeros((0, self.dim), dtype=self.dtype)
+        self.scales = np.memmap(os.path.join(root, 'scales.bin'), dtype=np.float32, mode='r',
+                                shape=(total,)) if self.dtype == 'int8' and total else None
+        index_path = os.path.join(root, 'index.npy')
+        self.index = np.load(index_path, mmap_mode='r') if os.path.exists(index_path) else None
+
+    @classmethod
+    def create(cls, root, dim, dtype='float16'):
+        """Returns a RaggedWriter; call append() per record, then close()."""
+        if dtype not in RAGGED_DTYPES:
+            raise ValueError(f"dtype must be one of {RAGGED_DTYPES}")
+        return RaggedWriter(root, dim, dtype)
+
+    def __len__(self):
+        return len(self.index) if self.index is not None else len(self.offsets) - 1
+
+    def _row(self, i):
+        return int(self.index[i]) if self.index is not None else i
+
+    def lengths(self):
+        lengths = np.diff(self.offsets)
+        return lengths[self.index] if self.index is not None else lengths
+
+    def raw(self, i):
+        """Record i's stored values (memory-mapped, still encoded)."""
+        row = self._row(i)
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+    def __getitem__(self, i):
+        """Record i decoded to a float32 (length, dim) array."""
+        row = self._row(i)
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        values = np.asarray(self.values[start:end], dtype=np.float32)
+        if self.scales is not None:
+            values *= np.asarray(self.scales[start:end])[:, None]
+        return values
+
+
+class RaggedWriter:
+    def __init__(self, root, dim, dtype):
+        """Streams records into a RaggedStore directory; nothing is padded or held in memory."""
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.dim = dim
+        self.dtype = dtype
+        self._values = open(os.path.join(root, 'values.bin'), 'wb')
+        self._scales = open(os.path.join(root, 'scales.bin'), 'wb') if dtype == 'int8' else None
+        self._offsets = [0]
+
+    def append(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32).reshape(-1, self.dim)
+        if self.dtype == 'int8':
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+            self._values.write(codes.tobytes())
+            self._scales.write(scales.astype(np.float32).tobytes())
+        else:
+            self._values.write(matrix.astype(np.float16).tobytes())
+        self._offsets.append(self._offsets[-1] + len(matrix))
+
+    def close(self, index=None, attrs=None):
+        """
+        Finishes the store. index optionally maps record -> stored row, so duplicate records
+        can share one stored matrix. Returns the opened RaggedStore.
+        """
+        self._values.close()
+        if self._scales is not None:
+            self._scales.close()
+        np.save(os.path.join(self.root, 'offsets.npy'), np.asarray(self._offsets, dtype=np.int64))
+        index_path = os.path.join(self.root, 'index.npy')
+        if index is not None:
+            np.save(index_path, np.asarray(index, dtype=np.int64))
+        elif os.path.exists(index_path):
+            os.remove(index_path)
+        meta = {'dim': int(self.dim), 'dtype': self.dtype, 'rows': len(self._offsets) - 1, 'attrs': attrs or {}}
+        with open(os.path.join(self.root, RAGGED_META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+        return RaggedStore(self.root)
@@ -0,0 +1,162 @@
+import csv
+import json
+
+import numpy as np
+
+
+def stratified_kfold(y, k=5, seed=0):
+    """
+    Stratified k-fold splits as [(train_idx, test_idx)]: every class's records are shuffled
+    and dealt round-robin over the folds (starting at a random fold per class, so rare
+    classes do not all land in fold 0). Deterministic for a given seed.
+    """
+    y = np.asarray(y)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(y))
+    order = order[np.argsort(y[order], kind='stable')]  # Grouped by class, shuffled within
+    classes, starts, counts = np.unique(y[order], return_index=True, return_counts=True)
+    rank = np.arange(len(y)) - np.repeat(starts, counts)
+    offsets = np.repeat(rng.integers(0, k, size=len(classes)), counts)
+    folds = np.empty(len(y), dtype=np.int64)
+    folds[order] = (rank + offsets) % k
+    return [(np.flatnonzero(folds != fold), np.flatnonzero(folds == fold)) for fold in range(k)]
+
+
+def per_class_metrics(confusion):
+    """Precision, recall, F1 and support per class from a (true, predicted) count matrix."""
+    tp = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1).astype(np.float64)
+    predicted = confusion.sum(axis=0).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return precision, recall, f1, support.astype(np.int64)
+
+
+def top_confusions(confusion, n=20):
+    """The n largest off-diagonal cells as [(true, predicted, count)], largest first."""
+    off = confusion.copy()
+    np.fill_diagonal(off, 0)
+    true, pred = np.nonzero(off)
+    counts = off[true, pred]
+    order = np.lexsort((pred, true, -counts))[:n]
+    return [(int(true[i]), int(pred[i]), int(counts[i])) for i in order]
+
+
+class Evaluation:
+    def __init__(self, num_classes, top_k=(1, 5), bins=15):
+        """
+        Streaming classification metrics over chunks of stored predicted probabilities.
+        update() folds each chunk into a confusion matrix (one np.bincount), top-k hit
+        counts and confidence-calibration bins, so memory stays O(num_classes^2)
+        whatever the number of records.
+        Args:
+            num_classes (int): Label ids are 0..num_classes-1.
+            top_k (tuple): k values for top-k accuracy.
+            bins (int): Equal-width confidence bins for calibration / ECE.
+        """
+        self.num_classes = num_classes
+        self.top_k = tuple(top_k)
+        self.bins = bins
+        self.confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self.top_k_hits = np.zeros(len(self.top_k), dtype=np.int64)
+        self.bin_count = np.zeros(bins, dtype=np.int64)
+        self.bin_confidence = np.zeros(bins)
+        self.bin_correct = np.zeros(bins)
+
+    @property
+    def n(self):
+        return int(self.confusion.sum())
+
+    def update(self, y_true, proba, classes=None):
+        """
+        Adds one chunk. proba is (n, len(classes)); classes maps its columns to label ids
+        (a classifier's classes_, default 0..num_classes-1).
+        """
+        y_true = np.asarray(y_true, dtype=np.int64)
+        proba = np.asarray(proba, dtype=np.float64)
+        classes = np.arange(proba.shape[1]) if classes is None else np.asarray(classes, dtype=np.int64)
+        columns = np.argmax(proba, axis=1)
+        y_pred = classes[columns]
+        self.confusion += np.bincount(y_true * self.num_classes + y_pred,
+                                      minlength=self.num_classes ** 2).reshape(self.num_classes, -1)
+
+        # Column of each true label (-1 when the classifier never saw that class)
+        lookup = np.full(self.num_classes, -1, dtype=np.int64)
+        lookup[classes] = np.arange(len(classes))
+        true_column = lookup[y_true]
+        true_proba = np.where(true_column >= 0, proba[np.arange(len(proba)), np.maximum(true_column, 0)], -np.inf)
+        # Top-k hit: fewer than k columns score strictly higher than the true one
+        rank = (proba > true_proba[:, None]).sum(axis=1)
+        self.top_k_hits += np.array([np.count_nonzero((rank < k) & (true_column >= 0)) for k in self.top_k])
+
+        confidence = proba[np.arange(len(proba)), columns]
+        bin_idx = np.minimum((confidence * self.bins).astype(np.int64), self.bins - 1)
+        self.bin_count += np.bincount(bin_idx, minlength=self.bins)
+        self.bin_confidence += np.bincount(bin_idx, weights=confidence, minlength=self.bins)
+        self.bin_correct += np.bincount(bin_idx, weights=(y_pred == y_true), minlength=self.bins)
+
+    def merge(self, other):
+        """Adds another Evaluation's counts (e.g. the next cross-validation fold)."""
+        self.confusion += other.confusion
+        self.top_k_hits += other.top_k_hits
+        self.bin_count += other.bin_count
+        self.bin_confidence += other.bin_confidence
+        self.bin_correct += other.bin_correct
+
+    def calibration(self):
+        """Non-empty bins as [{'lower', 'upper', 'count', 'confidence', 'accuracy'}] and the ECE."""
+        filled = self.bin_count > 0
+        confidence = np.divide(self.bin_confidence, self.bin_count, out=np.zeros(self.bins), where=filled)
+        accuracy = np.divide(self.bin_correct, self.bin_count, out=np.zeros(self.bins), where=filled)
+        ece = float(np.sum(self.bin_count * np.abs(accuracy - confidence)) / max(1, self.n))
+        bins = [{'lower': i / self.bins, 'upper': (i + 1) / self.bins, 'count': int(self.bin_count[i]),
+                 'confidence': float(confidence[i]), 'accuracy': float(accuracy[i])}
+                for i in np.flatnonzero(filled)]
+        return bins, ece
+
+    def report(self, labels=None, confusions=20):
+        """
+        JSON-serializable summary: overall and macro/weighted metrics, top-k accuracy,
+        calibration, per-class rows and the largest confusions (not the full matrix).
+        labels optionally names the classes (index -> family).
+        """
+        labels = labels or [str(i) for i in range(self.num_classes)]
+        precision, recall, f1, support = per_class_metrics(self.confusion)
+        present = support > 0
+        n = max(1, self.n)
+        bins, ece = self.calibration()
+        return {
+            'n': self.n,
+            'accuracy': float(np.trace(self.confusion) / n),
+            'top_k_accuracy': {str(k): float(hits / n) for k, hits in zip(self.top_k, self.top_k_hits)},
+            'macro': {'precision': float(precision[present].mean()) if present.any() else 0.0,
+                      'recall': float(recall[present].mean()) if present.any() else 0.0,
+                      'f1': float(f1[present].mean()) if present.any() else 0.0},
+            'weighted': {'precision': float(np.dot(precision, support) / n),
+                         'recall': float(np.dot(recall, support) / n),
+                         'f1': float(np.dot(f1, support) / n)},
+            'ece': ece,
+            'calibration': bins,
+            'per_class': [{'class': labels[i], 'precision': float(precision[i]), 'recall': float(recall[i]),
+                           'f1': float(f1[i]), 'support': int(support[i])} for i in range(self.num_classes)],
+            'top_confusions': [{'true': labels[t], 'predicted': labels[p], 'count': c,
+                                'fraction_of_true': c / int(support[t])}
+                               for t, p, c in top_confusions(self.confusion, confusions)],
+        }
+
+
+def write_report(report, json_path=None, per_class_csv=None, confusions_csv=None):
+    """Writes Evaluation.report() output as JSON and/or CSV tables."""
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    for path, rows, fields in ((per_class_csv, report['per_class'], ['class', 'precision', 'recall', 'f1', 'support']),
+                               (confusions_csv, report['top_confusions'],
+                                ['true', 'predicted', 'count', 'fraction_of_true'])):
+        if path:
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
@@ -0,0 +1,77 @@
+# Gemini model used for all explanations
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+_EXPLAINER_INSTRUCTIONS = """Provide a concise, engaging biological explanation structured EXACTLY as follows. Use 2-3 sentences per section. Be scientifically accurate but accessible to biology undergrads:
+
+🧬 WHAT IS THIS PROTEIN FAMILY?
+[Explain what this protein family does and its key molecular function]
+
+🏥 BIOLOGICAL SIGNIFICANCE
+[Why is this family important? Any connection to human health, diseases, or drug targets?]
+
+🔬 STRUCTURAL FEATURES
+[What structural motifs or domains are typically found in this family?]
+
+💡 INTERESTING FACT
+[One fascinating or surprising fact about this protein family]
+
+Keep the total response under 200 words. Do not use markdown headers, only use the emoji labels above. Do not mention the ML model or classification system."""
+
+PROTEIN_EXPLAINER_PROMPT = """You are a brilliant molecular biologist and science communicator. A protein sequence has been classified by an ML model.
+
+Classification result:
+- **Predicted Family:** {family}
+- **Confidence:** {confidence}%
+- **Sequence length:** {seq_length} amino acids
+- **First 50 residues:** {seq_preview}...
+
+""" + _EXPLAINER_INSTRUCTIONS
+
+# Sequence-independent variant, used when explanations are cached per family
+FAMILY_EXPLAINER_PROMPT = """You are a brilliant molecular biologist and science communicator. Explain the protein family **{family}** to a biology student.
+
+""" + _EXPLAINER_INSTRUCTIONS
+
+# Cache key modes: 'prompt' keys on the normalized per-request prompt, 'family' on the family alone
+CACHE_KEY_MODES = ('prompt', 'family')
+
+
+def normalize_family(family):
+    return ' '.join(str(family).split()).upper()
+
+
+def build_prompt(family, confidence, sequence, key_mode='prompt'):
+    """
+    Builds the Gemini prompt for a classification result.
+    Inputs are normalized first so equivalent requests produce identical prompts.
+    Returns (prompt, cache_key); in 'family' mode the key ignores the sequence.
+    """
+    if key_mode not in CACHE_KEY_MODES:
+        raise ValueError(f"Unknown explanation cache key mode '{key_mode}'. Choose from {CACHE_KEY_MODES}.")
+
+    family = normalize_family(family)
+    if key_mode == 'family':
+        return build_family_prompt(family)
+
+    sequence = ''.join(str(sequence or '').split()).upper()
+    prompt = PROTEIN_EXPLAINER_PROMPT.format(
+        family=family,
+        confidence=round(float(confidence) * 100, 1),
+        seq_length=len(sequence),
+        seq_preview=sequence[:50] if sequence else 'N/A'
+    )
+    return prompt, 'prompt:' + prompt
+
+
+def build_family_prompt(family):
+    """Returns (prompt, cache_key) for the sequence-independent per-family explanation."""
+    family = normalize_family(family)
+    return FAMILY_EXPLAINER_PROMPT.format(family=family), 'family:' + family
+
+
+def request_explanation(client, prompt):
+    """Calls Gemini and returns the explanation text; raises if the response is empty."""
+    response = client.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+    if not response.text:
+        raise ValueError('Gemini returned an empty explanation')
+    return response.text
@@ -0,0 +1,84 @@
+import numpy as np
+import torch
+
+# Probe inputs used to check a HF tokenizer against the lookup table before trusting it
+_PROBE_SEQUENCES = ["LAGVSERTIDPKQNFYMHWCXBUZO", "M", "MKTV" * 40, "ACDEFGHIKLMNPQRSTVWY" * 30]
+
+
+class ByteTokenizer:
+    def __init__(self, char_ids, cls_id, eos_id, pad_id):
+        """
+        Vectorized tokenizer for single-character protein vocabularies (ESM-2).
+        Sequences are joined into one byte buffer and mapped through a 256-entry lookup
+        table with numpy, then scattered into a padded (batch, length) array: no per-token
+        Python work. Produces the same input_ids/attention_mask as the HF ESM tokenizer
+        for sequences made only of vocabulary characters.
+        Args:
+            char_ids (dict): Single-character token -> id.
+            cls_id, eos_id, pad_id (int): Special token ids.
+        """
+        self.lut = np.full(256, -1, dtype=np.int64)
+        for char, token_id in char_ids.items():
+            self.lut[ord(char)] = token_id
+        self.cls_id = cls_id
+        self.eos_id = eos_id
+        self.pad_id = pad_id
+
+    @classmethod
+    def from_hf(cls, tokenizer, max_length=512):
+        """
+        Builds a ByteTokenizer mirroring `tokenizer`, or returns None when the vocabulary
+        is not a single-character alphabet or the outputs differ on the probe sequences.
+        """
+        specials = [getattr(tokenizer, name, None) for name in ('cls_token_id', 'eos_token_id', 'pad_token_id')]
+        if any(token_id is None for token_id in specials):
+            return None
+        char_ids = {token: token_id for token, token_id in tokenizer.get_vocab().items()
+                    if len(token) == 1 and ord(token) < 128 and not token.isspace()}
+        if not char_ids:
+            return None
+
+        fast = cls(char_ids, *specials)
+        if not fast.matches(tokenizer, _PROBE_SEQUENCES, max_length=max_length):
+            return None
+        return fast
+
+    def matches(self, tokenizer, sequences, max_length=512):
+        """True if this tokenizer reproduces `tokenizer` token-for-token on sequences."""
+        expected = tokenizer(sequences, return_tensors="np", padding=True, truncation=True, max_length=max_length)
+        actual = self(sequences, max_length=max_length)
+        if actual is None or set(expected.keys()) != set(actual.keys()):
+            return False
+        return all(np.array_equal(expected[key], actual[key].numpy()) for key in expected.keys())
+
+    def __call__(self, sequences, max_length=512, pad_to_multiple_of=None):
+        """
+        Returns {'input_ids', 'attention_mask'} int64 tensors: <cls> seq <eos>, truncated to
+        max_length tokens and right-padded to the batch maximum (rounded up to a multiple of
+        pad_to_multiple_of when given). Returns None if any sequence contains a character
+        outside the vocabulary, so the caller can fall back to the HF tokenizer.
+        """
+        try:
+            data = "".join(sequences).encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        ids = self.lut[np.frombuffer(data, dtype=np.uint8)]
+        if (ids < 0).any():
+            return None
+
+        lengths = np.fromiter((len(seq) for seq in sequences), dtype=np.int64, count=len(sequences))
+        kept = np.minimum(lengths, max_length - 2)
+        width = int(kept.max(initial=0)) + 2
+        if pad_to_multiple_of:
+            width = min(-(-width // pad_to_multiple_of) * pad_to_multiple_of, max_length)
+
+        rows = np.repeat(np.arange(len(sequences)), lengths)
+        cols = np.arange(len(ids)) - np.repeat(np.cumsum(lengths) - lengths, lengths) + 1
+        keep = cols <= kept[rows]
+
+        input_ids = np.full((len(sequences), width), self.pad_id, dtype=np.int64)
+        input_ids[:, 0] = self.cls_id
+        input_ids[rows[keep], cols[keep]] = ids[keep]
+        input_ids[np.arange(len(sequences)), kept + 1] = self.eos_id
+        attention_mask = (np.arange(width) < (kept + 2)[:, None]).astype(np.int64)
+        return {"input_ids": torch.from_numpy(input_ids), "attention_mask": torch.from_numpy(attention_mask)}
@@ -0,0 +1,256 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, status);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+"""
+
+class QueueFullError(Exception):
+    """Raised when an owner already has the maximum number of unfinished jobs."""
+
+
+class JobStore:
+    def __init__(self, path, max_running_per_owner=2, max_queued_per_owner=20):
+        """
+        Persistent job queue in one SQLite file, shared by API processes and job workers.
+        Jobs are rows with a priority (higher runs first) and an owner; claim() never starts
+        more than max_running_per_owner of one owner's jobs at once, so one user's bulk
+        submission cannot occupy every worker. Results are stored per item and read back
+        in pages, and a job resumes after its last stored item if its worker dies.
+        Args:
+            path (str): SQLite database file (created on first use).
+            max_running_per_owner (int): Concurrency cap per owner.
+            max_queued_per_owner (int): Unfinished jobs an owner may have before submit fails.
+        """
+        self.path = path
+        self.max_running_per_owner = max_running_per_owner
+        self.max_queued_per_owner = max_queued_per_owner
+        self._local = threading.local()
+
+    def _conn(self):
+        # One connection per thread and process (a forked child must not reuse its parent's)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _write(self, fn):
+        """Runs fn(conn) in one IMMEDIATE transaction (a single writer at a time)."""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    def submit(self, kind, items, owner, priority=0):
+        """Queues a job over items (a list of JSON-serializable inputs); returns its ID."""
+        job_id = uuid.uuid4().hex
+        payload = json.dumps({'items': items})
+
+        def insert(conn):
+            unfinished = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE owner = ? AND status IN ('queued', 'running')", (owner,)
+            ).fetchone()[0]
+            if unfinished >= self.max_queued_per_owner:
+                raise QueueFullError(f'{unfinished} unfinished jobs (max {self.max_queued_per_owner})')
+            conn.execute(
+                'INSERT INTO jobs (id, kind, owner, priority, status, total, payload, created_at) '
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, owner, int(priority), len(items), payload, time.time())
+            )
+        self._write(insert)
+        return job_id
+
+    def claim(self, worker, kinds=None):
+        """
+        Marks the best runnable job as running for worker and returns it (get() plus its
+        'items'), or None. Best = highest priority, then oldest, skipping
+        owners already at their running cap.
+        """
+        kinds = tuple(kinds or ())
+        kind_filter = f"AND kind IN ({','.join('?' * len(kinds))})" if kinds else ''
+
+        def pick(conn):
+            row = conn.execute(
+                f"SELECT * FROM jobs AS j WHERE status = 'queued' {kind_filter} AND "
+                "(SELECT COUNT(*) FROM jobs AS r WHERE r.owner = j.owner AND r.status = 'running') < ? "
+                'ORDER BY priority DESC, created_at LIMIT 1',
+                (*kinds, self.max_running_per_owner)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = COALESCE(started_at, ?), "
+                'heartbeat_at = ? WHERE id = ?', (worker, now, now, row['id'])
+            )
+            return row
+        row = self._write(pick)
+        if row is None:
+            return None
+        job = self._snapshot(row)
+        job.update(json.loads(row['payload']))
+        job['status'] = 'running'
+        return job
+
+    def record_results(self, job_id, start, rows, failed=0):
+        """
+        Stores result rows for items start..start+len(rows)-1 and advances progress in one
+        transaction. Returns False if the job was cancelled meanwhile (the worker should stop).
+        """
+        def store(conn):
+            status = conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if status is None or status[0] != 'running':
+                return False
+            conn.executemany('INSERT OR REPLACE INTO job_results (job_id, seq, data) VALUES (?, ?, ?)',
+                             [(job_id, start + i, json.dumps(row)) for i, row in enumerate(rows)])
+            conn.execute('UPDATE jobs SET processed = ?, failed = failed + ?, heartbeat_at = ? WHERE id = ?',
+                         (start + len(rows), failed, time.time(), job_id))
+            return True
+        return self._write(store)
+
+    def heartbeat(self, job_id):
+        """
+        Marks a running job's worker as alive between record_results() calls, so a long
+        chunk is not requeued by requeue_stale(). Returns False once the job is no longer running.
+        """
+        cursor = self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id)
+        ))
+        return cursor.rowcount > 0
+
+    def finish(self, job_id, error=None):
+        status = 'failed' if error else 'done'
+        self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = 'running'",
+            (status, error, time.time(), job_id)
+        ))
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job; returns False if it had already finished."""
+        cursor = self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+            (time.time(), job_id)
+        ))
+        return cursor.rowcount > 0
+
+    def requeue_stale(self, timeout):
+        """Puts running jobs whose worker stopped heart-beating back in the queue; returns how many."""
+        cursor = self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND heartbeat_at < ?",
+            (time.time() - timeout,)
+        ))
+        return cursor.rowcount
+
+    def save_task(self, task_id, status, result=None, error=None):
+        """
+        Stores an async task's state (see TaskManager), so any API process can answer
+        /api/tasks/<id> whichever worker runs the task. result must be JSON-serializable.
+        """
+        finished_at = time.time() if status in ('done', 'failed') else None
+        self._write(lambda conn: conn.execute(
+            'INSERT INTO tasks (id, status, result, error, created_at, finished_at) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET status = excluded.status, result = excluded.result, '
+            'error = excluded.error, finished_at = excluded.finished_at',
+            (task_id, status, None if result is None else json.dumps(result), error, time.time(), finished_at)
+        ))
+
+    def get_task(self, task_id):
+        """A task's {status, result, error, finished_at}, or None for unknown IDs."""
+        row = self._conn().execute('SELECT * FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        if row is None:
+            return None
+        return {'status': row['status'], 'result': None if row['result'] is None else json.loads(row['result']),
+                'error': row['error'], 'finished_at': row['finished_at']}
+
+    def delete_tasks(self, finished_before):
+        """Forgets tasks that finished before this timestamp; returns how many."""
+        cursor = self._write(lambda conn: conn.execute(
+            'DELETE FROM tasks WHERE finished_at < ?', (finished_before,)
+        ))
+        return cursor.rowcount
+
+    @staticmethod
+    def _snapshot(row):
+        total = row['total']
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'priority': row['priority'],
+            'status': row['status'],
+            'progress': {
+                'processed': row['processed'],
+                'total': total,
+                'failed': row['failed'],
+                'fraction': round(row['processed'] / total, 4) if total else 1.0,
+            },
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+
+    def get(self, job_id):
+        """Returns a status snapshot (without inputs) or None for unknown IDs."""
+        row = self._conn().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return None if row is None else self._snapshot(row)
+
+    def results(self, job_id, offset=0, limit=100):
+        """One page of stored results in item order."""
+        rows = self._conn().execute(
+            'SELECT data FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?',
+            (job_id, offset, limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def counts(self):
+        """Number of jobs per status, for metrics."""
+        return dict(self._conn().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
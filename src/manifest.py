@@ -0,0 +1,213 @@
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    row INTEGER PRIMARY KEY,
+    seq_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    pooling TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    removed_generation INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS rows_key ON rows (seq_hash, model, pooling);
+CREATE TABLE IF NOT EXISTS records (
+    record_id TEXT PRIMARY KEY,
+    row INTEGER NOT NULL,
+    generation INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def sequence_hash(sequence):
+    return hashlib.sha1(sequence.encode('utf-8')).hexdigest()
+
+
+def record_ids(headers):
+    """FASTA headers as record IDs; a repeated header gets a '#<n>' suffix per repeat."""
+    seen = {}
+    ids = []
+    for header in headers:
+        n = seen.get(header, 0)
+        seen[header] = n + 1
+        ids.append(header if n == 0 else f'{header}#{n}')
+    return ids
+
+
+class ManifestDiff:
+    def __init__(self, record_rows, to_embed, added, changed, removed, unchanged):
+        """
+        What a rebuild has to do (see Manifest.diff).
+        Attributes:
+            record_rows (dict): record ID -> (store row, sequence hash); the row is None
+                when the sequence is in to_embed.
+            to_embed (dict): sequence hash -> sequence, each distinct new sequence once.
+            added, changed, removed (list): Record IDs.
+            unchanged (int): Records whose row is reused as is.
+        """
+        self.record_rows = record_rows
+        self.to_embed = to_embed
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+        self.unchanged = unchanged
+
+    @property
+    def empty(self):
+        return not (self.to_embed or self.added or self.changed or self.removed)
+
+
+class Manifest:
+    def __init__(self, path):
+        """
+        Maps (record ID, sequence hash, model, pooling) to rows of an EmbeddingStore, so a
+        rebuild embeds only records that are new or whose sequence changed.
+        Store rows are keyed by sequence, so identical sequences share one row. Rows no
+        record uses any more are tombstoned (kept until compact()) and revived if their
+        sequence comes back. Every commit() is a new generation; rows remember the
+        generation that wrote or removed them, so downstream artifacts built at
+        generation g can ask changes(g) what to update instead of rebuilding.
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def generation(self):
+        return self._meta('generation')
+
+    @property
+    def compacted_generation(self):
+        return self._meta('compacted_generation')
+
+    @property
+    def rows(self):
+        """Store rows in use, tombstones included (row numbers are 0..rows-1)."""
+        return self.conn.execute('SELECT COALESCE(MAX(row) + 1, 0) FROM rows').fetchone()[0]
+
+    def diff(self, records, model, pooling):
+        """
+        Compares (record ID, sequence) pairs with the manifest for this model and pooling.
+        Returns a ManifestDiff; nothing is written until commit().
+        """
+        existing = {record_id: (row, seq_hash) for record_id, row, seq_hash in self.conn.execute(
+            'SELECT r.record_id, r.row, s.seq_hash FROM records AS r JOIN rows AS s ON r.row = s.row '
+            'WHERE s.model = ? AND s.pooling = ?', (model, pooling))}
+        known = dict(self.conn.execute('SELECT seq_hash, row FROM rows WHERE model = ? AND pooling = ?',
+                                       (model, pooling)))
+        all_ids = {record_id for (record_id,) in self.conn.execute('SELECT record_id FROM records')}
+        record_rows, to_embed, added, changed = {}, {}, [], []
+        unchanged = 0
+        for record_id, sequence in records:
+            seq_hash = sequence_hash(sequence)
+            previous = existing.get(record_id)
+            if previous is not None and previous[1] == seq_hash:
+                record_rows[record_id] = previous
+                unchanged += 1
+                continue
+            (changed if record_id in all_ids else added).append(record_id)
+            row = known.get(seq_hash)
+            if row is None:
+                to_embed[seq_hash] = sequence
+            record_rows[record_id] = (row, seq_hash)
+        removed = sorted(all_ids - set(record_rows))
+        return ManifestDiff(record_rows, to_embed, added, changed, removed, unchanged)
+
+    def commit(self, diff, new_rows, model, pooling):
+        """
+        Applies a diff after the store has been written: new_rows maps each hash in
+        diff.to_embed to the store row holding its embedding. Returns the new generation.
+        """
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            generation = self.generation + 1
+            for seq_hash, row in new_rows.items():
+                conn.execute('INSERT INTO rows (row, seq_hash, model, pooling, generation) VALUES (?, ?, ?, ?, ?)',
+                             (int(row), seq_hash, model, pooling, generation))
+            updates = []
+            for record_id in diff.added + diff.changed:
+                row, seq_hash = diff.record_rows[record_id]
+                updates.append((record_id, int(new_rows[seq_hash] if row is None else row), generation))
+            conn.executemany('INSERT OR REPLACE INTO records (record_id, row, generation) VALUES (?, ?, ?)', updates)
+            conn.executemany('DELETE FROM records WHERE record_id = ?', [(r,) for r in diff.removed])
+            # Tombstone rows nothing points at; revive tombstones that are referenced again
+            conn.execute('UPDATE rows SET removed_generation = ? WHERE removed_generation IS NULL AND '
+                         'row NOT IN (SELECT row FROM records)', (generation,))
+            conn.execute('UPDATE rows SET removed_generation = NULL, generation = ? WHERE '
+                         'removed_generation IS NOT NULL AND row IN (SELECT row FROM records)', (generation,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (generation,))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return generation
+
+    def record_rows(self, ids):
+        """Store row of each record ID, in order."""
+        rows = dict(self.conn.execute('SELECT record_id, row FROM records'))
+        return np.asarray([rows[record_id] for record_id in ids], dtype=np.int64)
+
+    def live_rows(self):
+        """Rows still referenced by a record, ascending (what compact() keeps)."""
+        return np.asarray([row for (row,) in self.conn.execute(
+            'SELECT row FROM rows WHERE removed_generation IS NULL ORDER BY row')], dtype=np.int64)
+
+    def changes(self, since):
+        """
+        Rows written and rows removed after generation since, as {'added': rows,
+        'removed': rows, 'records': record IDs whose row changed}, or None when the store
+        was compacted since then (row numbers moved, so rebuild from scratch).
+        """
+        if since < self.compacted_generation:
+            return None
+        added = [row for (row,) in self.conn.execute(
+            'SELECT row FROM rows WHERE generation > ? AND removed_generation IS NULL ORDER BY row', (since,))]
+        removed = [row for (row,) in self.conn.execute(
+            'SELECT row FROM rows WHERE removed_generation > ? ORDER BY row', (since,))]
+        records = [record_id for (record_id,) in self.conn.execute(
+            'SELECT record_id FROM records WHERE generation > ? ORDER BY record_id', (since,))]
+        return {'added': added, 'removed': removed, 'records': records}
+
+    def compact(self):
+        """
+        Drops tombstoned rows and renumbers the rest densely, in a new generation.
+        Returns the old row numbers kept, in order: pass them to EmbeddingStore.compact().
+        """
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            keep = self.live_rows().tolist()
+            generation = self.generation + 1
+            conn.execute('DELETE FROM rows WHERE removed_generation IS NOT NULL')
+            conn.execute('CREATE TEMP TABLE renumber (old INTEGER PRIMARY KEY, new INTEGER NOT NULL)')
+            conn.executemany('INSERT INTO renumber VALUES (?, ?)', [(old, new) for new, old in enumerate(keep)])
+            # Negative intermediates keep the row primary key unique while renumbering
+            conn.execute('UPDATE rows SET row = -1 - (SELECT new FROM renumber WHERE old = rows.row)')
+            conn.execute('UPDATE rows SET row = -1 - row')
+            conn.execute('UPDATE records SET row = (SELECT new FROM renumber WHERE old = records.row)')
+            conn.execute('DROP TABLE renumber')
+            conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                             [('generation', generation), ('compacted_generation', generation)])
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,168 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Latency buckets in seconds, from sub-millisecond stages up to slow upstream calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Shard:
+    """Metric values written by a single thread; no locking needed on the hot path."""
+    def __init__(self, thread):
+        self.thread = thread
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket_counts, sum, count]
+        self.sample_tick = 0
+
+
+class MetricsRegistry:
+    def __init__(self, sample_every=1):
+        """
+        Prometheus-style counters and histograms for the API.
+        Every thread writes to its own shard, so increments never take a lock; shards
+        are only summed when /metrics is scraped. Histograms record one observation
+        in every sample_every (counts are scaled back up when rendered).
+        Args:
+            sample_every (int): Histogram sampling interval (1 records everything).
+        """
+        self.sample_every = max(1, int(sample_every))
+        self._meta = {}  # name -> (type, help, buckets)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard(None)  # Totals folded in from threads that have exited
+        self._lock = threading.Lock()
+        self._collectors = []
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help_text, tuple(buckets))
+
+    def add_collector(self, fn):
+        """
+        Registers fn() -> iterable of (name, type, help, labels, value) evaluated at scrape
+        time, for values that already live elsewhere (cache stats, model version, ...).
+        """
+        self._collectors.append(fn)
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name, amount=1, **labels):
+        counters = self._shard().counters
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + amount
+
+    def _sampled(self, shard):
+        shard.sample_tick += 1
+        return shard.sample_tick % self.sample_every == 0
+
+    def observe(self, name, value, **labels):
+        shard = self._shard()
+        if self._sampled(shard):
+            self._record(shard, name, value, labels)
+
+    def _record(self, shard, name, value, labels):
+        key = (name, tuple(sorted(labels.items())))
+        entry = shard.histograms.get(key)
+        if entry is None:
+            buckets = self._meta[name][2]
+            entry = shard.histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self._meta[name][2], value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Times the block into histogram name (skips the clock entirely when not sampled)."""
+        shard = self._shard()
+        if not self._sampled(shard):
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(shard, name, time.perf_counter() - start, labels)
+
+    def _merge(self, target, shard):
+        for key, value in dict(shard.counters).items():
+            target.counters[key] = target.counters.get(key, 0) + value
+        for key, (counts, total, count) in dict(shard.histograms).items():
+            entry = target.histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+            entry[2] += count
+
+    def snapshot(self):
+        """Returns a shard holding the summed values of all threads."""
+        with self._lock:
+            alive = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    alive.append(shard)
+                else:
+                    # The thread can no longer write to it, so folding it in is safe
+                    self._merge(self._retired, shard)
+            self._shards = alive
+            total = _Shard(None)
+            self._merge(total, self._retired)
+            for shard in alive:
+                self._merge(total, shard)
+        return total
+
+    @staticmethod
+    def _format_labels(labels):
+        if not labels:
+            return ''
+        parts = []
+        for k, v in labels:
+            value = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{k}="{value}"')
+        return '{' + ','.join(parts) + '}'
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        total = self.snapshot()
+        lines = []
+        by_name = {}
+        for (name, labels), value in total.counters.items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for labels, value in sorted(by_name.get(name, [])):
+                    lines.append(f'{name}{self._format_labels(labels)} {value}')
+                continue
+            for (hist_name, labels), (counts, hist_sum, count) in sorted(total.histograms.items()):
+                if hist_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                    cumulative += bucket_count * self.sample_every
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{self._format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{self._format_labels(labels)} {hist_sum * self.sample_every}')
+                lines.append(f'{name}_count{self._format_labels(labels)} {count * self.sample_every}')
+
+        collected = {}
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                entry = collected.setdefault(name, (kind, help_text, []))
+                entry[2].append(f'{name}{self._format_labels(tuple(sorted(labels.items())))} {value}')
+        for name, (kind, help_text, samples) in collected.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+
+        return '\n'.join(lines) + '\n'
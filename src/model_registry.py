@@ -0,0 +1,307 @@
+import contextlib
+import logging
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import numpy as np
+from sklearn.decomposition import PCA
+
+from src.classifier import build_classifier
+
+logger = logging.getLogger(__name__)
+
+# Artifact name -> file name inside a version directory
+ARTIFACT_FILES = {
+    'model': 'real_model.joblib',
+    'label_encoder': 'label_encoder.joblib',
+    'embeddings': 'embeddings_real.npy',
+    'labels': 'labels_real.npy',
+}
+
+# Artifacts served as version 'unversioned' until the registry has a version
+LEGACY_PATHS = {
+    'model': 'models/real_model.joblib',
+    'label_encoder': 'models/label_encoder.joblib',
+    'embeddings': 'data/embeddings_real.npy',
+    'labels': 'data/labels_real.npy',
+}
+
+
+class ModelBundle:
+    def __init__(self, version, model=None, label_mapping=None, pca_model=None, embeddings_2d=None, labels=None):
+        """
+        Everything a request needs from one model version. Bundles are never mutated
+        after loading: a request reads the active bundle once and uses it throughout,
+        so a reload never mixes two versions within one response.
+        """
+        self.version = version
+        self.model = model
+        self.label_mapping = label_mapping or {}
+        self.pca_model = pca_model
+        self.embeddings_2d = embeddings_2d
+        self.labels = labels
+        self.loaded_at = time.time()
+
+    def family(self, idx):
+        return self.label_mapping.get(int(idx), f"Family_{idx}")
+
+    def classify(self, embeddings, timer=None):
+        """
+        Vectorized classification of a stack of embeddings with this version; the API and
+        the offline CLI both go through here so they agree row for row.
+        Returns (pred_idx, confidence, coords) arrays, one row per embedding.
+        Args:
+            embeddings (np.ndarray): (n, dim) embeddings.
+            timer (callable): Optional stage -> context manager, for per-stage timings.
+        """
+        timer = timer or (lambda stage: contextlib.nullcontext())
+        n = embeddings.shape[0]
+        model = self.model
+        try:
+            with timer('predict_proba'):
+                probs = model.predict_proba(embeddings)
+            best = np.argmax(probs, axis=1)
+            classes = getattr(model, 'classes_', None)
+            pred_idx = classes[best] if classes is not None else best
+            confidence = probs[np.arange(n), best].astype(float)
+        except Exception:
+            pred_idx = model.predict(embeddings)
+            confidence = np.full(n, -1.0)  # Indicate confidence unavailable (was 0.95 — misleading)
+
+        # Get 2D coordinates for visualization
+        if self.pca_model:
+            with timer('pca'):
+                coords = self.pca_model.transform(embeddings)
+        else:
+            coords = np.zeros((n, 2))
+
+        return pred_idx, confidence, coords
+
+
+class ModelLoadError(Exception):
+    """Raised when a model version is missing a required artifact or one fails to load."""
+
+
+def required_artifacts(backend):
+    """Artifacts a version must have to serve with backend (centroid/knn are built from embeddings)."""
+    return ('model', 'label_encoder') if backend == 'mlp' else ('label_encoder', 'embeddings', 'labels')
+
+
+def load_bundle(paths, version, backend='mlp', knn_k=5):
+    """
+    Loads one model version from artifact paths (see ARTIFACT_FILES) and fits the
+    visualization PCA. Raises ModelLoadError when a required artifact (the classifier,
+    the label encoder, and for centroid/knn the stored embeddings) is missing or broken,
+    so a half-working version is never served.
+    """
+    missing = [name for name in required_artifacts(backend)
+               if not paths.get(name) or not os.path.exists(paths[name])]
+    if missing:
+        raise ModelLoadError(f"[{version}] missing required artifacts: "
+                             + ", ".join(f"{name} ({paths.get(name)})" for name in missing))
+
+    model = None
+    if backend == 'mlp':
+        try:
+            model = joblib.load(paths['model'])
+        except Exception as e:
+            raise ModelLoadError(f"[{version}] failed to load model: {e}") from e
+        logger.info(f"[{version}] Loaded model (joblib): {type(model).__name__}")
+
+    try:
+        label_encoder = joblib.load(paths['label_encoder'])
+    except Exception as e:
+        raise ModelLoadError(f"[{version}] failed to load label encoder: {e}") from e
+    if not hasattr(label_encoder, 'classes_'):
+        raise ModelLoadError(f"[{version}] label encoder has no classes_ attribute")
+    label_mapping = {i: label for i, label in enumerate(label_encoder.classes_)}
+    logger.info(f"[{version}] Loaded {len(label_mapping)} class labels")
+
+    pca_model = embeddings_2d = labels = None
+    emb_path, lab_path = paths.get('embeddings'), paths.get('labels')
+    if emb_path and lab_path and os.path.exists(emb_path) and os.path.exists(lab_path):
+        X = np.load(emb_path)
+        labels = np.load(lab_path)
+
+        if backend != 'mlp':
+            kwargs = {'k': knn_k} if backend == 'knn' else {}
+            model = build_classifier(backend, X, labels, **kwargs)
+            logger.info(f"[{version}] Using {backend} classifier backend over {X.shape[0]} stored embeddings")
+
+        pca_model = PCA(n_components=2)
+        embeddings_2d = pca_model.fit_transform(X)
+        logger.info(f"[{version}] PCA fitted on {X.shape[0]} embeddings")
+    else:
+        logger.warning(f"[{version}] Embedding/label files not found; /api/data and PCA coordinates disabled")
+
+    return ModelBundle(version, model, label_mapping, pca_model, embeddings_2d, labels)
+
+
+class ModelRegistry:
+    CURRENT = 'CURRENT'
+
+    def __init__(self, root, backend='mlp', knn_k=5, fallback_paths=None):
+        """
+        Versioned model artifacts on disk: <root>/<version>/ holds the files named in
+        ARTIFACT_FILES and <root>/CURRENT names the version to serve.
+        The served version is one ModelBundle reference (`active`); loads happen off the
+        request path and replace it in a single assignment, so in-flight requests finish
+        on the bundle they started with.
+        Args:
+            root (str): Registry directory.
+            backend (str): Classifier backend ('mlp', 'centroid', 'knn').
+            knn_k (int): Neighbours for the knn backend.
+            fallback_paths (dict): Artifact paths served as version 'unversioned' while the
+                registry has no versions yet.
+        """
+        self.root = root
+        self.backend = backend
+        self.knn_k = knn_k
+        self.fallback_paths = fallback_paths or {}
+        self.active = None
+        self.reloads = 0
+        self.last_error = None
+        self._load_lock = threading.Lock()
+        self._watcher = None
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith('.') and os.path.isdir(os.path.join(self.root, name)))
+
+    def current_version(self):
+        """Version named by CURRENT, else the newest version directory, else None."""
+        try:
+            with open(os.path.join(self.root, self.CURRENT)) as f:
+                version = f.read().strip()
+            if version:
+                return version
+        except FileNotFoundError:
+            pass
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def paths_for(self, version):
+        return {name: os.path.join(self.root, version, filename) for name, filename in ARTIFACT_FILES.items()}
+
+    def publish(self, artifacts, version=None, activate=True, inherit=True):
+        """
+        Copies artifact files ({name: path}) into a new version directory (staged under a
+        temporary name, then renamed, so a half-copied version is never visible) and
+        optionally points CURRENT at it. Returns the version name.
+        With inherit, artifacts not given are copied from the current version; the result
+        must still hold everything this backend needs to load (see required_artifacts),
+        otherwise ValueError and nothing is written.
+        """
+        unknown = set(artifacts) - set(ARTIFACT_FILES)
+        if unknown:
+            raise ValueError(f"Unknown artifacts: {sorted(unknown)}")
+        artifacts = dict(artifacts)
+        current = self.current_version() if inherit else None
+        if current is not None:
+            for name, path in self.paths_for(current).items():
+                if name not in artifacts and os.path.exists(path):
+                    artifacts[name] = path
+        missing = [name for name in required_artifacts(self.backend)
+                   if name not in artifacts or not os.path.exists(artifacts[name])]
+        if missing:
+            raise ValueError(f"Incomplete version: missing {', '.join(missing)} "
+                             f"(required by the '{self.backend}' backend)")
+        version = version or time.strftime('%Y%m%d-%H%M%S')
+        final_dir = os.path.join(self.root, version)
+        if os.path.exists(final_dir):
+            raise ValueError(f"Version '{version}' already exists")
+
+        staging = os.path.join(self.root, f'.staging-{version}-{os.getpid()}')
+        os.makedirs(staging)
+        try:
+            for name, path in artifacts.items():
+                shutil.copy2(path, os.path.join(staging, ARTIFACT_FILES[name]))
+            os.rename(staging, final_dir)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Points CURRENT at version (atomic replace). Running servers pick it up on reload/watch."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown version '{version}'")
+        tmp = os.path.join(self.root, f'.{self.CURRENT}.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp, os.path.join(self.root, self.CURRENT))
+
+    def load(self, version=None):
+        """
+        Loads version (default: current) and swaps it in. Blocks while another load runs.
+        Returns the new active bundle; on failure the previous bundle stays active.
+        """
+        with self._load_lock:
+            version = version or self.current_version()
+            if version is None:
+                version, paths = 'unversioned', self.fallback_paths
+            elif version in self.versions():
+                paths = self.paths_for(version)
+            else:
+                raise ValueError(f"Unknown version '{version}'")
+
+            start = time.perf_counter()
+            try:
+                bundle = load_bundle(paths, version, backend=self.backend, knn_k=self.knn_k)
+            except Exception as e:
+                self.last_error = f"{version}: {e}"
+                raise
+            self.active = bundle
+            self.reloads += 1
+            self.last_error = None
+            logger.info(f"Serving model version {version} (loaded in {time.perf_counter() - start:.1f}s)")
+            return bundle
+
+    def load_in_background(self, version=None):
+        """Starts load() in a daemon thread; returns False if a load is already running."""
+        if self._load_lock.locked():
+            return False
+
+        def run():
+            try:
+                self.load(version)
+            except Exception as e:
+                logger.error(f"Background model load failed: {e}")
+
+        threading.Thread(target=run, name='model-reload', daemon=True).start()
+        return True
+
+    @property
+    def watching(self):
+        return self._watcher is not None
+
+    def watch(self, interval=10):
+        """Polls CURRENT every interval seconds and loads the version it names when it changes."""
+        if self._watcher is not None:
+            return self._watcher
+
+        def run():
+            failed = None  # Don't retry a broken version every interval
+            while True:
+                time.sleep(interval)
+                try:
+                    version = self.current_version()
+                    active = self.active.version if self.active is not None else None
+                    if version is not None and version not in (active, failed):
+                        logger.info(f"Model registry now points at {version}; reloading")
+                        failed = version
+                        self.load(version)
+                        failed = None
+                except Exception as e:
+                    logger.error(f"Model watcher: {e}")
+
+        self._watcher = threading.Thread(target=run, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
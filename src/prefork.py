@@ -0,0 +1,75 @@
+import gc
+import os
+
+import numpy as np
+
+
+def share_array(array, directory, name):
+    """
+    Writes array to <directory>/<name>.npy and returns a read-only memory map of it.
+    Pages then live in the page cache (tmpfs when directory is under /dev/shm), shared by
+    every worker and never duplicated by copy-on-write.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{name}.npy')
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp, path)
+    return np.load(path, mmap_mode='r')
+
+
+def share_bundle_arrays(bundle, directory):
+    """
+    Moves a ModelBundle's large arrays (kNN reference vectors, PCA points, labels) onto
+    memory maps under directory. Returns the number of bytes now file-backed.
+    """
+    if bundle is None:
+        return 0
+    prefix = bundle.version.replace(os.sep, '_')
+    shared = 0
+    model = bundle.model
+    for owner, attr in ((model, 'X'), (model, 'y'), (bundle, 'embeddings_2d'), (bundle, 'labels')):
+        array = getattr(owner, attr, None)
+        if isinstance(array, np.ndarray) and not isinstance(array, np.memmap):
+            setattr(owner, attr, share_array(array, directory, f'{prefix}-{type(owner).__name__}-{attr}'))
+            shared += array.nbytes
+    return shared
+
+
+def freeze_heap():
+    """
+    Collects garbage, then moves every surviving object into the permanent generation.
+    Call last thing before fork: the cyclic GC never touches frozen objects again, so
+    their pages stay shared with the master instead of being dirtied in each worker.
+    """
+    gc.disable()
+    gc.collect()
+    gc.freeze()
+    gc.enable()
+    return gc.get_freeze_count()
+
+
+def torch_threads_per_worker(workers, cpu_count=None):
+    """Intra-op threads per worker so that all workers together use each core once."""
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers))
+
+
+def configure_worker_torch(workers, cpu_count=None, tuning=None):
+    """
+    Partitions cores between workers; call in each worker right after fork. A TuningProfile
+    can lower (never raise) a worker's share to the host's measured best thread count, and
+    sets the measured inter-op thread count (otherwise 1).
+    """
+    import torch
+
+    threads = torch_threads_per_worker(workers, cpu_count)
+    if tuning is not None:
+        threads = min(threads, tuning.intra_op_threads)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(tuning.inter_op_threads if tuning is not None else 1)
+    except RuntimeError:
+        pass  # Already fixed once inter-op parallel work has run in this process
+    return threads
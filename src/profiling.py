@@ -0,0 +1,175 @@
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+# Since Python 3.12 cProfile sits on sys.monitoring, which is interpreter-wide: one enabled
+# profiler sees every thread, and a second one cannot be enabled concurrently.
+_GLOBAL_CPROFILE = sys.version_info >= (3, 12)
+
+
+class RequestProfiler:
+    def __init__(self):
+        """
+        Time-boxed cProfile of live traffic.
+        While a session is active every request is profiled (per request thread before
+        3.12, one interpreter-wide profiler from 3.12 on); when it ends the merged stats
+        are written as a standard .prof file readable by pstats/snakeviz.
+        """
+        self._lock = threading.Lock()
+        self._active = False
+        self._output_path = None
+        self._stats = None
+        self._global_profile = None
+
+    @property
+    def active(self):
+        return self._active
+
+    def start(self, seconds, output_path):
+        """Starts a session that stops itself after `seconds`. Returns False if one is running."""
+        with self._lock:
+            if self._active:
+                return False
+            self._active = True
+            self._output_path = output_path
+            self._stats = None
+            if _GLOBAL_CPROFILE:
+                self._global_profile = cProfile.Profile()
+                self._global_profile.enable()
+
+        timer = threading.Timer(seconds, self.finish)
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def begin_request(self):
+        """Call at request start; returns a handle to pass to end_request()."""
+        if not self._active or _GLOBAL_CPROFILE:
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def end_request(self, profile):
+        if profile is None:
+            return
+        profile.disable()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def finish(self):
+        with self._lock:
+            if not self._active:
+                return
+            self._active = False
+            if self._global_profile is not None:
+                self._global_profile.disable()
+                self._stats = pstats.Stats(self._global_profile)
+                self._global_profile = None
+            stats, self._stats = self._stats, None
+            path = self._output_path
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if stats is None:
+            # No traffic during the window: still leave a valid (empty) profile behind
+            stats = pstats.Stats(cProfile.Profile())
+        stats.dump_stats(path)
+
+
+def sample_stacks(seconds, output_path, interval=0.005):
+    """
+    Stack-sampling profiler over all threads (except the sampler itself).
+    Writes folded stacks ("thread;frame;frame count" lines) that flamegraph.pl and
+    speedscope read directly. Overhead is independent of how busy the process is.
+    Returns the number of samples taken.
+    """
+    own_id = threading.get_ident()
+    names = {}
+    folded = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if thread_id not in names:
+                names = {t.ident: t.name for t in threading.enumerate()}
+            stack.append(names.get(thread_id, str(thread_id)))
+            folded[';'.join(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w') as f:
+        for stack, count in folded.most_common():
+            f.write(f"{stack} {count}\n")
+    return samples
+
+
+def start_stack_sampling(seconds, output_path, interval=0.005):
+    """Runs sample_stacks() in a daemon thread (safe to call from a signal handler)."""
+    thread = threading.Thread(target=sample_stacks, args=(seconds, output_path, interval),
+                              name='stack-sampler', daemon=True)
+    thread.start()
+    return thread
+
+
+def install_signal_handler(signum, profile_dir, seconds=30):
+    """
+    On signal `signum` (e.g. SIGUSR2), samples all threads for `seconds` and writes
+    <profile_dir>/stacks-<timestamp>.folded. Must be called from the main thread.
+    """
+    import signal
+
+    def handler(_signum, _frame):
+        path = os.path.join(profile_dir, f"stacks-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        start_stack_sampling(seconds, path)
+
+    signal.signal(signum, handler)
+
+
+@contextmanager
+def torch_trace(output_path):
+    """Records a torch.profiler CPU trace of the block and exports it as a Chrome trace JSON."""
+    import torch
+    from torch.profiler import ProfilerActivity, profile
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with profile(activities=activities, record_shapes=True) as prof:
+        yield prof
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    prof.export_chrome_trace(output_path)
+
+
+@contextmanager
+def cprofile_to(output_path):
+    """cProfile the block and dump the stats to output_path (no-op if output_path is None)."""
+    if not output_path:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        profile.dump_stats(output_path)
+        print(f"Wrote cProfile stats to {output_path} (view with: python -m pstats {output_path})")
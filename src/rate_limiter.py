@@ -0,0 +1,190 @@
+import hashlib
+import mmap
+import os
+import threading
+import time
+
+import numpy as np
+
+
+def _sliding_count(window_start, current, previous, now, window):
+    """Sliding-window-counter estimate: the previous window's count fades out linearly."""
+    weight = 1.0 - (now - window_start) / window
+    return previous * weight + current
+
+
+class RateLimiter:
+    def __init__(self, max_requests, window_seconds, stripes=16, backend=None):
+        """
+        Per-key (per-IP) rate limiter using a sliding window counter.
+        Each key keeps two counters (current and previous fixed window), so a check is
+        O(1) time and memory regardless of traffic. Keys are spread over lock stripes,
+        and idle keys are swept out once per window.
+        Args:
+            max_requests (int): Requests allowed per window.
+            window_seconds (float): Window length.
+            stripes (int): Number of independently locked shards.
+            backend (SharedFileBackend): Optional cross-process store; when set, all
+                workers using the same file enforce one shared limit.
+        """
+        self.max_requests = max_requests
+        self.window = window_seconds
+        self.backend = backend
+        self.rejected = 0
+
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._shards = [{} for _ in range(stripes)]  # key -> [window_start, current, previous]
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = time.monotonic() + window_seconds
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def is_allowed(self, client_ip):
+        if self.backend is not None:
+            allowed = self.backend.hit(client_ip, self.max_requests, self.window)
+        else:
+            allowed = self._hit_local(client_ip)
+        if not allowed:
+            self.rejected += 1
+        return allowed
+
+    def _hit_local(self, key):
+        now = time.monotonic()
+        window_start = now - (now % self.window)
+        stripe = hash(key) % len(self._locks)
+
+        with self._locks[stripe]:
+            shard = self._shards[stripe]
+            state = shard.get(key)
+            if state is None:
+                state = shard[key] = [window_start, 0, 0]
+            elif state[0] != window_start:
+                # Roll forward: the old current window becomes "previous" only if adjacent
+                adjacent = window_start - state[0] <= self.window * 1.5
+                state[0], state[1], state[2] = window_start, 0, state[1] if adjacent else 0
+
+            allowed = _sliding_count(state[0], state[1], state[2], now, self.window) < self.max_requests
+            if allowed:
+                state[1] += 1
+
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return allowed
+
+    def _sweep(self, now):
+        """Drops keys with no requests in the current or previous window."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return  # Another thread is already sweeping
+        try:
+            self._next_sweep = now + self.window
+            cutoff = now - (now % self.window) - self.window
+            for lock, shard in zip(self._locks, self._shards):
+                with lock:
+                    idle = [key for key, state in shard.items() if state[0] < cutoff]
+                    for key in idle:
+                        del shard[key]
+        finally:
+            self._sweep_lock.release()
+
+
+class SharedFileBackend:
+    SLOT_DTYPE = np.dtype([('key', '<u8'), ('window', '<i8'), ('current', '<u4'), ('previous', '<u4')])
+    MAX_PROBES = 8
+
+    def __init__(self, path, slots=8192):
+        """
+        Rate-limit state shared by every process that maps the same file.
+        The file is a fixed-size open-addressing hash table of sliding-window counters
+        (24 bytes per slot), updated under an exclusive flock, so memory stays bounded
+        and stale slots are reused in place. POSIX only.
+        Args:
+            path (str): Backing file (created and sized on first use).
+            slots (int): Table capacity; a key whose MAX_PROBES slots all hold live keys evicts
+                the one idle longest.
+        """
+        import fcntl  # Not available on Windows; imported here so the local limiter still works there
+        self._fcntl = fcntl
+        self.path = path
+        self.slots = slots
+        self._open()
+
+    def _open(self):
+        fcntl = self._fcntl
+        path, slots = self.path, self.slots
+        size = slots * self.SLOT_DTYPE.itemsize
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mmap = mmap.mmap(self._fd, size)
+        self._table = np.ndarray((slots,), dtype=self.SLOT_DTYPE, buffer=self._mmap)
+        self._thread_lock = threading.Lock()  # flock does not exclude threads sharing the fd
+
+    @staticmethod
+    def _key_hash(key):
+        value = int.from_bytes(hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest(), 'little')
+        return value or 1  # 0 marks an empty slot
+
+    def _find_slot(self, key_hash, window_index):
+        table = self._table
+        start = key_hash % len(table)
+        probes = [(start + probe) % len(table) for probe in range(self.MAX_PROBES)]
+        # The key may live past a slot that has since gone stale, so look for it on every probe first
+        for slot in probes:
+            if table['key'][slot] == key_hash:
+                return slot
+        for slot in probes:
+            if table['key'][slot] == 0 or int(table['window'][slot]) < window_index - 1:
+                return self._claim(slot, key_hash, window_index)
+        # Every probe holds a live key: evict the one idle longest (fewest requests on ties)
+        slot = min(probes, key=lambda s: (int(table['window'][s]), int(table['current'][s])))
+        return self._claim(slot, key_hash, window_index)
+
+    def _claim(self, slot, key_hash, window_index):
+        self._table[slot] = (key_hash, window_index, 0, 0)
+        return slot
+
+    def hit(self, key, max_requests, window):
+        now = time.time()  # Wall clock: comparable across processes
+        window_index = int(now // window)
+        key_hash = self._key_hash(key)
+
+        with self._thread_lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                slot = self._find_slot(key_hash, window_index)
+                entry = self._table[slot]
+                if entry['window'] != window_index:
+                    adjacent = entry['window'] == window_index - 1
+                    entry['previous'] = entry['current'] if adjacent else 0
+                    entry['current'] = 0
+                    entry['window'] = window_index
+
+                estimate = _sliding_count(window_index * window, int(entry['current']),
+                                          int(entry['previous']), now, window)
+                allowed = estimate < max_requests
+                if allowed:
+                    entry['current'] += 1
+                return allowed
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def close(self):
+        self._table = None
+        self._mmap.close()
+        os.close(self._fd)
+
+    def reopen(self):
+        """
+        Re-opens the file in this process. Call after fork: flock locks belong to the open
+        file description, which a forked child shares with its parent, so without a fresh
+        open the processes would not exclude each other.
+        """
+        self.close()
+        self._open()
@@ -0,0 +1,233 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """A computation in progress that concurrent callers for the same key wait on."""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024, ttl_seconds=7 * 24 * 3600, memory_items=0):
+        """
+        Persistent, size-bounded, content-addressed cache for upstream text responses.
+        Entries are gzip-compressed files named by key under cache_dir, expired after
+        ttl_seconds and evicted least-recently-used once the total exceeds max_bytes.
+        Concurrent misses for the same key share a single computation (single-flight).
+        Args:
+            cache_dir (str): Directory holding the cache files (created if missing).
+            max_bytes (int): Upper bound on the compressed size of all entries.
+            ttl_seconds (float): Age after which an entry is treated as missing.
+            memory_items (int): Decoded entries also kept in memory (0 disables the tier).
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.memory_items = memory_items
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> (size_bytes, written_at), LRU order
+        self._total_bytes = 0
+        self._inflight = {}
+        self._memory = OrderedDict()  # key -> decoded value, hottest last
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key_for(text):
+        """Content address for a request payload."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.gz')
+
+    def _load_index(self):
+        """Rebuilds the in-memory index from disk, oldest entries first."""
+        entries = []
+        now = time.time()
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith('.gz'):
+                    continue
+                stat = entry.stat()
+                if now - stat.st_mtime > self.ttl:
+                    self._remove_file(entry.path)
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-3], stat.st_size))
+
+        for written_at, key, size in sorted(entries):
+            self._index[key] = (size, written_at)
+            self._total_bytes += size
+        self._evict_locked()
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _remember_locked(self, key, value):
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _drop_locked(self, key):
+        self._memory.pop(key, None)
+        size, _ = self._index.pop(key)
+        self._total_bytes -= size
+        self._remove_file(self._path(key))
+
+    def _evict_locked(self, keep=None):
+        while self._total_bytes > self.max_bytes and self._index:
+            oldest = next(iter(self._index))
+            if oldest == keep:
+                break  # keep is the most recent entry, so nothing else is left to evict
+            self._drop_locked(oldest)
+
+    def _adopt_locked(self, key):
+        """
+        Indexes an entry written by another process (e.g. another worker or a warm-up script)
+        and evicts older entries if it takes the cache past max_bytes.
+        """
+        try:
+            stat = os.stat(self._path(key))
+        except OSError:
+            return None
+        self._index[key] = (stat.st_size, stat.st_mtime)
+        self._total_bytes += stat.st_size
+        self._evict_locked(keep=key)
+        return self._index[key]
+
+    def _lookup(self, key):
+        with self._lock:
+            meta = self._index.get(key) or self._adopt_locked(key)
+            if meta is None:
+                return None
+            if time.time() - meta[1] > self.ttl:
+                self._drop_locked(key)
+                return None
+            self._index.move_to_end(key)
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                return value
+
+        try:
+            with gzip.open(self._path(key), 'rb') as f:
+                value = f.read().decode('utf-8')
+        except OSError:
+            # File vanished or is corrupt: forget it and report a miss
+            with self._lock:
+                if key in self._index:
+                    self._drop_locked(key)
+            return None
+
+        with self._lock:
+            if key in self._index:
+                self._remember_locked(key, value)
+        return value
+
+    def __contains__(self, key):
+        """True if key holds an unexpired entry (does not touch hit/miss stats)."""
+        with self._lock:
+            meta = self._index.get(key) or self._adopt_locked(key)
+            return meta is not None and time.time() - meta[1] <= self.ttl
+
+    def preload(self):
+        """Fills the memory tier with the most recently used entries. Returns the count loaded."""
+        with self._lock:
+            keys = list(self._index)[-self.memory_items:] if self.memory_items > 0 else []
+        return sum(1 for key in keys if self._lookup(key) is not None)
+
+    def get(self, key):
+        """Returns the cached text for key, or None if missing or expired."""
+        value = self._lookup(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores value under key, evicting LRU entries beyond max_bytes."""
+        data = gzip.compress(value.encode('utf-8'))
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if key in self._index:
+                self._total_bytes -= self._index.pop(key)[0]
+            self._index[key] = (len(data), time.time())
+            self._total_bytes += len(data)
+            self._remember_locked(key, value)
+            self._evict_locked()
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns (value, from_cache). On a miss, compute() is called once even if many
+        threads ask for the same key concurrently; the others wait and share its result.
+        Exceptions from compute() propagate to every waiter and nothing is cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            # Another leader may have finished between our miss and taking the lock
+            value = self._lookup(key)
+            from_cache = value is not None
+            if not from_cache:
+                value = compute()
+                self.put(key, value)
+            flight.value = value
+            return value, from_cache
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.event.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._index),
+                'memory_entries': len(self._memory),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
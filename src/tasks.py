@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class TaskManager:
+    def __init__(self, max_workers=8, ttl_seconds=600, store=None, poll_interval=0.25):
+        """
+        Asynchronous task runner for slow upstream calls.
+        submit() returns a task ID immediately; callers poll get() or block in wait().
+        Finished tasks are forgotten ttl_seconds after completion.
+        Args:
+            max_workers (int): Background threads executing tasks.
+            ttl_seconds (float): How long finished results stay retrievable.
+            store (JobStore): Shared store that task states are also written to, so every
+                process of a pre-fork server can report a task another process runs.
+                Without it tasks live in this process only.
+            poll_interval (float): How often wait() re-reads the store for another process's task.
+        """
+        self.ttl = ttl_seconds
+        self.store = store
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        self._evict_expired()
+        task_id = uuid.uuid4().hex
+        task = {
+            'status': 'pending',
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'finished_at': None,
+            'done': threading.Event(),
+        }
+        with self._lock:
+            self._tasks[task_id] = task
+        self._save(task_id, task)
+        self._executor.submit(self._run, task_id, task, fn, args, kwargs)
+        return task_id
+
+    def _save(self, task_id, task):
+        if self.store is None:
+            return
+        try:
+            self.store.save_task(task_id, task['status'], task['result'], task['error'])
+        except Exception as e:
+            # Still answerable by this process; other processes see the last saved state
+            logger.error(f"[Tasks] Could not store task {task_id}: {e}")
+
+    def _run(self, task_id, task, fn, args, kwargs):
+        task['status'] = 'running'
+        self._save(task_id, task)
+        try:
+            task['result'] = fn(*args, **kwargs)
+            task['status'] = 'done'
+        except Exception as e:
+            task['error'] = str(e)
+            task['status'] = 'failed'
+        task['finished_at'] = time.time()
+        self._save(task_id, task)
+        task['done'].set()
+
+    def _evict_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [task_id for task_id, task in self._tasks.items()
+                       if task['finished_at'] is not None and now - task['finished_at'] > self.ttl]
+            for task_id in expired:
+                del self._tasks[task_id]
+        if self.store is not None:
+            try:
+                self.store.delete_tasks(now - self.ttl)
+            except Exception as e:
+                logger.error(f"[Tasks] Could not evict stored tasks: {e}")
+
+    def _stored(self, task_id):
+        if self.store is None:
+            return None
+        task = self.store.get_task(task_id)
+        if task is None or (task['finished_at'] is not None and time.time() - task['finished_at'] > self.ttl):
+            return None
+        return task
+
+    def get(self, task_id):
+        """Returns a snapshot {status, result, error} or None for unknown/expired IDs."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+        if task is None:
+            task = self._stored(task_id)
+            if task is None:
+                return None
+        return {'status': task['status'], 'result': task['result'], 'error': task['error']}
+
+    def wait(self, task_id, timeout=None):
+        """Blocks until the task finishes or timeout elapses, then returns get(task_id)."""
+        with self._lock:
+            task = self._tasks.get(task_id)
+        if task is not None:
+            task['done'].wait(timeout)
+            return self.get(task_id)
+
+        # Another process runs it: poll the shared store
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.get(task_id)
+            if snapshot is None or snapshot['status'] in ('done', 'failed'):
+                return snapshot
+            if deadline is not None and time.monotonic() >= deadline:
+                return snapshot
+            time.sleep(self.poll_interval)
@@ -0,0 +1,154 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Statuses worth retrying: the upstream is overloaded or restarting
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised without calling the upstream when its circuit is open or all slots are busy."""
+
+
+class _FailedResponse(Exception):
+    def __init__(self, response):
+        super().__init__(f"upstream returned {response.status_code}")
+        self.response = response
+
+
+class _RetryableResponse(_FailedResponse):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Classic closed / open / half-open breaker.
+        After failure_threshold consecutive failures the circuit opens and calls are
+        refused for reset_timeout seconds; then a single trial call is let through.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class UpstreamClient:
+    def __init__(self, name, max_concurrency=4, retries=2, backoff_base=0.5, backoff_max=8.0,
+                 failure_threshold=5, reset_timeout=30.0, acquire_timeout=10.0):
+        """
+        Call layer for one external service (ESMFold, Gemini).
+        Provides a pooled keep-alive HTTP session, a cap on concurrent calls, retries
+        with full-jitter exponential backoff and a circuit breaker.
+        Args:
+            name (str): Upstream name used in log and error messages.
+            max_concurrency (int): Simultaneous in-flight calls allowed.
+            retries (int): Extra attempts after a retryable failure.
+            backoff_base (float): First backoff ceiling in seconds, doubled per attempt.
+            backoff_max (float): Upper bound on a single backoff.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a trial call.
+            acquire_timeout (float): Seconds to wait for a free slot before giving up.
+        """
+        self.name = name
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, fn, *args, retry_on=(), **kwargs):
+        """
+        Runs fn(*args, **kwargs) under the concurrency cap, breaker and retry policy.
+        Exceptions listed in retry_on are retried; any exception counts as a breaker failure.
+        """
+        # Slot first: a half-open trial must not be claimed by a call that then never runs
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise UpstreamUnavailableError(f"{self.name} has no free connection slot")
+        if not self.breaker.allow():
+            self._slots.release()
+            raise UpstreamUnavailableError(f"{self.name} circuit is open")
+
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    result = fn(*args, **kwargs)
+                except _RetryableResponse as e:
+                    if attempt == self.retries:
+                        self.breaker.record_failure()
+                        return e.response
+                except _FailedResponse as e:
+                    self.breaker.record_failure()
+                    return e.response
+                except retry_on:
+                    if attempt == self.retries:
+                        self.breaker.record_failure()
+                        raise
+                except Exception:
+                    self.breaker.record_failure()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    return result
+                time.sleep(self._backoff(attempt))
+        finally:
+            self._slots.release()
+
+    def post(self, url, **kwargs):
+        """
+        POST through the pooled session. Connection errors and overload statuses
+        (429/502/503/504) are retried; the final response is returned either way.
+        Other 5xx responses are returned at once but count as breaker failures.
+        Timeouts are not retried since they already cost the full timeout.
+        """
+        def attempt():
+            response = self.session.post(url, **kwargs)
+            if response.status_code in RETRY_STATUSES:
+                raise _RetryableResponse(response)
+            if response.status_code >= 500:
+                raise _FailedResponse(response)
+            return response
+
+        return self.call(attempt, retry_on=(requests.exceptions.ConnectionError,))
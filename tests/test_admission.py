@@ -0,0 +1,48 @@
+import unittest
+import time
+
+from src.admission import AdmissionController, AdmissionRejected, Lane
+
+
+class TestAdmissionController(unittest.TestCase):
+    def make(self, throughput=1000.0):
+        return AdmissionController([Lane('interactive', deadline_seconds=1.0),
+                                    Lane('batch', deadline_seconds=5.0, max_tokens=3000)],
+                                   initial_tokens_per_second=throughput)
+
+    def test_rejects_when_estimated_wait_exceeds_deadline(self):
+        controller = self.make()
+        controller.acquire('interactive', 800)
+        controller.acquire('interactive', 150)
+        with self.assertRaises(AdmissionRejected) as ctx:
+            controller.acquire('interactive', 300)  # (950 + 300) / 1000 = 1.25s > 1s
+        self.assertEqual(ctx.exception.retry_after, 1)
+        controller.release('interactive', 800)
+        controller.acquire('interactive', 300)
+
+    def test_idle_server_admits_oversized_request(self):
+        controller = self.make(throughput=10.0)
+        controller.acquire('interactive', 5000)
+        self.assertEqual(controller.stats()['in_flight_tokens'], 5000)
+
+    def test_batch_lane_is_bounded(self):
+        controller = self.make(throughput=1e6)
+        controller.acquire('batch', 2000)
+        with self.assertRaises(AdmissionRejected):
+            controller.acquire('batch', 2000)
+        # The interactive lane is unaffected by the batch cap
+        controller.acquire('interactive', 2000)
+        self.assertEqual(controller.stats()['lanes']['batch']['rejected'], 1)
+
+    def test_throughput_is_measured_over_busy_time(self):
+        controller = AdmissionController([Lane('interactive', deadline_seconds=1.0)], sample_seconds=0.05)
+        self.assertEqual(controller.estimated_wait(10 ** 9), 0.0)  # Uncalibrated: admit everything
+        with controller.admit('interactive', 100):
+            time.sleep(0.1)
+        self.assertGreater(controller.throughput, 100)
+        self.assertLess(controller.throughput, 2000)
+        self.assertEqual(controller.stats()['in_flight_tokens'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
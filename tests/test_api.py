@@ -7,11 +7,19 @@ import unittest.mock
 import json
 import sys
 import os
+import shutil
+import tempfile
+
+import numpy as np
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import app as app_module
 from app import app, validate_sequence
+from src.admission import AdmissionController, Lane
+from src.job_queue import JobStore
+from src.model_registry import ModelBundle
 
 
 class TestInputValidation(unittest.TestCase):
@@ -47,6 +55,22 @@ class TestInputValidation(unittest.TestCase):
             self.assertEqual(result, 'MKTVRQERL')
             self.assertIsNone(error)
 
+    def test_fasta_header_stripped(self):
+        with app.test_request_context():
+            result, error = validate_sequence('>sp|P69905|HBA_HUMAN Hemoglobin\r\nMVLSPADKTN\r\nVKAAWGKVGA\n')
+            self.assertEqual(result, 'MVLSPADKTNVKAAWGKVGA')
+            self.assertIsNone(error)
+
+    def test_invalid_positions_reported(self):
+        with app.test_request_context():
+            result, (response, status) = validate_sequence('MK1TV!')
+            self.assertIsNone(result)
+            self.assertEqual(status, 400)
+            body = response.get_json()
+            # 1-based, matching the positions quoted in the message
+            self.assertEqual(body['invalid_positions'], [3, 6])
+            self.assertIn('at positions 3, 6', body['error'])
+
     def test_invalid_characters_rejected(self):
         with app.test_request_context():
             result, error = validate_sequence('MKTVRQ123!@#')
@@ -144,6 +168,88 @@ class TestAPIEndpoints(unittest.TestCase):
         self.assertIn(response.status_code, [400, 415])  # Flask returns 415 for non-JSON content
 
 
+class TestJobEndpoints(unittest.TestCase):
+    """Job submission, status and paginated results against a temporary job store."""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        self.workdir = tempfile.mkdtemp()
+        patcher = unittest.mock.patch.object(app_module, 'jobs', JobStore(os.path.join(self.workdir, 'jobs.db')))
+        self.jobs = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_submit_poll_and_page_results(self):
+        response = self.client.post('/api/jobs', content_type='application/json', data=json.dumps(
+            {'kind': 'classify', 'priority': 7, 'sequences': [{'name': 'a', 'sequence': 'MKTV'}, 'MKLV']}))
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        self.assertIn('protein_api_jobs_submitted_total{kind="classify"}',
+                      self.client.get('/metrics').get_data(as_text=True))
+
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual(status['status'], 'queued')
+        self.assertEqual(status['priority'], 7)
+        self.assertEqual(status['progress']['total'], 2)
+
+        job = self.jobs.claim('test')
+        self.jobs.record_results(job_id, 0, [{'name': item['name'], 'error': None} for item in job['items']])
+        page = self.client.get(f'/api/jobs/{job_id}/results?offset=1&limit=1').get_json()
+        self.assertEqual(page['results'], [{'name': 'Unknown', 'error': None}])
+        self.assertIsNone(page['next_offset'])
+
+    def test_unknown_kind_and_job(self):
+        response = self.client.post('/api/jobs', content_type='application/json',
+                                    data=json.dumps({'kind': 'explain', 'sequences': ['MKTV']}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/jobs/missing').status_code, 404)
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """Overload is shed with 503 and Retry-After before any embedding work."""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        controller = AdmissionController([Lane('interactive', deadline_seconds=1.0),
+                                          Lane('batch', deadline_seconds=1.0)], initial_tokens_per_second=100)
+        controller.acquire('interactive', 500)  # Five seconds of work already in flight
+        patcher = unittest.mock.patch.object(app_module, 'admission', controller)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_predict_shed_with_retry_after(self):
+        with unittest.mock.patch.object(app_module, 'embed_sequence') as embed:
+            response = self.client.post('/api/predict', content_type='application/json',
+                                        data=json.dumps({'sequence': 'MKTVRQERLK'}))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '5')
+        embed.assert_not_called()
+        self.assertIn('protein_api_admission_rejected_total{lane="interactive"}',
+                      self.client.get('/metrics').get_data(as_text=True))
+
+
+class TestCascade(unittest.TestCase):
+    """Only low-confidence rows are replaced by the large stage's answer."""
+
+    def test_apply_cascade_replaces_escalated_rows(self):
+        bundle = ModelBundle('small', label_mapping={0: 'A', 1: 'B'})
+        large = unittest.mock.Mock(threshold=0.7)
+        large.needs_escalation.side_effect = lambda conf: np.asarray(conf) < 0.7
+        large.classify.return_value = (['LARGE'], np.array([0.93]), 'large-v1')
+        with unittest.mock.patch.object(app_module, 'cascade', large):
+            families, confidence, escalated = app_module.apply_cascade(
+                bundle, ['MKTV', 'MKLV'], np.array([0, 1]), np.array([0.95, 0.4]))
+        self.assertEqual(families, ['A', 'LARGE'])
+        np.testing.assert_allclose(confidence, [0.95, 0.93])
+        self.assertEqual(escalated.tolist(), [False, True])
+        large.classify.assert_called_once_with(['MKLV'])
+        large.observe.assert_called_once_with(2, 1)
+
+
 class TestRateLimiting(unittest.TestCase):
     """Test that rate limiting works."""
 
@@ -152,7 +258,7 @@ class TestRateLimiting(unittest.TestCase):
         app.config['TESTING'] = True
         cls.client = app.test_client()
 
-    @unittest.mock.patch('app.http_requests.post')
+    @unittest.mock.patch('app.esmfold_client.session.post')
     def test_rate_limit_headers(self, mock_post):
         """Send many rapid requests and verify rate limit kicks in."""
         # Mock a successful response so the API call doesn't fail
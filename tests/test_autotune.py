@@ -0,0 +1,93 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import build_tiny_esm, random_sequences
+from src.autotune import TuningProfile, choose_profile, host_key, load_profile, save_profile
+from src.embedding_extractor import EmbeddingExtractor
+
+
+def profile():
+    return TuningProfile(4, 1, [{'max_length': 256, 'batch_size': 4, 'token_budget': 1032},
+                                {'max_length': 64, 'batch_size': 16, 'token_budget': 1056}])
+
+
+class TestTuningProfile(unittest.TestCase):
+    def test_batches_respect_token_budgets(self):
+        lengths = [200, 30, 60, 250, 10, 40, 100, 62] * 3
+        batches = profile().plan_batches(lengths)
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(len(lengths))))
+        for batch in batches:
+            longest = max(lengths[i] for i in batch)
+            self.assertLessEqual(len(batch) * (longest + 2), profile().token_budget(longest))
+        # Short sequences share big batches (1056 // 22 tokens = 48); long ones get small ones
+        self.assertEqual(len(profile().plan_batches([20] * 60)[0]), 48)
+        self.assertEqual(len(profile().plan_batches([250] * 8)), 2)
+
+    def test_budget_counts_padding(self):
+        # 20 residues + 2 specials pad to 32 tokens: 1056 // 32 = 33 per batch, not 48
+        batches = profile().plan_batches([20] * 60, pad_to_multiple_of=32)
+        self.assertEqual(len(batches[0]), 33)
+        for lengths in ([20] * 60, [200, 30, 60, 250, 10, 40, 100, 62] * 3):
+            for batch in profile().plan_batches(lengths, pad_to_multiple_of=32):
+                longest = max(lengths[i] for i in batch)
+                padded = -(-(longest + 2) // 32) * 32
+                self.assertLessEqual(len(batch) * padded, profile().token_budget(longest))
+
+    def test_choose_profile(self):
+        measurements = {
+            (4, 1): {64: {1: 100.0, 8: 400.0}, 256: {1: 300.0, 8: 350.0}},
+            (2, 2): {64: {1: 100.0, 8: 300.0}, 256: {1: 200.0, 8: 250.0}},
+        }
+        chosen = choose_profile(measurements)
+        self.assertEqual((chosen.intra_op_threads, chosen.inter_op_threads), (4, 1))
+        self.assertEqual(chosen.buckets, [{'max_length': 64, 'batch_size': 8, 'token_budget': 528},
+                                          {'max_length': 256, 'batch_size': 8, 'token_budget': 2064}])
+        padded = choose_profile(measurements, pad_to_multiple_of=32)
+        self.assertEqual([bucket['token_budget'] for bucket in padded.buckets], [8 * 96, 8 * 288])
+
+    def test_saved_per_host_and_model(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, 'tuning.json')
+            self.assertIsNone(load_profile('esm', path))
+            save_profile('esm', profile(), path)
+            save_profile('other', TuningProfile(1, 1, [{'max_length': 64, 'batch_size': 1, 'token_budget': 66}]), path)
+            self.assertEqual(load_profile('esm', path).to_dict(), profile().to_dict())
+            with open(path) as f:
+                self.assertEqual(sorted(json.load(f)[host_key()]), ['esm', 'other'])
+        finally:
+            shutil.rmtree(workdir)
+
+
+class TestTunedExtractor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp()
+        cls.model_dir = build_tiny_esm(cls.workdir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir)
+
+    def test_tuned_batches_do_not_change_masked_embeddings(self):
+        sequences = random_sequences(20, (10, 300), seed=2)
+        tuned = EmbeddingExtractor(model_name=self.model_dir, pooling='masked_mean', tuning=profile())
+        reference = tuned.get_embeddings(sequences, batch_size=1)
+        pooled, residues = tuned.get_embeddings(sequences, return_residues=True)
+        np.testing.assert_allclose(pooled, reference, atol=1e-5)
+        self.assertEqual([len(r) for r in residues], [len(s) for s in sequences])
+
+    def test_legacy_pooling_keeps_fixed_batches(self):
+        extractor = EmbeddingExtractor(model_name=self.model_dir, tuning=profile())
+        sequences = random_sequences(10, (10, 80), seed=3)
+        np.testing.assert_array_equal(extractor.get_embeddings(sequences),
+                                      extractor.get_embeddings(sequences, batch_size=8))
+
+
+if __name__ == '__main__':
+    unittest.main()
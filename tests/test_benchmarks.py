@@ -0,0 +1,60 @@
+import unittest
+
+import requests
+
+from benchmarks.common import metric
+from benchmarks.loadtest import parse_mix, summarize
+from benchmarks.stubs import FakeESMFoldHandler, start_stub_server
+from benchmarks.run import compare
+
+
+def report(**values):
+    return {'results': values}
+
+
+class TestBenchmarkCompare(unittest.TestCase):
+    def test_throughput_drop_is_a_regression(self):
+        rows = compare(report(a=metric(100, 'seqs/s')), report(a=metric(70, 'seqs/s')), threshold=0.15)
+        self.assertTrue(rows[0][4])
+
+    def test_latency_increase_is_a_regression(self):
+        rows = compare(report(a=metric(10, 'ms', higher_is_better=False)),
+                       report(a=metric(13, 'ms', higher_is_better=False)), threshold=0.15)
+        self.assertAlmostEqual(rows[0][3], -0.3)
+        self.assertTrue(rows[0][4])
+
+    def test_improvement_and_noise_pass(self):
+        rows = compare(report(a=metric(100, 'seqs/s'), b=metric(10, 'ms', higher_is_better=False)),
+                       report(a=metric(95, 'seqs/s'), b=metric(8, 'ms', higher_is_better=False)), threshold=0.15)
+        self.assertFalse(any(row[4] for row in rows))
+
+    def test_metrics_missing_from_current_are_skipped(self):
+        self.assertEqual(compare(report(a=metric(1, 's')), report(), threshold=0.1), [])
+
+
+class TestLoadTestHarness(unittest.TestCase):
+    def test_summarize_splits_errors_from_latencies(self):
+        records = [('predict', 200, 0.010), ('predict', 200, 0.030), ('predict', 429, 0.001),
+                   ('fold', 'ConnectionError', 5.0)]
+        report = summarize(records, elapsed=2.0)
+        self.assertEqual(report['predict']['ok'], 2)
+        self.assertEqual(report['predict']['errors'], {'429': 1})
+        self.assertAlmostEqual(report['predict']['throughput_rps'], 1.0)
+        self.assertAlmostEqual(report['predict']['p50_ms'], 20.0)
+        self.assertEqual(report['fold']['errors'], {'ConnectionError': 1})
+        self.assertNotIn('p50_ms', report['fold'])
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix('predict=80, fold=20'), {'predict': 80.0, 'fold': 20.0})
+
+    def test_fake_esmfold_returns_one_atom_per_residue(self):
+        server, url = start_stub_server(FakeESMFoldHandler, latency=0)
+        try:
+            pdb = requests.post(url + '/foldSequence/v1/pdb/', data='MKTV', timeout=5).text
+        finally:
+            server.shutdown()
+        self.assertEqual(pdb.count('ATOM'), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
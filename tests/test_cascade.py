@@ -0,0 +1,64 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+from benchmarks.common import build_tiny_esm, random_sequences
+from src.cascade import Cascade
+from src.classifier import build_classifier
+from src.embedding_extractor import EmbeddingExtractor
+from src.model_registry import ModelRegistry
+
+
+class TestCascade(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp()
+        # The "large" stage: a different (wider) checkpoint with its own classifier
+        cls.large_dir = build_tiny_esm(os.path.join(cls.workdir, 'large'), hidden_size=96, seed=1)
+        large = EmbeddingExtractor(model_name=cls.large_dir)
+        X = large.get_embeddings(random_sequences(12, (20, 80), seed=0))
+        y = np.arange(12) % 2
+        paths = {'model': os.path.join(cls.workdir, 'model.joblib'),
+                 'label_encoder': os.path.join(cls.workdir, 'le.joblib')}
+        joblib.dump(build_classifier('centroid', X, y), paths['model'])
+        joblib.dump(LabelEncoder().fit(['LARGE_A', 'LARGE_B']), paths['label_encoder'])
+        cls.registry_dir = os.path.join(cls.workdir, 'registry')
+        ModelRegistry(cls.registry_dir).publish(paths, version='large-v1')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir)
+
+    def test_only_low_confidence_escalates(self):
+        cascade = Cascade(self.large_dir, ModelRegistry(self.registry_dir), threshold=0.7)
+        mask = cascade.needs_escalation([0.95, 0.5, -1.0, 0.69])
+        np.testing.assert_array_equal(mask, [False, True, False, True])
+
+    def test_large_stage_loads_lazily_and_classifies(self):
+        cascade = Cascade(self.large_dir, ModelRegistry(self.registry_dir))
+        self.assertIsNone(cascade.extractor)
+        families, confidence, version = cascade.classify(random_sequences(3, 40, seed=2))
+        self.assertIsNotNone(cascade.extractor)
+        self.assertEqual(version, 'large-v1')
+        self.assertTrue(set(families) <= {'LARGE_A', 'LARGE_B'})
+        self.assertEqual(confidence.shape, (3,))
+
+    def test_missing_large_classifier_falls_back(self):
+        cascade = Cascade(self.large_dir, ModelRegistry(os.path.join(self.workdir, 'empty')))
+        self.assertIsNone(cascade.classify(['MKTV']))
+        self.assertIsNotNone(cascade.last_error)
+
+    def test_escalation_rate(self):
+        cascade = Cascade(self.large_dir, ModelRegistry(self.registry_dir))
+        cascade.observe(10, 3)
+        cascade.observe(10, 1)
+        self.assertAlmostEqual(cascade.escalation_rate, 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+from src.classifier import PrototypeClassifier, KNNClassifier, build_classifier
+
+
+def make_clusters(num_classes=3, per_class=10, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_classes, dim)) * 5
+    X = np.vstack([c + rng.normal(size=(per_class, dim)) * 0.1 for c in centers])
+    y = np.repeat(np.arange(num_classes), per_class)
+    return X.astype(np.float32), y
+
+
+class TestPrototypeClassifier(unittest.TestCase):
+    def test_predicts_training_clusters(self):
+        X, y = make_clusters()
+        clf = PrototypeClassifier().fit(X, y)
+        self.assertTrue(np.array_equal(clf.predict(X), y))
+
+    def test_probabilities_sum_to_one(self):
+        X, y = make_clusters()
+        probs = PrototypeClassifier().fit(X, y).predict_proba(X)
+        self.assertEqual(probs.shape, (X.shape[0], 3))
+        self.assertTrue(np.allclose(probs.sum(axis=1), 1.0))
+
+    def test_add_new_family_without_retraining(self):
+        X, y = make_clusters(num_classes=4)
+        clf = PrototypeClassifier().fit(X[y < 3], y[y < 3])
+        clf.add(X[y == 3], y[y == 3])
+        self.assertEqual(len(clf.classes_), 4)
+        self.assertTrue(np.all(clf.predict(X[y == 3]) == 3))
+
+
+class TestKNNClassifier(unittest.TestCase):
+    def test_predicts_training_clusters(self):
+        X, y = make_clusters()
+        clf = KNNClassifier(k=3, chunk_size=7).fit(X, y)
+        self.assertTrue(np.array_equal(clf.predict(X), y))
+
+    def test_vote_fractions(self):
+        X = np.array([[1, 0], [1, 0.1], [0, 1]], dtype=np.float32)
+        y = np.array([0, 0, 1])
+        probs = KNNClassifier(k=3).fit(X, y).predict_proba(np.array([[1, 0.05]]))
+        self.assertTrue(np.allclose(probs, [[2 / 3, 1 / 3]]))
+
+    def test_add_new_family_without_retraining(self):
+        X, y = make_clusters(num_classes=4)
+        clf = KNNClassifier(k=3).fit(X[y < 3], y[y < 3])
+        clf.add(X[y == 3], y[y == 3])
+        self.assertTrue(np.all(clf.predict(X[y == 3]) == 3))
+
+    def test_unknown_backend(self):
+        X, y = make_clusters()
+        with self.assertRaises(ValueError):
+            build_classifier('svm', X, y)
+
+
+if __name__ == '__main__':
+    unittest.main()
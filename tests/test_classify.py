@@ -0,0 +1,115 @@
+import unittest
+import unittest.mock
+import csv
+import importlib.util
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+from benchmarks.common import build_tiny_esm, random_sequences
+from scripts.classify import BulkClassifier, TsvWriter, length_buckets, open_writer
+from src.classifier import build_classifier
+from src.data_loader import iter_fasta
+from src.embedding_extractor import EmbeddingExtractor
+from src.model_registry import ModelBundle
+
+
+class TestBulkClassify(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp()
+        cls.model_dir = build_tiny_esm(cls.workdir)
+        # The API embeds one sequence at a time with the default pooling
+        cls.api_extractor = EmbeddingExtractor(model_name=cls.model_dir)
+
+        X = cls.api_extractor.get_embeddings(random_sequences(12, (20, 80), seed=0))
+        y = np.arange(12) % 3
+        cls.bundle = ModelBundle('v1', build_classifier('centroid', X, y), {0: 'A', 1: 'B', 2: 'C'},
+                                 PCA(n_components=2).fit(X))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir)
+
+    def write_fasta(self, records):
+        path = os.path.join(self.workdir, 'input.fasta')
+        with open(path, 'w') as f:
+            for name, seq in records:
+                f.write(f'>{name}\n{seq}\n')
+        return path
+
+    def classify_to_rows(self, records, **kwargs):
+        output = os.path.join(self.workdir, 'out.tsv')
+        classifier = BulkClassifier(self.bundle, self.model_dir, **kwargs)
+        writer = TsvWriter(output)
+        try:
+            counts = classifier.run(iter_fasta(self.write_fasta(records)), writer)
+        finally:
+            classifier.close()
+            writer.close()
+        with open(output) as f:
+            return counts, list(csv.DictReader(f, delimiter='\t'))
+
+    def test_matches_api_code_path_row_for_row(self):
+        sequences = random_sequences(9, (10, 150), seed=5)
+        records = [(f'p{i}', seq) for i, seq in enumerate(sequences)]
+        (classified, failed), rows = self.classify_to_rows(records, batch_size=4, chunk_size=5)
+
+        self.assertEqual((classified, failed), (9, 0))
+        self.assertEqual([row['name'] for row in rows], [name for name, _ in records])
+        for row, seq in zip(rows, sequences):
+            pred_idx, confidence, coords = self.bundle.classify(self.api_extractor.get_embeddings([seq]))
+            self.assertEqual(row['family'], self.bundle.family(pred_idx[0]))
+            self.assertAlmostEqual(float(row['confidence']), confidence[0], places=4)
+            self.assertAlmostEqual(float(row['pca_x']), coords[0][0], places=4)
+            self.assertEqual(row['model_version'], 'v1')
+
+    def test_invalid_sequences_reported_inline(self):
+        records = [('ok', 'MKTVRQERLK'), ('bad', 'MKT123'), ('long', 'A' * 30)]
+        (classified, failed), rows = self.classify_to_rows(records, max_length=20)
+        self.assertEqual((classified, failed), (1, 2))
+        self.assertEqual(rows[0]['error'], '')
+        self.assertIn('Invalid characters', rows[1]['error'])
+        self.assertIn('too long', rows[2]['error'])
+        self.assertEqual(rows[1]['family'], '')
+
+    def test_cascade_escalates_like_the_api(self):
+        large = unittest.mock.Mock()
+        large.needs_escalation.side_effect = lambda conf: np.arange(len(conf)) == 1
+        large.classify.side_effect = lambda seqs: (['LARGE'] * len(seqs), np.full(len(seqs), 0.99), 'large-v1')
+        records = [('p0', 'MKTVRQERLK'), ('p1', 'MKLVAAGQW'), ('p2', 'MSTNPKPQRK')]
+        (classified, failed), rows = self.classify_to_rows(records, cascade=large)
+        self.assertEqual([row['family'] == 'LARGE' for row in rows], [False, True, False])
+        self.assertEqual([row['escalated'] for row in rows], ['False', 'True', 'False'])
+        large.classify.assert_called_once_with(['MKLVAAGQW'])
+
+        _, rows = self.classify_to_rows(records)
+        self.assertEqual([row['escalated'] for row in rows], ['', '', ''])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'Parquet output needs pyarrow')
+    def test_parquet_output_carries_escalations(self):
+        import pyarrow.parquet as pq
+
+        large = unittest.mock.Mock()
+        large.needs_escalation.side_effect = lambda conf: np.arange(len(conf)) == 0
+        large.classify.side_effect = lambda seqs: (['LARGE'] * len(seqs), np.full(len(seqs), 0.99), 'large-v1')
+        output = os.path.join(self.workdir, 'out.parquet')
+        classifier = BulkClassifier(self.bundle, self.model_dir, cascade=large)
+        writer = open_writer(output)
+        try:
+            classifier.run(iter_fasta(self.write_fasta([('p0', 'MKTVRQERLK'), ('bad', 'MKT123')])), writer)
+        finally:
+            classifier.close()
+            writer.close()
+        self.assertEqual(pq.read_table(output).column('escalated').to_pylist(), [True, None])
+
+    def test_length_buckets_sort_by_length(self):
+        buckets = length_buckets(['AAAA', 'A', 'AAA', 'AA'], 2)
+        self.assertEqual(buckets, [[1, 3], [2, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
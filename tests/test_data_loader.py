@@ -1,7 +1,7 @@
 import unittest
 import os
 import shutil
-from src.data_loader import load_fasta, clean_sequence, encode_labels
+from src.data_loader import load_fasta, clean_sequence, encode_labels, normalize_sequence
 
 class TestDataLoader(unittest.TestCase):
     def setUp(self):
@@ -26,6 +26,11 @@ class TestDataLoader(unittest.TestCase):
         cleaned = clean_sequence(raw_seq)
         self.assertEqual(cleaned, "MKTVRQXXXX")
         
+    def test_normalize_sequence(self):
+        self.assertEqual(normalize_sequence("mkt vrq\nbzjou"), ("MKTVRQXXXXX", []))
+        self.assertEqual(normalize_sequence("MK1TVé!"), ("MK1TVé!", [2, 5, 6]))
+        self.assertEqual(normalize_sequence(">seq1 desc\nMKTV\nRQ", strip_headers=True), ("MKTVRQ", []))
+
     def test_encode_labels(self):
         labels = ["FamilyA", "FamilyB", "FamilyA", "FamilyC"]
         encoded, mapping = encode_labels(labels)
@@ -0,0 +1,60 @@
+import unittest
+import random
+
+import numpy as np
+
+from benchmarks.common import random_sequences
+from src.dedup import (dedup_sequences, exact_dedup, group_train_test_split, lsh_bands,
+                       minhash_signatures, near_duplicate_clusters, train_test_indices)
+
+
+def mutate(sequence, n, seed=0):
+    rng = random.Random(seed)
+    residues = list(sequence)
+    for _ in range(n):
+        residues[rng.randrange(len(residues))] = 'W'
+    return ''.join(residues)
+
+
+class TestDedup(unittest.TestCase):
+    def test_exact_dedup_index_map_fans_out(self):
+        sequences = ['MKTV', 'AAAA', 'MKTV', 'CCCC', 'AAAA']
+        unique, index_map = exact_dedup(sequences)
+        self.assertEqual(unique, ['MKTV', 'AAAA', 'CCCC'])
+        self.assertEqual([unique[i] for i in index_map], sequences)
+
+    def test_minhash_estimates_jaccard(self):
+        a = random_sequences(1, 400, seed=1)[0]
+        signatures = minhash_signatures([a, a, mutate(a, 3), random_sequences(1, 400, seed=2)[0]], num_perm=128)
+        self.assertTrue(np.array_equal(signatures[0], signatures[1]))
+        self.assertGreater(np.mean(signatures[0] == signatures[2]), 0.8)
+        self.assertLess(np.mean(signatures[0] == signatures[3]), 0.1)
+
+    def test_near_duplicates_are_clustered(self):
+        base = random_sequences(50, (200, 300), seed=3)
+        sequences = base + [mutate(seq, 1, seed=i) for i, seq in enumerate(base[:10])]
+        clusters = near_duplicate_clusters(sequences, threshold=0.8)
+        self.assertEqual(len(np.unique(clusters)), 50)
+        np.testing.assert_array_equal(clusters[50:], np.arange(10))
+
+    def test_lsh_bands_cover_signature(self):
+        bands, rows = lsh_bands(64, 0.9)
+        self.assertEqual(bands * rows, 64)
+
+    def test_group_split_never_straddles(self):
+        sequences = random_sequences(40, 50, seed=4) * 3
+        _, _, groups = dedup_sequences(sequences)
+        train_idx, test_idx = group_train_test_split(groups, test_fraction=0.25, seed=0)
+        self.assertEqual(len(train_idx) + len(test_idx), 120)
+        self.assertFalse(set(groups[train_idx]) & set(groups[test_idx]))
+
+    def test_train_test_indices_seeded(self):
+        train, test = train_test_indices(10, seed=3)
+        self.assertEqual(sorted(np.concatenate([train, test]).tolist()), list(range(10)))
+        self.assertEqual(len(test), 2)
+        np.testing.assert_array_equal(train, train_test_indices(10, seed=3)[0])
+        self.assertEqual(len(train_test_indices(4, test_fraction=0.0)[1]), 1)  # At least one test record
+
+
+if __name__ == '__main__':
+    unittest.main()
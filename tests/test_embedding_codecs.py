@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+from scripts.encoding_report import evaluate_encodings, neighbour_recall, top_neighbours
+from src.embedding_codecs import PQCodec, ScalarInt8Codec, codec_from_state, decode_blocks, make_codec
+
+
+def clustered(n, dim=16, classes=4, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(classes, dim)) * 3
+    y = rng.integers(0, classes, size=n)
+    return (centers[y] + rng.normal(size=(n, dim))).astype(np.float32), y
+
+
+class TestCodecs(unittest.TestCase):
+    def setUp(self):
+        self.X, self.y = clustered(300)
+
+    def test_int8_error_is_half_a_step(self):
+        codec = ScalarInt8Codec().fit(self.X)
+        codes = codec.encode(self.X)
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertTrue(np.all(np.abs(codec.decode(codes) - self.X) <= codec.scale / 2 + 1e-5))
+
+    def test_pq_codes_and_vectorized_decode(self):
+        codec = PQCodec(subspaces=4, centroids=32).fit(self.X)
+        codes = codec.encode(self.X)
+        self.assertEqual(codes.shape, (300, 4))
+        self.assertEqual(codec.codebooks.shape, (4, 32, 4))
+        decoded = codec.decode(codes)
+        # Each subspace of the decoded vector is exactly the chosen centroid
+        np.testing.assert_array_equal(decoded[7, 4:8], codec.codebooks[1, codes[7, 1]])
+        self.assertLess(np.linalg.norm(decoded - self.X) / np.linalg.norm(self.X), 0.5)
+        with self.assertRaises(ValueError):
+            PQCodec(subspaces=5).fit(self.X)
+
+    def test_state_round_trip_and_blockwise_decode(self):
+        for encoding in ('float16', 'int8', 'pq8'):
+            codec = make_codec(encoding).fit(self.X)
+            codes = codec.encode(self.X)
+            restored = codec_from_state(encoding, codec.state())
+            np.testing.assert_array_equal(decode_blocks(restored, codes, block_rows=7), codec.decode(codes))
+            np.testing.assert_array_equal(decode_blocks(restored, codes, rows=[3, 1]), codec.decode(codes[[3, 1]]))
+        with self.assertRaises(ValueError):
+            make_codec('bf16')
+
+
+class TestEncodingReport(unittest.TestCase):
+    def test_recall(self):
+        exact = np.array([[0, 1, 2], [3, 4, 5]])
+        self.assertAlmostEqual(neighbour_recall(exact, np.array([[2, 1, 9], [3, 4, 5]])), 5 / 6)
+        X, _ = clustered(50)
+        self.assertEqual(neighbour_recall(top_neighbours(X, X, 5), top_neighbours(X, X.copy(), 5)), 1.0)
+
+    def test_mlp_loss_excludes_initialisation_noise(self):
+        # Random labels: accuracy is near chance and swings with the initial weights
+        X, _ = clustered(200, seed=2)
+        y = np.random.default_rng(3).integers(0, 4, size=200)
+        report = evaluate_encodings(X[:150], y[:150], X[150:], y[150:], ['float32'] * 4,
+                                    backend='mlp', recall_k=5)
+        self.assertEqual([row['accuracy_loss'] for row in report], [0.0] * 4)
+
+    def test_report_ranks_encodings(self):
+        X, y = clustered(400, seed=1)
+        report = evaluate_encodings(X[:300], y[:300], X[300:], y[300:], ['float32', 'float16', 'int8', 'pq4'],
+                                    backend='centroid', recall_k=5)
+        by_name = {row['encoding']: row for row in report}
+        self.assertEqual(by_name['float32']['recall@5'], 1.0)
+        self.assertEqual(by_name['float32']['accuracy_loss'], 0.0)
+        self.assertGreater(by_name['float16']['recall@5'], 0.95)
+        self.assertEqual(by_name['pq4']['bytes_per_vector'], 4)
+        self.assertEqual(by_name['int8']['compression'], 4.0)
+        self.assertLess(by_name['pq4']['recall@5'], by_name['int8']['recall@5'])
+
+
+if __name__ == '__main__':
+    unittest.main()
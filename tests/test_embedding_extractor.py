@@ -0,0 +1,99 @@
+import unittest
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import build_tiny_esm, random_sequences
+from src.embedding_extractor import EmbeddingExtractor, window_spans
+
+
+class TestWindowSpans(unittest.TestCase):
+    def test_short_sequence_is_one_window(self):
+        self.assertEqual(window_spans(100, 510, 255), [(0, 100)])
+
+    def test_windows_overlap_and_cover_the_end(self):
+        spans = window_spans(1000, 400, 300)
+        self.assertEqual(spans, [(0, 400), (300, 700), (600, 1000)])
+        self.assertTrue(all(end - start == 400 for start, end in spans))
+
+
+class TestWindowedEmbeddings(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp()
+        cls.model_dir = build_tiny_esm(cls.workdir)
+        cls.plain = EmbeddingExtractor(model_name=cls.model_dir)
+        cls.windowed = EmbeddingExtractor(model_name=cls.model_dir, window=64, stride=32)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir)
+
+    def test_short_sequences_match_single_sequence_embedding(self):
+        sequences = random_sequences(3, (20, 60), seed=1)
+        windowed = self.windowed.get_embeddings(sequences, batch_size=3)
+        for seq, emb in zip(sequences, windowed):
+            np.testing.assert_allclose(emb, self.plain.get_embeddings([seq])[0], atol=1e-5)
+
+    def test_long_sequence_is_length_weighted_mean_of_windows(self):
+        seq = random_sequences(1, 150, seed=2)[0]
+        spans = window_spans(len(seq), 64, 32)
+        parts = np.stack([self.plain.get_embeddings([seq[s:e]])[0] for s, e in spans])
+        weights = np.array([e - s for s, e in spans], dtype=np.float32)
+        expected = (parts * weights[:, None]).sum(axis=0) / weights.sum()
+        np.testing.assert_allclose(self.windowed.get_embeddings([seq])[0], expected, atol=1e-5)
+
+    def test_result_does_not_depend_on_batching(self):
+        sequences = random_sequences(4, (30, 200), seed=3)
+        np.testing.assert_allclose(self.windowed.get_embeddings(sequences, batch_size=1),
+                                   self.windowed.get_embeddings(sequences, batch_size=16), atol=1e-5)
+
+    def test_fast_tokenizer_gives_identical_embeddings(self):
+        self.assertIsNotNone(self.plain.fast_tokenizer)
+        hf_only = EmbeddingExtractor(model_name=self.model_dir, fast_tokenizer=False)
+        sequences = random_sequences(6, (10, 120), seed=4)
+        np.testing.assert_array_equal(self.plain.get_embeddings(sequences), hf_only.get_embeddings(sequences))
+
+    def test_layers_from_one_forward_pass(self):
+        sequences = random_sequences(4, (20, 90), seed=5)
+        features = self.plain.get_embeddings(sequences, layers=[1, -1, 'avg'])
+        self.assertEqual(list(features), ['layer_1', 'layer_2', 'layer_avg'])
+        np.testing.assert_allclose(features['layer_2'], self.plain.get_embeddings(sequences), atol=1e-6)
+        np.testing.assert_allclose(features['layer_avg'], (features['layer_1'] + features['layer_2']) / 2, atol=1e-5)
+
+    def test_windowed_layers_match_default_output(self):
+        seq = random_sequences(1, 150, seed=6)
+        features = self.windowed.get_embeddings(seq, layers=[-1, 0])
+        np.testing.assert_allclose(features['layer_2'], self.windowed.get_embeddings(seq), atol=1e-6)
+        self.assertEqual(features['layer_0'].shape, (1, 64))
+
+    def test_residue_states_one_row_per_residue(self):
+        sequences = random_sequences(3, (15, 60), seed=7) + ['M' * 600]
+        pooled, residues = self.plain.get_embeddings(sequences, return_residues=True)
+        np.testing.assert_allclose(pooled, self.plain.get_embeddings(sequences), atol=1e-6)
+        self.assertEqual([r.shape for r in residues],
+                         [(len(seq), 64) for seq in sequences[:3]] + [(510, 64)])
+        # Padding in a batch does not change a sequence's residue states
+        alone = self.plain.get_embeddings(sequences[:1], return_residues=True)[1][0]
+        np.testing.assert_allclose(residues[0], alone, atol=1e-5)
+
+    def test_windowed_residues_cover_long_sequences(self):
+        seq = random_sequences(1, 150, seed=8)
+        _, residues = self.windowed.get_embeddings(seq, return_residues=True)
+        self.assertEqual(residues[0].shape, (150, 64))
+        short = random_sequences(1, 40, seed=9)
+        np.testing.assert_allclose(self.windowed.get_embeddings(short, return_residues=True)[1][0],
+                                   self.plain.get_embeddings(short, return_residues=True)[1][0], atol=1e-5)
+
+    def test_layer_out_of_range_rejected(self):
+        with self.assertRaises(ValueError):
+            self.plain.resolve_layers([3])
+
+    def test_invalid_window_rejected(self):
+        with self.assertRaises(ValueError):
+            EmbeddingExtractor(model_name=self.model_dir, window=1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from scripts.fit_layer_mix import mix_weights, probe_scores
+from src.dedup import train_test_indices
+from src.embedding_store import EmbeddingStore, RaggedStore
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.root = os.path.join(self.workdir, 'store')
+        rng = np.random.default_rng(0)
+        self.features = {'layer_3': rng.normal(size=(10, 4)).astype(np.float32),
+                         'layer_6': rng.normal(size=(10, 4)).astype(np.float32)}
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_features_written_in_blocks_read_back_memory_mapped(self):
+        store = EmbeddingStore.create(self.root, 10, {'layer_3': 4, 'layer_6': 4}, attrs={'model': 'tiny'})
+        store.write_rows(0, {name: values[:6] for name, values in self.features.items()})
+        store.write_rows(6, {name: values[6:] for name, values in self.features.items()})
+        store.flush()
+
+        reopened = EmbeddingStore(self.root)
+        self.assertEqual(reopened.features, ['layer_3', 'layer_6'])
+        self.assertEqual(reopened.attrs, {'model': 'tiny'})
+        self.assertIsInstance(reopened.read('layer_6'), np.memmap)
+        np.testing.assert_array_equal(reopened.read('layer_3', rows=[2, 7]), self.features['layer_3'][[2, 7]])
+        with self.assertRaises(KeyError):
+            reopened.read('layer_1')
+
+    def test_layer_average(self):
+        store = EmbeddingStore.create(self.root, 10, {'layer_3': 4, 'layer_6': 4})
+        store.write_rows(0, self.features)
+        mix = store.layer_average(['layer_3', 'layer_6'], weights=[1, 3], block_rows=3)
+        expected = 0.25 * self.features['layer_3'] + 0.75 * self.features['layer_6']
+        np.testing.assert_allclose(mix, expected, atol=1e-6)
+
+    def test_learned_layer_mix(self):
+        # layer_3 is noise, layer_6 separates the two classes
+        rng = np.random.default_rng(1)
+        y = np.arange(200) % 2
+        features = {'layer_3': rng.normal(size=(200, 4)).astype(np.float32),
+                    'layer_6': (rng.normal(size=(200, 4)) + 3 * y[:, None]).astype(np.float32)}
+        store = EmbeddingStore.create(self.root, 200, {'layer_3': 4, 'layer_6': 4})
+        store.write_rows(0, features)
+        train_idx, _ = train_test_indices(200, seed=0)
+        scores = probe_scores(store, ['layer_3', 'layer_6'], y, train_idx)
+        weights = mix_weights(scores)
+        self.assertGreater(scores[1], scores[0])
+        self.assertGreater(weights[1], 0.9)
+
+        store.update_attrs(layer_mix={'layers': ['layer_3', 'layer_6'], 'weights': weights.tolist(), 'split_seed': 0})
+        reopened = EmbeddingStore(self.root)
+        np.testing.assert_allclose(reopened.read('layer_mix'),
+                                   reopened.layer_average(['layer_3', 'layer_6'], weights), atol=1e-6)
+        np.testing.assert_allclose(reopened.read('layer_mix', rows=[3, 5]), reopened.read('layer_mix')[[3, 5]])
+
+    def test_encode_feature_in_place(self):
+        store = EmbeddingStore.create(self.root, 10, {'layer_3': 4, 'layer_6': 4})
+        store.write_rows(0, self.features)
+        store.encode('layer_3', 'float16')
+        store.encode('layer_6', 'pq2')
+
+        reopened = EmbeddingStore(self.root)
+        self.assertEqual(reopened.encoding('layer_3'), 'float16')
+        self.assertEqual(reopened.raw('layer_6').dtype, np.uint8)
+        self.assertEqual(reopened.raw('layer_6').shape, (10, 2))
+        self.assertEqual(sorted(os.listdir(self.root)),
+                         ['layer_3.float16.npy', 'layer_6.pq2.codec.npz', 'layer_6.pq2.npy', 'store.json'])
+        np.testing.assert_allclose(reopened.read('layer_3', block_rows=3), self.features['layer_3'], atol=2e-3)
+        # 10 rows, <= 10 centroids per subspace: every vector is its own centroid
+        np.testing.assert_allclose(reopened.read('layer_6', rows=[4]), self.features['layer_6'][[4]], atol=1e-5)
+        self.assertLess(reopened.nbytes('layer_3'), 10 * 4 * 4 + 256)
+        mix = reopened.layer_average(['layer_3', 'layer_6'], block_rows=4)
+        np.testing.assert_allclose(mix, 0.5 * (self.features['layer_3'] + self.features['layer_6']), atol=2e-3)
+
+    def test_grow_in_place_and_compact(self):
+        store = EmbeddingStore.create(self.root, 6, {'layer_3': 4, 'layer_6': 4})
+        store.write_rows(0, {name: values[:6] for name, values in self.features.items()})
+        codec = store.encode('layer_6', 'int8')
+        store.grow(10)
+        store.write_rows(6, {name: values[6:] for name, values in self.features.items()})
+        store.flush()
+
+        reopened = EmbeddingStore(self.root)
+        self.assertEqual(reopened.rows, 10)
+        np.testing.assert_array_equal(reopened.read('layer_3'), self.features['layer_3'])
+        # Appended rows reuse the codec fitted on the first six (values outside its range clip)
+        np.testing.assert_allclose(reopened.read('layer_6')[6:],
+                                   codec.decode(codec.encode(self.features['layer_6'][6:])), atol=1e-6)
+        reopened.compact([1, 7, 9])
+        self.assertEqual(EmbeddingStore(self.root).rows, 3)
+        np.testing.assert_array_equal(reopened.read('layer_3'), self.features['layer_3'][[1, 7, 9]])
+
+
+class TestRaggedStore(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        rng = np.random.default_rng(1)
+        self.records = [rng.normal(size=(n, 8)).astype(np.float32) for n in (5, 1, 12, 3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write(self, dtype, index=None):
+        writer = RaggedStore.create(os.path.join(self.workdir, dtype), 8, dtype=dtype)
+        for matrix in self.records:
+            writer.append(matrix)
+        return writer.close(index=index)
+
+    def test_float16_round_trip(self):
+        store = self.write('float16')
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.lengths().tolist(), [5, 1, 12, 3])
+        self.assertEqual(store.raw(2).dtype, np.float16)
+        for i, matrix in enumerate(self.records):
+            np.testing.assert_allclose(store[i], matrix, atol=2e-3)
+
+    def test_int8_quantization_error_is_bounded(self):
+        store = self.write('int8')
+        for i, matrix in enumerate(self.records):
+            step = np.abs(matrix).max(axis=1, keepdims=True) / 127
+            self.assertTrue(np.all(np.abs(store[i] - matrix) <= step / 2 + 1e-6))
+
+    def test_index_maps_duplicate_records(self):
+        store = self.write('float16', index=[0, 1, 2, 3, 2])
+        self.assertEqual(len(store), 5)
+        np.testing.assert_array_equal(store[4], store[2])
+        self.assertEqual(store.lengths().tolist(), [5, 1, 12, 3, 12])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import csv
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support, top_k_accuracy_score
+
+from scripts.evaluate import cross_validate, evaluate_probabilities
+from src.evaluation import Evaluation, stratified_kfold, top_confusions, write_report
+
+
+def random_predictions(n=1000, classes=12, seed=0):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, classes, size=n)
+    logits = rng.normal(size=(n, classes))
+    logits[np.arange(n), y] += 1.5
+    proba = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    return y, proba
+
+
+class TestEvaluation(unittest.TestCase):
+    def test_streamed_metrics_match_sklearn(self):
+        y, proba = random_predictions()
+        evaluation = evaluate_probabilities(proba, y, 12, chunk_size=97, top_k=(1, 3))
+        pred = proba.argmax(axis=1)
+        np.testing.assert_array_equal(evaluation.confusion, confusion_matrix(y, pred, labels=range(12)))
+
+        report = evaluation.report()
+        precision, recall, f1, support = precision_recall_fscore_support(y, pred, labels=range(12), zero_division=0)
+        np.testing.assert_allclose([row['f1'] for row in report['per_class']], f1)
+        np.testing.assert_allclose([row['precision'] for row in report['per_class']], precision)
+        self.assertAlmostEqual(report['macro']['recall'], recall.mean())
+        self.assertAlmostEqual(report['top_k_accuracy']['3'], top_k_accuracy_score(y, proba, k=3, labels=range(12)))
+        self.assertAlmostEqual(report['accuracy'], report['top_k_accuracy']['1'])
+        self.assertEqual(sum(b['count'] for b in report['calibration']), 1000)
+
+    def test_calibration_error(self):
+        # Always 80% confident and right 3 times in 4: ECE = |0.75 - 0.8|
+        proba = np.tile([[0.8, 0.2]], (4, 1))
+        evaluation = Evaluation(2, top_k=(1,), bins=10)
+        evaluation.update([0, 0, 0, 1], proba)
+        _, ece = evaluation.calibration()
+        self.assertAlmostEqual(ece, 0.05)
+
+    def test_probability_columns_map_to_classes(self):
+        # A classifier that only saw classes 1 and 3
+        evaluation = Evaluation(4, top_k=(1, 2))
+        evaluation.update([3, 1, 0], np.array([[0.2, 0.8], [0.9, 0.1], [0.6, 0.4]]), classes=[1, 3])
+        self.assertEqual(evaluation.confusion[3, 3], 1)
+        self.assertEqual(evaluation.confusion[1, 1], 1)
+        self.assertEqual(evaluation.confusion[0, 1], 1)
+        self.assertEqual(evaluation.top_k_hits.tolist(), [2, 2])  # Class 0 can never be a hit
+
+    def test_top_confusions_are_sparse(self):
+        confusion = np.array([[5, 3, 0], [1, 7, 4], [0, 0, 2]])
+        self.assertEqual(top_confusions(confusion, 2), [(1, 2, 4), (0, 1, 3)])
+
+    def test_stratified_folds(self):
+        y = np.repeat(np.arange(5), [50, 20, 7, 3, 1])
+        folds = stratified_kfold(y, 5, seed=1)
+        tested = np.concatenate([test for _, test in folds])
+        self.assertEqual(sorted(tested.tolist()), list(range(len(y))))
+        for train, test in folds:
+            self.assertEqual(len(np.intersect1d(train, test)), 0)
+            self.assertEqual(np.count_nonzero(y[test] == 0), 10)
+            self.assertEqual(np.count_nonzero(y[test] == 1), 4)
+        self.assertEqual([len(t) for _, t in folds], [len(t) for _, t in stratified_kfold(y, 5, seed=1)])
+
+    def test_cross_validation_writes_reports(self):
+        rng = np.random.default_rng(0)
+        centers = rng.normal(size=(6, 8)) * 4
+        y = np.repeat(np.arange(6), 20)
+        X = (centers[y] + rng.normal(size=(120, 8))).astype(np.float32)
+        probabilities = np.zeros((120, 6), dtype=np.float32)
+        evaluation = cross_validate(X, y, 6, folds=4, backend='centroid', chunk_size=16,
+                                    probabilities=probabilities, top_k=(1, 2))
+        self.assertEqual(evaluation.n, 120)
+        self.assertGreater(evaluation.report()['accuracy'], 0.9)
+        # Saved out-of-fold probabilities reproduce the same report
+        replay = evaluate_probabilities(probabilities, y, 6, top_k=(1, 2))
+        np.testing.assert_array_equal(replay.confusion, evaluation.confusion)
+
+        workdir = tempfile.mkdtemp()
+        try:
+            report = evaluation.report([f'F{i}' for i in range(6)], confusions=3)
+            paths = [os.path.join(workdir, name) for name in ('report.json', 'per_class.csv', 'confusions.csv')]
+            write_report(report, *paths)
+            with open(paths[0]) as f:
+                self.assertLessEqual(len(json.load(f)['top_confusions']), 3)
+            with open(paths[1]) as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([row['class'] for row in rows], [f'F{i}' for i in range(6)])
+        finally:
+            shutil.rmtree(workdir)
+
+    def test_mlp_cross_validation_is_repeatable(self):
+        # Random labels keep accuracy near chance, where it depends on the initial weights
+        rng = np.random.default_rng(4)
+        X = rng.normal(size=(80, 8)).astype(np.float32)
+        y = rng.integers(0, 4, size=80)
+        runs = [cross_validate(X, y, 4, folds=2, backend='mlp', seed=7, top_k=(1,)) for _ in range(3)]
+        for evaluation in runs[1:]:
+            np.testing.assert_array_equal(evaluation.confusion, runs[0].confusion)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from src.explainer import build_prompt, build_family_prompt
+
+
+class TestExplainerPrompts(unittest.TestCase):
+    def test_equivalent_requests_share_a_key(self):
+        _, key_a = build_prompt('oxygen  transport', 0.9912, 'vhltpeek')
+        _, key_b = build_prompt('OXYGEN TRANSPORT ', 0.9908, 'VHLT PEEK')
+        self.assertEqual(key_a, key_b)
+
+    def test_prompt_mode_depends_on_sequence(self):
+        _, key_a = build_prompt('OXYGEN TRANSPORT', 0.99, 'VHLTPEEK')
+        _, key_b = build_prompt('OXYGEN TRANSPORT', 0.99, 'MKTVRQ')
+        self.assertNotEqual(key_a, key_b)
+
+    def test_family_mode_ignores_sequence(self):
+        prompt_a, key_a = build_prompt('Oxygen transport', 0.5, 'VHLTPEEK', key_mode='family')
+        prompt_b, key_b = build_family_prompt('OXYGEN TRANSPORT')
+        self.assertEqual((prompt_a, key_a), (prompt_b, key_b))
+        self.assertIn('OXYGEN TRANSPORT', prompt_a)
+        self.assertNotIn('VHLTPEEK', prompt_a)
+
+    def test_unknown_key_mode(self):
+        with self.assertRaises(ValueError):
+            build_prompt('HYDROLASE', 0.5, 'MKT', key_mode='sequence')
+
+
+if __name__ == '__main__':
+    unittest.main()
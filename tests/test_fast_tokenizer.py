@@ -0,0 +1,48 @@
+import unittest
+import shutil
+import tempfile
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from benchmarks.common import build_tiny_esm, random_sequences
+from src.fast_tokenizer import ByteTokenizer
+
+
+class TestByteTokenizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp()
+        cls.hf = AutoTokenizer.from_pretrained(build_tiny_esm(cls.workdir))
+        cls.fast = ByteTokenizer.from_hf(cls.hf)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir)
+
+    def test_compatible_vocab_is_detected(self):
+        self.assertIsNotNone(self.fast)
+
+    def test_matches_hf_token_for_token(self):
+        batches = [
+            random_sequences(16, (1, 300), seed=1),
+            random_sequences(4, (500, 900), seed=2),  # Truncated at 512 tokens
+            ["MKTVXBZUO", "A"],
+        ]
+        for batch in batches:
+            self.assertTrue(self.fast.matches(self.hf, batch))
+
+    def test_bucket_padding(self):
+        inputs = self.fast(["MKTV", "MKTVRQERLK"], pad_to_multiple_of=32)
+        self.assertEqual(tuple(inputs["input_ids"].shape), (2, 32))
+        np.testing.assert_array_equal(inputs["attention_mask"].sum(dim=1).numpy(), [6, 12])
+        np.testing.assert_array_equal(inputs["input_ids"][0, :7].numpy(),
+                                      self.hf("MKTV")["input_ids"] + [self.hf.pad_token_id])
+
+    def test_unknown_characters_fall_back(self):
+        self.assertIsNone(self.fast(["MKtv"]))
+        self.assertIsNone(self.fast(["MKTVé"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+
+from scripts.job_worker import run_job
+from src.job_queue import JobStore, QueueFullError
+
+
+def echo_handler(items):
+    return [{'name': item['name'], 'error': None if item['sequence'] else 'No sequence provided'}
+            for item in items]
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.workdir, 'jobs.sqlite3'), max_running_per_owner=1,
+                              max_queued_per_owner=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def items(self, n):
+        return [{'name': f'p{i}', 'sequence': 'MKTV' if i % 4 else ''} for i in range(n)]
+
+    def test_claims_highest_priority_first(self):
+        low = self.store.submit('classify', self.items(2), owner='a', priority=1)
+        high = self.store.submit('classify', self.items(2), owner='b', priority=8)
+        self.assertEqual(self.store.claim('w1')['job_id'], high)
+        self.assertEqual(self.store.claim('w2')['job_id'], low)
+        self.assertIsNone(self.store.claim('w3'))
+
+    def test_per_owner_running_cap(self):
+        first = self.store.submit('classify', self.items(2), owner='a', priority=9)
+        self.store.submit('classify', self.items(2), owner='a', priority=9)
+        other = self.store.submit('classify', self.items(2), owner='b', priority=0)
+        self.assertEqual(self.store.claim('w1')['job_id'], first)
+        # Owner a is at its cap, so b's lower-priority job runs next
+        self.assertEqual(self.store.claim('w2')['job_id'], other)
+        self.assertIsNone(self.store.claim('w3'))
+
+    def test_queued_limit_per_owner(self):
+        for _ in range(3):
+            self.store.submit('classify', self.items(1), owner='a')
+        with self.assertRaises(QueueFullError):
+            self.store.submit('classify', self.items(1), owner='a')
+        self.store.submit('classify', self.items(1), owner='b')
+
+    def test_run_job_stores_paginated_results_and_progress(self):
+        job_id = self.store.submit('classify', self.items(10), owner='a')
+        run_job(self.store, self.store.claim('w1'), {'classify': echo_handler}, chunk_size=3)
+
+        job = self.store.get(job_id)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['progress'], {'processed': 10, 'total': 10, 'failed': 3, 'fraction': 1.0})
+        page = self.store.results(job_id, offset=4, limit=4)
+        self.assertEqual([row['name'] for row in page], ['p4', 'p5', 'p6', 'p7'])
+
+    def test_stale_job_resumes_after_last_stored_item(self):
+        job_id = self.store.submit('classify', self.items(6), owner='a')
+        job = self.store.claim('w1')
+        self.store.record_results(job_id, 0, echo_handler(job['items'][:2]))
+        time.sleep(0.01)
+        self.assertEqual(self.store.requeue_stale(timeout=0), 1)
+
+        seen = []
+        def handler(items):
+            seen.extend(item['name'] for item in items)
+            return echo_handler(items)
+        run_job(self.store, self.store.claim('w2'), {'classify': handler}, chunk_size=10)
+        self.assertEqual(seen, ['p2', 'p3', 'p4', 'p5'])
+        self.assertEqual(len(self.store.results(job_id, limit=100)), 6)
+
+    def test_heartbeat_keeps_long_chunk_running(self):
+        job_id = self.store.submit('fold', self.items(2), owner='a')
+        job = self.store.claim('w1')
+        requeued = []
+
+        def slow_handler(items):
+            time.sleep(0.3)  # One chunk outlasting the stale timeout below
+            requeued.append(self.store.requeue_stale(timeout=0.15))
+            return echo_handler(items)
+        run_job(self.store, job, {'fold': slow_handler}, chunk_size=2, heartbeat_seconds=0.05)
+        self.assertEqual(requeued, [0])
+        self.assertEqual(self.store.get(job_id)['status'], 'done')
+
+    def test_heartbeat_reports_finished_job(self):
+        job_id = self.store.submit('classify', self.items(2), owner='a')
+        self.store.claim('w1')
+        self.assertTrue(self.store.heartbeat(job_id))
+        self.store.cancel(job_id)
+        self.assertFalse(self.store.heartbeat(job_id))
+
+    def test_cancel_stops_worker(self):
+        job_id = self.store.submit('classify', self.items(6), owner='a')
+        job = self.store.claim('w1')
+        self.assertTrue(self.store.cancel(job_id))
+        run_job(self.store, job, {'classify': echo_handler}, chunk_size=2)
+        self.assertEqual(self.store.get(job_id)['status'], 'cancelled')
+        self.assertEqual(self.store.results(job_id), [])
+        self.assertFalse(self.store.cancel(job_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks.common import build_tiny_esm, random_sequences
+from scripts.process_data import run, update_store
+from src.embedding_store import EmbeddingStore
+from src.manifest import Manifest, record_ids
+
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.manifest = Manifest(os.path.join(self.workdir, 'manifest.sqlite3'))
+
+    def tearDown(self):
+        self.manifest.close()
+        shutil.rmtree(self.workdir)
+
+    def build(self, records, model='esm', pooling='masked_mean'):
+        diff = self.manifest.diff(records, model, pooling)
+        start = self.manifest.rows
+        new_rows = {seq_hash: start + i for i, seq_hash in enumerate(diff.to_embed)}
+        return diff, new_rows, self.manifest.commit(diff, new_rows, model, pooling)
+
+    def test_only_new_and_changed_sequences_are_embedded(self):
+        diff, new_rows, generation = self.build([('a', 'MKV'), ('b', 'MLL'), ('c', 'MKV')])
+        self.assertEqual(list(diff.to_embed.values()), ['MKV', 'MLL'])  # identical sequences share a row
+        self.assertEqual(generation, 1)
+        self.assertEqual(self.manifest.record_rows(['a', 'b', 'c']).tolist(), [0, 1, 0])
+
+        diff, new_rows, generation = self.build([('a', 'MKV'), ('b', 'MWW'), ('d', 'MAA')])
+        self.assertEqual((diff.added, diff.changed, diff.removed, diff.unchanged), (['d'], ['b'], ['c'], 1))
+        self.assertEqual(list(diff.to_embed.values()), ['MWW', 'MAA'])
+        self.assertEqual(self.manifest.record_rows(['a', 'b', 'd']).tolist(), [0, 2, 3])
+        self.assertEqual(self.manifest.changes(1), {'added': [2, 3], 'removed': [1], 'records': ['b', 'd']})
+        self.assertEqual(self.manifest.live_rows().tolist(), [0, 2, 3])
+
+        # A returning sequence revives its tombstoned row instead of being re-embedded
+        diff, _, _ = self.build([('a', 'MKV'), ('b', 'MLL'), ('d', 'MAA')])
+        self.assertEqual(diff.to_embed, {})
+        self.assertEqual(self.manifest.record_rows(['b']).tolist(), [1])
+        self.assertTrue(self.build([('a', 'MKV'), ('b', 'MLL'), ('d', 'MAA')])[0].empty)
+
+    def test_model_or_pooling_change_re_embeds(self):
+        self.build([('a', 'MKV')])
+        diff, _, _ = self.build([('a', 'MKV')], pooling='masked_mean/window=100/stride=50')
+        self.assertEqual((diff.changed, len(diff.to_embed)), (['a'], 1))
+
+    def test_compact_renumbers_rows(self):
+        self.build([('a', 'MKV'), ('b', 'MLL'), ('c', 'MAA')])
+        self.build([('a', 'MKV'), ('c', 'MAA')])
+        keep = self.manifest.compact()
+        self.assertEqual(keep.tolist(), [0, 2])
+        self.assertEqual(self.manifest.record_rows(['a', 'c']).tolist(), [0, 1])
+        self.assertEqual(self.manifest.rows, 2)
+        self.assertIsNone(self.manifest.changes(1))
+        self.assertEqual(self.manifest.changes(self.manifest.generation)['added'], [])
+
+    def test_repeated_headers_get_distinct_ids(self):
+        self.assertEqual(record_ids(['x', 'y', 'x', 'x']), ['x', 'y', 'x#1', 'x#2'])
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.workdir = tempfile.mkdtemp()
+        cls.model_dir = build_tiny_esm(cls.workdir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.workdir)
+
+    def args(self, output_dir, compact=False):
+        return argparse.Namespace(output_dir=output_dir, model=self.model_dir, window=None, stride=None,
+                                  layers='1', compact=compact)
+
+    def test_rebuild_matches_fresh_build(self):
+        seqs = random_sequences(8, (20, 60), seed=4)
+        output = os.path.join(self.workdir, 'incremental')
+        update_store(self.args(output), [f'p{i}' for i in range(6)], seqs[:6])
+        ids = ['p0', 'p1', 'p3', 'p4', 'p5', 'p6']
+        current = [seqs[0], seqs[7], seqs[3], seqs[4], seqs[5], seqs[6]]
+        embeddings = update_store(self.args(output), ids, current)
+        with open(os.path.join(output, 'store', 'changes.json')) as f:
+            self.assertEqual(json.load(f)['removed'], [1, 2])
+        compacted = update_store(self.args(output, compact=True), ids, current)
+        self.assertEqual(EmbeddingStore(os.path.join(output, 'store')).rows, 6)
+
+        fresh = update_store(self.args(os.path.join(self.workdir, 'fresh')), ids, current)
+        np.testing.assert_allclose(embeddings, fresh, atol=1e-5)
+        np.testing.assert_allclose(compacted, fresh, atol=1e-5)
+
+    def test_full_build_matches_incremental_build(self):
+        seqs = random_sequences(6, (20, 60), seed=5)
+        fasta = os.path.join(self.workdir, 'pooling.fasta')
+        with open(fasta, 'w') as f:
+            f.writelines(f'>p{i}\n{seq}\n' for i, seq in enumerate(seqs))
+        output = os.path.join(self.workdir, 'full')
+        run(argparse.Namespace(input=fasta, output_dir=output, model=self.model_dir, window=None, stride=None,
+                               dedup='none', near_threshold=0.9, layers='1', store_encoding=None, residues=None,
+                               incremental=False, compact=False, profile=None))
+
+        ids = record_ids([f'p{i}' for i in range(6)])
+        incremental = update_store(self.args(os.path.join(self.workdir, 'pooled')), ids, seqs)
+        np.testing.assert_allclose(np.load(os.path.join(output, 'embeddings.npy')), incremental, atol=1e-5)
+        self.assertEqual(EmbeddingStore(os.path.join(output, 'store')).attrs['pooling'], 'masked_mean')
+
+    def test_groups_follow_the_latest_build(self):
+        seqs = random_sequences(3, (20, 40), seed=6)
+        fasta = os.path.join(self.workdir, 'groups.fasta')
+        with open(fasta, 'w') as f:
+            f.writelines(f'>p{i}\n{seq}\n' for i, seq in enumerate(seqs + seqs[:1]))
+        output = os.path.join(self.workdir, 'groups')
+        groups_path = os.path.join(output, 'groups.npy')
+
+        def build(dedup, incremental):
+            run(argparse.Namespace(input=fasta, output_dir=output, model=self.model_dir, window=None, stride=None,
+                                   dedup=dedup, near_threshold=0.9, layers=None, store_encoding=None,
+                                   residues=None, incremental=incremental, compact=False, profile=None))
+
+        build('exact', incremental=True)
+        self.assertEqual(np.load(groups_path).tolist(), [0, 1, 2, 0])
+        build('none', incremental=False)
+        self.assertFalse(os.path.exists(groups_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
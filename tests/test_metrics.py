@@ -0,0 +1,49 @@
+import unittest
+import threading
+from src.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        self.metrics.counter('requests_total', 'Requests.')
+        self.metrics.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+
+    def test_counters_sum_across_threads(self):
+        def worker():
+            for _ in range(1000):
+                self.metrics.inc('requests_total', endpoint='predict')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertIn('requests_total{endpoint="predict"} 4000', self.metrics.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.05, 0.5, 5.0):
+            self.metrics.observe('latency_seconds', value, stage='forward')
+        text = self.metrics.render()
+        self.assertIn('latency_seconds_bucket{stage="forward",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{stage="forward",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{stage="forward",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{stage="forward"} 3', text)
+
+    def test_sampled_histograms_are_scaled(self):
+        metrics = MetricsRegistry(sample_every=4)
+        metrics.histogram('latency_seconds', 'Latency.', buckets=(1.0,))
+        for _ in range(8):
+            with metrics.timer('latency_seconds'):
+                pass
+        self.assertIn('latency_seconds_count 8', metrics.render())
+
+    def test_collectors(self):
+        self.metrics.add_collector(lambda: [('cache_hits_total', 'counter', 'Hits.', {'cache': 'fold'}, 3)])
+        text = self.metrics.render()
+        self.assertIn('# TYPE cache_hits_total counter', text)
+        self.assertIn('cache_hits_total{cache="fold"} 3', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
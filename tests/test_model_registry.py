@@ -0,0 +1,120 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+from src.classifier import build_classifier
+from src.model_registry import ModelLoadError, ModelRegistry
+
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.registry = ModelRegistry(os.path.join(self.workdir, 'registry'), backend='mlp')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write_artifacts(self, families, seed=0):
+        """Saves a centroid model, label encoder and embeddings; returns the artifact paths."""
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(30, 8)).astype(np.float32)
+        y = np.arange(30) % len(families)
+        paths = {name: os.path.join(self.workdir, f'{name}-{seed}.{ext}')
+                 for name, ext in (('model', 'joblib'), ('label_encoder', 'joblib'),
+                                   ('embeddings', 'npy'), ('labels', 'npy'))}
+        joblib.dump(build_classifier('centroid', X, y), paths['model'])
+        joblib.dump(LabelEncoder().fit(families), paths['label_encoder'])
+        np.save(paths['embeddings'], X)
+        np.save(paths['labels'], y)
+        return paths
+
+    def test_publish_activate_and_load(self):
+        v1 = self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        self.registry.publish(self.write_artifacts(['C', 'D', 'E'], seed=1), version='v2', activate=False)
+        self.assertEqual(self.registry.versions(), ['v1', 'v2'])
+        self.assertEqual(self.registry.current_version(), v1)
+
+        bundle = self.registry.load()
+        self.assertEqual(bundle.version, 'v1')
+        self.assertEqual(bundle.family(1), 'B')
+        self.assertEqual(bundle.embeddings_2d.shape, (30, 2))
+
+    def test_swap_leaves_in_flight_bundle_intact(self):
+        self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        self.registry.publish(self.write_artifacts(['C', 'D', 'E'], seed=1), version='v2', activate=False)
+        in_flight = self.registry.load()
+
+        self.registry.activate('v2')
+        self.registry.load()
+        self.assertEqual(self.registry.active.version, 'v2')
+        self.assertEqual(in_flight.version, 'v1')
+        self.assertEqual(in_flight.family(0), 'A')
+
+    def test_unversioned_fallback(self):
+        self.registry.fallback_paths = self.write_artifacts(['A', 'B'])
+        self.assertEqual(self.registry.load().version, 'unversioned')
+
+    def test_unknown_version_keeps_active(self):
+        self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        self.registry.load()
+        with self.assertRaises(ValueError):
+            self.registry.load('missing')
+        self.assertEqual(self.registry.active.version, 'v1')
+
+    def test_missing_model_keeps_active(self):
+        self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        self.registry.load()
+        self.registry.publish(self.write_artifacts(['C', 'D'], seed=1), version='v2')
+        os.remove(self.registry.paths_for('v2')['model'])
+        with self.assertRaises(ModelLoadError):
+            self.registry.load()
+        self.assertEqual(self.registry.active.version, 'v1')
+        self.assertIn('v2', self.registry.last_error)
+
+    def test_broken_label_encoder_keeps_active(self):
+        self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        self.registry.load()
+        paths = self.write_artifacts(['C', 'D'], seed=1)
+        with open(paths['label_encoder'], 'wb') as f:
+            f.write(b'not a joblib file')
+        self.registry.publish(paths, version='v2')
+        with self.assertRaises(ModelLoadError):
+            self.registry.load()
+        self.assertEqual(self.registry.active.version, 'v1')
+
+    def test_partial_publish_inherits_from_current(self):
+        self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        new_model = self.write_artifacts(['A', 'B'], seed=1)['model']
+        self.registry.publish({'model': new_model}, version='v2')
+        paths = self.registry.paths_for('v2')
+        self.assertTrue(all(os.path.exists(path) for path in paths.values()))
+        self.assertEqual(self.registry.load().version, 'v2')
+
+    def test_incomplete_publish_rejected(self):
+        paths = self.write_artifacts(['A', 'B'])
+        with self.assertRaises(ValueError):
+            self.registry.publish({'model': paths['model']}, version='v1')
+        self.registry.publish(paths, version='v1')
+        with self.assertRaises(ValueError):
+            self.registry.publish({'model': paths['model']}, version='v2', inherit=False)
+        self.assertEqual(self.registry.versions(), ['v1'])
+
+    def test_watcher_picks_up_new_current(self):
+        self.registry.publish(self.write_artifacts(['A', 'B']), version='v1')
+        self.registry.load()
+        self.registry.watch(interval=0.05)
+        self.registry.publish(self.write_artifacts(['C', 'D'], seed=1), version='v2')
+        deadline = time.time() + 5
+        while self.registry.active.version != 'v2' and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(self.registry.active.version, 'v2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import unittest.mock
+import gc
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from src.classifier import build_classifier
+from src.model_registry import ModelBundle
+from src.autotune import TuningProfile
+from src.prefork import configure_worker_torch, freeze_heap, share_bundle_arrays, torch_threads_per_worker
+
+
+class TestPrefork(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_bundle_arrays_move_to_memory_maps(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(200, 16)).astype(np.float32)
+        y = rng.integers(0, 5, size=200)
+        model = build_classifier('knn', X, y, k=3)
+        bundle = ModelBundle('v1', model, {}, None, rng.normal(size=(200, 2)), y)
+        queries = rng.normal(size=(10, 16)).astype(np.float32)
+        expected = model.predict_proba(queries)
+
+        shared = share_bundle_arrays(bundle, self.workdir)
+        self.assertGreater(shared, X.nbytes)
+        self.assertIsInstance(model.X, np.memmap)
+        self.assertIsInstance(bundle.embeddings_2d, np.memmap)
+        self.assertFalse(model.X.flags.writeable)
+        np.testing.assert_array_equal(model.predict_proba(queries), expected)
+
+    def test_torch_threads_partitioned(self):
+        self.assertEqual(torch_threads_per_worker(4, cpu_count=16), 4)
+        self.assertEqual(torch_threads_per_worker(8, cpu_count=4), 1)
+
+    def test_tuning_caps_worker_threads(self):
+        import torch
+
+        before = torch.get_num_threads()
+        try:
+            tuning = TuningProfile(2, 1, [{'max_length': 64, 'batch_size': 8, 'token_budget': 528}])
+            self.assertEqual(configure_worker_torch(1, cpu_count=8, tuning=tuning), 2)
+            self.assertEqual(configure_worker_torch(8, cpu_count=8, tuning=tuning), 1)
+        finally:
+            torch.set_num_threads(before)
+
+    def test_tuning_sets_inter_op_threads(self):
+        tuning = TuningProfile(2, 2, [{'max_length': 64, 'batch_size': 8, 'token_budget': 528}])
+        with unittest.mock.patch('torch.set_num_threads'), \
+                unittest.mock.patch('torch.set_num_interop_threads') as set_inter:
+            configure_worker_torch(1, cpu_count=8, tuning=tuning)
+            set_inter.assert_called_once_with(2)
+            set_inter.reset_mock()
+            configure_worker_torch(1, cpu_count=8)
+            set_inter.assert_called_once_with(1)
+
+    def test_freeze_heap(self):
+        try:
+            self.assertGreater(freeze_heap(), 0)
+        finally:
+            gc.unfreeze()
+
+    @unittest.skipUnless(sys.platform == 'linux', 'smaps_rollup is Linux-only')
+    def test_read_smaps_rollup(self):
+        from scripts.measure_worker_memory import read_smaps_rollup
+        mem = read_smaps_rollup(os.getpid())
+        self.assertGreater(mem['Rss'], 0)
+        self.assertEqual(mem['USS'], mem['Private_Clean'] + mem['Private_Dirty'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+
+from src.profiling import RequestProfiler, cprofile_to, sample_stacks
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_request_profiler_writes_prof_file(self):
+        path = os.path.join(self.tmp_dir, 'requests.prof')
+        profiler = RequestProfiler()
+        self.assertTrue(profiler.start(60, path))
+        self.assertFalse(profiler.start(60, path))
+
+        handle = profiler.begin_request()
+        busy_wait(0.01)
+        profiler.end_request(handle)
+        profiler.finish()
+
+        self.assertFalse(profiler.active)
+        stats = pstats.Stats(path)
+        self.assertTrue(any(func[2] == 'busy_wait' for func in stats.stats))
+
+    def test_stack_sampler_sees_other_threads(self):
+        path = os.path.join(self.tmp_dir, 'stacks.folded')
+        worker = threading.Thread(target=busy_wait, args=(0.3,), name='worker')
+        worker.start()
+        samples = sample_stacks(0.1, path, interval=0.01)
+        worker.join()
+
+        self.assertGreater(samples, 0)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any(line.startswith('worker;') and 'busy_wait' in line for line in lines))
+
+    def test_cprofile_to(self):
+        path = os.path.join(self.tmp_dir, 'run.prof')
+        with cprofile_to(path):
+            busy_wait(0.01)
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
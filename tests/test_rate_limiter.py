@@ -0,0 +1,114 @@
+import unittest
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest.mock
+
+from src.rate_limiter import RateLimiter, SharedFileBackend
+
+
+def _hammer_shared_file(path, attempts, queue):
+    backend = SharedFileBackend(path, slots=64)
+    limiter = RateLimiter(max_requests=10, window_seconds=60, backend=backend)
+    queue.put(sum(limiter.is_allowed('10.0.0.1') for _ in range(attempts)))
+    backend.close()
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_limit_per_key(self):
+        limiter = RateLimiter(max_requests=3, window_seconds=60)
+        results = [limiter.is_allowed('1.1.1.1') for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertTrue(limiter.is_allowed('2.2.2.2'))
+        self.assertEqual(limiter.rejected, 2)
+
+    def test_window_recovers(self):
+        limiter = RateLimiter(max_requests=2, window_seconds=0.1)
+        self.assertTrue(limiter.is_allowed('ip'))
+        self.assertTrue(limiter.is_allowed('ip'))
+        self.assertFalse(limiter.is_allowed('ip'))
+        time.sleep(0.25)  # Two full windows later the previous count no longer applies
+        self.assertTrue(limiter.is_allowed('ip'))
+
+    def test_idle_keys_are_evicted(self):
+        limiter = RateLimiter(max_requests=5, window_seconds=0.05)
+        for i in range(100):
+            limiter.is_allowed(f'10.0.0.{i}')
+        self.assertEqual(len(limiter), 100)
+        time.sleep(0.2)
+        limiter.is_allowed('fresh')
+        self.assertEqual(len(limiter), 1)
+
+    def test_thread_safety(self):
+        limiter = RateLimiter(max_requests=50, window_seconds=60)
+        allowed = []
+
+        def worker():
+            allowed.append(sum(limiter.is_allowed('shared') for _ in range(20)))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sum(allowed), 50)
+
+
+class TestSharedFileBackend(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'predict.ratelimit')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_limit_shared_between_instances(self):
+        first = RateLimiter(max_requests=4, window_seconds=60, backend=SharedFileBackend(self.path, slots=16))
+        second = RateLimiter(max_requests=4, window_seconds=60, backend=SharedFileBackend(self.path, slots=16))
+        results = [limiter.is_allowed('ip') for limiter in (first, second) * 3]
+        self.assertEqual(results.count(True), 4)
+
+    def test_limit_shared_between_processes(self):
+        queue = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_hammer_shared_file, args=(self.path, 10, queue)) for _ in range(3)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        self.assertEqual(sum(queue.get() for _ in workers), 10)
+
+    def test_reopen_keeps_state(self):
+        backend = SharedFileBackend(self.path, slots=16)
+        limiter = RateLimiter(max_requests=2, window_seconds=60, backend=backend)
+        self.assertTrue(limiter.is_allowed('ip'))
+        backend.reopen()
+        self.assertTrue(limiter.is_allowed('ip'))
+        self.assertFalse(limiter.is_allowed('ip'))
+
+    def test_colliding_key_keeps_its_count_when_home_slot_goes_stale(self):
+        backend = SharedFileBackend(self.path, slots=4)
+        home = lambda key: backend._key_hash(key) % backend.slots
+        first = 'key-0'
+        second = next(f'key-{i}' for i in range(1, 1000) if home(f'key-{i}') == home(first))
+        limiter = RateLimiter(max_requests=3, window_seconds=60, backend=backend)
+        with unittest.mock.patch('src.rate_limiter.time.time', return_value=6000.0):
+            self.assertTrue(limiter.is_allowed(first))  # Takes the shared home slot
+        with unittest.mock.patch('src.rate_limiter.time.time', return_value=6060.0):
+            self.assertEqual([limiter.is_allowed(second) for _ in range(4)], [True, True, True, False])
+        # first's slot is stale now; second must still find its own slot and its count
+        with unittest.mock.patch('src.rate_limiter.time.time', return_value=6120.0):
+            self.assertFalse(limiter.is_allowed(second))
+        self.assertEqual(int((backend._table['key'] == backend._key_hash(second)).sum()), 1)
+
+    def test_table_stays_bounded(self):
+        limiter = RateLimiter(max_requests=1, window_seconds=60, backend=SharedFileBackend(self.path, slots=8))
+        for i in range(100):
+            self.assertTrue(limiter.is_allowed(f'scanner-{i}'))
+        self.assertEqual(os.path.getsize(self.path), 8 * SharedFileBackend.SLOT_DTYPE.itemsize)
+
+
+if __name__ == '__main__':
+    unittest.main()
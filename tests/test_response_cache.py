@@ -0,0 +1,161 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.response_cache import ResponseCache
+
+
+class StubFoldHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the ESMFold API: echoes the sequence inside a fake PDB."""
+    calls = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        with StubFoldHandler.lock:
+            StubFoldHandler.calls += 1
+        sequence = self.rfile.read(int(self.headers['Content-Length'])).decode()
+        time.sleep(0.2)  # Simulate upstream latency so concurrent requests overlap
+        body = f"HEADER STUB\nSEQRES {sequence}\nEND\n".encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_roundtrip_and_persistence(self):
+        cache = ResponseCache(self.cache_dir)
+        key = ResponseCache.key_for('MKTV')
+        self.assertIsNone(cache.get(key))
+        cache.put(key, 'PDB' * 100)
+
+        reopened = ResponseCache(self.cache_dir)
+        self.assertEqual(reopened.get(key), 'PDB' * 100)
+        self.assertEqual(reopened.stats()['entries'], 1)
+
+    def test_entries_are_compressed(self):
+        cache = ResponseCache(self.cache_dir)
+        cache.put('ab' * 32, 'ATOM' * 1000)
+        self.assertLess(cache.stats()['bytes'], 4000)
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(self.cache_dir, ttl_seconds=0.05)
+        cache.put('k1', 'value')
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('k1'))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(self.cache_dir, max_bytes=150)
+        for key in ('aa1', 'bb2'):
+            cache.put(key, os.urandom(20).hex())  # Incompressible, ~60 bytes gzipped: two fit
+            time.sleep(0.01)
+        # Reading the oldest entry makes bb2 the least recently used; FIFO would drop aa1
+        self.assertIsNotNone(cache.get('aa1'))
+        cache.put('cc3', os.urandom(20).hex())
+        self.assertIsNone(cache.get('bb2'))
+        self.assertIsNotNone(cache.get('aa1'))
+        self.assertIsNotNone(cache.get('cc3'))
+
+    def test_entries_from_other_processes_count_towards_max_bytes(self):
+        reader = ResponseCache(self.cache_dir, max_bytes=150)
+        writer = ResponseCache(self.cache_dir)  # e.g. another worker or warm_explanations
+        for key in ('aa1', 'bb2', 'cc3'):
+            writer.put(key, os.urandom(20).hex())
+            time.sleep(0.01)
+        for key in ('aa1', 'bb2', 'cc3'):
+            self.assertIsNotNone(reader.get(key))  # Adopting cc3 evicts the least recently used aa1
+        self.assertLessEqual(reader._total_bytes, 150)
+        self.assertFalse(os.path.exists(reader._path('aa1')))
+        self.assertIn('cc3', reader)
+
+    def test_memory_tier_and_preload(self):
+        ResponseCache(self.cache_dir).put('aa1', 'explanation')
+        cache = ResponseCache(self.cache_dir, memory_items=10)
+        self.assertEqual(cache.preload(), 1)
+        self.assertEqual(cache.stats()['memory_entries'], 1)
+        self.assertEqual(cache.get('aa1'), 'explanation')
+
+    def test_sees_entries_written_by_another_process(self):
+        cache = ResponseCache(self.cache_dir)
+        ResponseCache(self.cache_dir).put('bb2', 'from elsewhere')
+        self.assertIn('bb2', cache)
+        self.assertEqual(cache.get('bb2'), 'from elsewhere')
+
+    def test_errors_are_not_cached(self):
+        cache = ResponseCache(self.cache_dir)
+
+        def failing():
+            raise RuntimeError('upstream down')
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_compute('k1', failing)
+        value, cached = cache.get_or_compute('k1', lambda: 'ok')
+        self.assertEqual((value, cached), ('ok', False))
+
+
+class TestSingleFlightAgainstStubServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubFoldHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/foldSequence/v1/pdb/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        StubFoldHandler.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def fetch(self, sequence):
+        return requests.post(self.url, data=sequence, timeout=5).text
+
+    def test_concurrent_requests_share_one_upstream_call(self):
+        cache = ResponseCache(self.cache_dir)
+        sequence = 'MKTVRQERLK'
+        results = []
+
+        def worker():
+            results.append(cache.get_or_compute(ResponseCache.key_for(sequence), lambda: self.fetch(sequence)))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(StubFoldHandler.calls, 1)
+        self.assertEqual(len({value for value, _ in results}), 1)
+        self.assertEqual(sum(1 for _, cached in results if not cached), 1)
+
+        # Served from disk on the next request, even after a restart
+        value, cached = ResponseCache(self.cache_dir).get_or_compute(
+            ResponseCache.key_for(sequence), lambda: self.fetch(sequence))
+        self.assertTrue(cached)
+        self.assertIn('SEQRES MKTVRQERLK', value)
+        self.assertEqual(StubFoldHandler.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unittest
+import unittest.mock
+import os
+import shutil
+import tempfile
+import time
+
+import requests
+
+from src.upstream import CircuitBreaker, UpstreamClient, UpstreamUnavailableError
+from src.job_queue import JobStore
+from src.tasks import TaskManager
+
+
+def fake_response(status_code, text='OK'):
+    response = unittest.mock.Mock()
+    response.status_code = status_code
+    response.text = text
+    return response
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())   # Single trial call
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+
+class TestUpstreamClient(unittest.TestCase):
+    def make_client(self, **kwargs):
+        client = UpstreamClient('test', retries=2, backoff_base=0.001, **kwargs)
+        client.session.post = unittest.mock.Mock()
+        return client
+
+    def test_retries_overload_status_then_succeeds(self):
+        client = self.make_client()
+        client.session.post.side_effect = [fake_response(503), fake_response(200, 'PDB')]
+        response = client.post('http://upstream/fold', data='MKT')
+        self.assertEqual(response.text, 'PDB')
+        self.assertEqual(client.session.post.call_count, 2)
+
+    def test_returns_last_response_after_retries(self):
+        client = self.make_client()
+        client.session.post.return_value = fake_response(502)
+        self.assertEqual(client.post('http://upstream/fold').status_code, 502)
+        self.assertEqual(client.session.post.call_count, 3)
+
+    def test_timeouts_are_not_retried(self):
+        client = self.make_client()
+        client.session.post.side_effect = requests.exceptions.Timeout()
+        with self.assertRaises(requests.exceptions.Timeout):
+            client.post('http://upstream/fold')
+        self.assertEqual(client.session.post.call_count, 1)
+
+    def test_open_circuit_short_circuits(self):
+        client = self.make_client(failure_threshold=1)
+        client.session.post.side_effect = requests.exceptions.ConnectionError()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.post('http://upstream/fold')
+        with self.assertRaises(UpstreamUnavailableError):
+            client.post('http://upstream/fold')
+        self.assertEqual(client.session.post.call_count, 3)
+
+    def test_server_error_counts_as_failure(self):
+        client = self.make_client(failure_threshold=1)
+        client.session.post.return_value = fake_response(500)
+        self.assertEqual(client.post('http://upstream/fold').status_code, 500)
+        self.assertEqual(client.session.post.call_count, 1)
+        self.assertEqual(client.breaker.state, 'open')
+
+    def test_slot_timeout_does_not_strand_half_open_trial(self):
+        client = self.make_client(failure_threshold=1, reset_timeout=0.01, max_concurrency=1, acquire_timeout=0.01)
+        client.breaker.record_failure()
+        time.sleep(0.02)
+        client._slots.acquire()  # Every slot busy
+        with self.assertRaises(UpstreamUnavailableError):
+            client.post('http://upstream/fold')
+        client._slots.release()
+        client.session.post.return_value = fake_response(200, 'PDB')
+        self.assertEqual(client.post('http://upstream/fold').text, 'PDB')
+        self.assertEqual(client.breaker.state, 'closed')
+
+
+class TestTaskManager(unittest.TestCase):
+    def test_submit_and_wait(self):
+        tasks = TaskManager(max_workers=2)
+        task_id = tasks.submit(lambda x: ({'value': x * 2}, 200), 21)
+        task = tasks.wait(task_id, timeout=5)
+        self.assertEqual(task['status'], 'done')
+        self.assertEqual(task['result'], ({'value': 42}, 200))
+
+    def test_failed_task(self):
+        tasks = TaskManager(max_workers=1)
+
+        def boom():
+            raise RuntimeError('upstream exploded')
+
+        task = tasks.wait(tasks.submit(boom), timeout=5)
+        self.assertEqual(task['status'], 'failed')
+
+    def test_unknown_task(self):
+        self.assertIsNone(TaskManager().get('missing'))
+
+    def test_task_visible_through_shared_store(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        path = os.path.join(workdir, 'jobs.sqlite3')
+        runner = TaskManager(max_workers=1, store=JobStore(path))
+        # Another worker process: same database, none of the runner's in-memory tasks
+        poller = TaskManager(store=JobStore(path), poll_interval=0.01)
+        task_id = runner.submit(lambda x: ({'value': x * 2}, 200), 21)
+        task = poller.wait(task_id, timeout=5)
+        self.assertEqual(task['status'], 'done')
+        self.assertEqual(task['result'], [{'value': 42}, 200])  # JSON round trip
+        self.assertIsNone(poller.get('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Production entry point for pre-fork servers:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Everything is loaded once here, in the master, before workers are forked: the ESM model,
+the served ModelBundle and the explanation cache. Large arrays are moved onto shared
+memory maps and the heap is frozen, so workers share those pages copy-on-write instead
+of each holding a private copy. Measure with: python -m scripts.measure_worker_memory
+
+State that must agree across workers is shared:
+- rate limits live in mmap'd files under RATE_LIMIT_DIR (default cache/ratelimit here);
+- async task states (/api/tasks/<id>) are kept in the SQLite job database (JOB_DB_PATH);
+- every worker watches the model registry (MODEL_WATCH_SECONDS, default 10 here; 0 disables),
+  so publishing a version or POST /admin/reload reaches all of them.
+/metrics is not shared: each worker reports its own counters.
+"""
+import atexit
+import os
+import shutil
+
+# Per-process rate limiters would multiply every limit by the number of workers;
+# must be set before app creates its limiters
+os.environ.setdefault('RATE_LIMIT_DIR', 'cache/ratelimit')
+
+import app as app_module
+from src.prefork import configure_worker_torch, freeze_heap, share_bundle_arrays
+
+app = app_module.app
+logger = app_module.logger
+
+# tmpfs when available, so shared arrays never hit the disk
+SHARED_ARRAY_DIR = os.path.join(
+    os.environ.get('SHARED_ARRAY_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else 'cache/shared'),
+    f'protein-api-{os.getpid()}'
+)
+_MASTER_PID = os.getpid()
+# Workers only learn about a new CURRENT (or an /admin/reload another worker handled) by watching
+MODEL_WATCH_SECONDS = float(os.environ.get('MODEL_WATCH_SECONDS', 10))
+
+
+def _remove_shared_arrays():
+    # Workers run atexit handlers too; only the master owns the directory
+    if os.getpid() == _MASTER_PID:
+        shutil.rmtree(SHARED_ARRAY_DIR, ignore_errors=True)
+
+
+def preload():
+    app_module.load_resources()
+    logger.info(f"Preloaded {app_module.explain_cache.preload()} cached explanations into memory")
+    shared = share_bundle_arrays(app_module.model_registry.active, SHARED_ARRAY_DIR)
+    atexit.register(_remove_shared_arrays)
+    logger.info(f"Moved {shared / 1e6:.1f} MB of model arrays onto memory maps in {SHARED_ARRAY_DIR}")
+    logger.info(f"Froze {freeze_heap()} objects before fork")
+
+
+def after_fork(workers):
+    """Per-worker setup, called from gunicorn's post_fork hook."""
+    threads = configure_worker_torch(workers, tuning=app_module.extractor.tuning)
+    for limiter in (app_module.predict_limiter, app_module.fold_limiter, app_module.data_limiter,
+                    app_module.explain_limiter, app_module.batch_limiter):
+        if limiter.backend is not None:
+            limiter.backend.reopen()
+    if MODEL_WATCH_SECONDS > 0:
+        app_module.model_registry.watch(MODEL_WATCH_SECONDS)  # Threads do not survive fork
+    logger.info(f"Worker {os.getpid()} ready with {threads} torch threads")
+
+
+preload()